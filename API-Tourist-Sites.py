@@ -3,12 +3,37 @@ import json
 import os
 import time
 import threading
+import unicodedata
 import concurrent.futures
+from urllib.parse import urlsplit
+import numpy as np
 from dotenv import load_dotenv
 from geopy.distance import geodesic
 from geopy.geocoders import Nominatim
 from tabulate import tabulate
 
+# Modules du projet (importables depuis le paquet "modules" ou directement)
+try:
+    from modules.cache import CacheLRU
+    from modules.cache_geocodage import CacheGeocodage
+    from modules.matrice_distances import calculer_matrice_distances, matrice_haversine
+    from modules.solveurs import resoudre
+    from modules.singleflight import SingleFlight
+    from modules.client_http import ClientHTTP
+    from modules.analyse_json import AnalyseurTableauJSON, extraire_sites, valider_site
+    from modules.limiteur_debit import obtenir_limiteur
+    from modules.metriques import mesurer
+except ImportError:
+    from cache import CacheLRU
+    from cache_geocodage import CacheGeocodage
+    from matrice_distances import calculer_matrice_distances, matrice_haversine
+    from solveurs import resoudre
+    from singleflight import SingleFlight
+    from client_http import ClientHTTP
+    from analyse_json import AnalyseurTableauJSON, extraire_sites, valider_site
+    from limiteur_debit import obtenir_limiteur
+    from metriques import mesurer
+
 # Chargement de la clé API 
 DEFAULT_API_KEY = " !key "
 try:
@@ -17,27 +42,94 @@ try:
 except:
     GROQ_API_KEY = DEFAULT_API_KEY
 
+# Géocodeurs utilisables par OptimiseurItineraire
+MODES_GEOCODAGE = ("auto", "local", "nominatim")
+
+# Durée de vie (en secondes) d'une position approchée autour du centre-ville, faute de mieux
+DUREE_VIE_POSITION_APPROCHEE = 3600
+
+# Validation des coordonnées fournies par le modèle : marge autour de l'emprise de la ville et
+# distance maximale à la position médiane des sites (au moins DISPERSION_MIN_KM, sinon
+# FACTEUR_DISPERSION fois la distance médiane)
+MARGE_EMPRISE_KM = 10.0
+DISPERSION_MIN_KM = 3.0
+FACTEUR_DISPERSION = 4.0
+
+class _FluxCatalogue:
+    """
+    Catalogue d'une ville en cours de réception, partagé par tous les demandeurs en flux de cette ville
+    """
+    
+    def __init__(self):
+        self.sites = []
+        self.termine = False
+        self._condition = threading.Condition()
+    
+    def ajouter(self, site):
+        with self._condition:
+            self.sites.append(site)
+            self._condition.notify_all()
+    
+    def terminer(self, sites=None):
+        """
+        Marque la réception comme terminée ; les sites fournis remplacent un flux resté vide
+        (catalogue obtenu d'un chargement déjà en cours plutôt que reçu en flux)
+        """
+        with self._condition:
+            if sites and not self.sites:
+                self.sites = list(sites)
+            self.termine = True
+            self._condition.notify_all()
+    
+    def __iter__(self):
+        # Rejoue les sites déjà reçus puis attend les suivants jusqu'à la fin de la réception
+        position = 0
+        while True:
+            with self._condition:
+                while position >= len(self.sites) and not self.termine:
+                    self._condition.wait()
+                if position >= len(self.sites):
+                    return
+                site = self.sites[position]
+            position += 1
+            yield site
+
 class RecuperateurSitesTouristiques:
     """
     Classe pour récupérer les sites touristiques d'une ville en utilisant l'API Groq
     """
     
-    def __init__(self, cle_api=None):
+    def __init__(self, cle_api=None, backend_cache=None, client_http=None, artefact=None, coordonnees_llm=False):
         """
         Initialise le récupérateur avec la clé API
         
         Args:
             cle_api (str): La clé API pour Groq
+            backend_cache (BackendCache): Stockage partagé entre processus pour le cache des sites (optionnel)
+            client_http (ClientHTTP): Client HTTP partagé (un client avec pool de connexions est créé par défaut)
+            artefact (ArtefactVilles): Catalogues préchauffés, servis sans appel à l'API (optionnel)
+            coordonnees_llm (bool): Demande aussi au modèle la latitude et la longitude de chaque site
         """
         self.cle_api = cle_api or GROQ_API_KEY
         if not self.cle_api:
             self.cle_api = input("Veuillez entrer votre clé API Groq: ")
             
-        self.url_base = "https://api.groq.com/openai/v1/chat/completions"
+        self.url_base = os.getenv("GROQ_API_URL", "https://api.groq.com/openai/v1/chat/completions")
+        self.client_http = client_http or ClientHTTP()
         self.limite_sites = 20 
-        self.cache = {}  
         self.cache_expiry = 24 * 3600  
         
+        # Un catalogue par ville ; au-delà de cache_expiry il reste servi pendant son rafraîchissement
+        self.duree_vie_catalogue = 7 * 24 * 3600
+        self.cache = CacheLRU(max_entrees=500, duree_vie=self.duree_vie_catalogue, backend=backend_cache, espace="sites")
+        self.requetes_en_vol = SingleFlight()
+        self.artefact = artefact
+        self.coordonnees_llm = coordonnees_llm
+        self._rafraichissements = set()
+        self._verrou_rafraichissements = threading.Lock()
+        self._flux_en_cours = {}
+        self._verrou_flux = threading.Lock()
+        
         # Liste des catégories de sites touristiques 
         self.categories_predefinies = [
             "Édifices et patrimoine religieux",
@@ -105,9 +197,13 @@ class RecuperateurSitesTouristiques:
         """
         return self.categories_predefinies
     
+    @mesurer("obtenir_sites_filtres")
     def obtenir_sites_filtres(self, ville, categories_souhaitees, categories_exclues, nombre_sites=10):
         """
-        Fait une requête API pour obtenir des sites touristiques selon les préférences de l'utilisateur
+        Retourne les sites touristiques d'une ville selon les préférences de l'utilisateur
+        
+        Les sites sont choisis dans le catalogue de la ville : le nombre de sites et les catégories
+        ne déclenchent pas de nouvel appel à l'API.
         
         Args:
             ville (str): Le nom de la ville
@@ -118,40 +214,147 @@ class RecuperateurSitesTouristiques:
         Returns:
             list: Liste des sites touristiques correspondant aux critères
         """
-        # Vérification du cache
-        cache_key = f"{ville}_{nombre_sites}_{'-'.join(sorted(categories_souhaitees))}_{'-'.join(sorted(categories_exclues))}"
+        catalogue = self.obtenir_catalogue(ville)
+        if not catalogue:
+            catalogue = self.obtenir_sites_locaux(ville)
         
-        if cache_key in self.cache:
-            cache_entry = self.cache[cache_key]
-            if time.time() < cache_entry['expiry']:
-                print(f"Utilisation des résultats en cache pour {ville}")
-                return cache_entry['data']
+        return self.filtrer_catalogue(catalogue, categories_souhaitees, categories_exclues, nombre_sites)
+    
+    def obtenir_catalogue(self, ville):
+        """
+        Retourne le catalogue des sites d'une ville (jusqu'à limite_sites sites, avec leur catégorie)
         
+        Un catalogue plus ancien que cache_expiry est servi tel quel et rafraîchi en arrière-plan.
         
-        nombre_sites = min(nombre_sites, self.limite_sites)
+        Args:
+            ville (str): Le nom de la ville
+            
+        Returns:
+            list: Les sites du catalogue (vide si l'API n'a rien renvoyé)
+        """
+        if self.artefact is not None and ville in self.artefact:
+            return self.artefact.sites(ville)
         
-        # Prompt pour Groq 
-        prompt = f"""
-        Veuillez fournir une liste des {nombre_sites} sites touristiques les plus importants de {ville} qui correspondent aux critères suivants:
+        cle = self._cle_catalogue(ville)
+        entree = self.cache.lire(cle)
+        if entree is not None:
+            if time.time() - entree["date"] > self.cache_expiry:
+                self._rafraichir_catalogue(ville)
+            print(f"Utilisation des résultats en cache pour {ville}")
+            return entree["sites"]
         
+        # Les requêtes simultanées pour la même ville partagent un seul appel API
+        return self.requetes_en_vol.executer(cle, self._charger_catalogue, ville)
+    
+    def filtrer_catalogue(self, sites, categories_souhaitees, categories_exclues, nombre_sites):
+        """
+        Sélectionne localement les sites d'un catalogue
+        
+        Une catégorie demandée correspond à toutes les catégories qui la contiennent,
+        sans tenir compte de la casse ni des accents ("musées" correspond à "Musées thématiques").
+        
+        Args:
+            sites (list): Les sites du catalogue
+            categories_souhaitees (list): Liste des catégories souhaitées
+            categories_exclues (list): Liste des catégories à exclure
+            nombre_sites (int): Le nombre maximal de sites à retourner
+            
+        Returns:
+            list: Les sites retenus, dans l'ordre du catalogue
+        """
+        souhaitees = [self._normaliser_categorie(c) for c in categories_souhaitees or [] if c.strip()]
+        exclues = [self._normaliser_categorie(c) for c in categories_exclues or [] if c.strip()]
+        
+        resultat = []
+        for site in sites:
+            if len(resultat) >= nombre_sites:
+                break
+            categorie = self._normaliser_categorie(site.get("categorie", ""))
+            if souhaitees and not any(c in categorie for c in souhaitees):
+                continue
+            if any(c in categorie for c in exclues):
+                continue
+            resultat.append(site)
+        
+        return resultat
+    
+    @staticmethod
+    def _normaliser_categorie(categorie):
+        """
+        Met une catégorie en minuscules et sans accents pour la comparaison
+        """
+        decomposee = unicodedata.normalize("NFKD", categorie.strip().lower())
+        return "".join(c for c in decomposee if not unicodedata.combining(c))
+    
+    def _cle_catalogue(self, ville):
+        """
+        Construit la clé de cache du catalogue d'une ville
+        
+        Returns:
+            str: La clé de cache
+        """
+        return f"catalogue_{' '.join(ville.lower().split())}"
+    
+    def _rafraichir_catalogue(self, ville):
+        """
+        Rafraîchit le catalogue d'une ville dans un thread, sans bloquer l'appelant
+        
+        Args:
+            ville (str): Le nom de la ville
         """
+        cle = self._cle_catalogue(ville)
+        with self._verrou_rafraichissements:
+            if cle in self._rafraichissements:
+                return
+            self._rafraichissements.add(cle)
+        
+        def rafraichir():
+            try:
+                self.requetes_en_vol.executer(cle, self._charger_catalogue, ville)
+            except Exception as e:
+                print(f"Erreur lors du rafraîchissement du catalogue de {ville}: {e}")
+            finally:
+                with self._verrou_rafraichissements:
+                    self._rafraichissements.discard(cle)
         
-        if categories_souhaitees:
-            prompt += f"""
-        Sites touristiques à inclure (catégories): {', '.join(categories_souhaitees)}
+        threading.Thread(target=rafraichir, daemon=True).start()
+    
+    def _enregistrer_catalogue(self, ville, sites):
+        """
+        Met le catalogue d'une ville en cache et le sauvegarde dans un fichier local
+        """
+        self.cache.ecrire(self._cle_catalogue(ville), {"sites": sites, "date": time.time()})
+        self.sauvegarder_dans_fichier(ville, sites)
+    
+    def _construire_requete(self, ville):
         """
+        Construit les en-têtes et la charge utile de la requête du catalogue à l'API Groq
         
-        if categories_exclues:
-            prompt += f"""
-        Sites touristiques à exclure (catégories): {', '.join(categories_exclues)}
+        Args:
+            ville (str): Le nom de la ville
+            
+        Returns:
+            tuple: Les en-têtes HTTP et la charge utile JSON
         """
+        # Coordonnées demandées en option, vérifiées ensuite par OptimiseurItineraire
+        consigne_coordonnees = ""
+        exemple_coordonnees = ""
+        if self.coordonnees_llm:
+            consigne_coordonnees = """
+        5. La latitude et la longitude (degrés décimaux, WGS84)"""
+            exemple_coordonnees = """,
+                "latitude": 48.8584,
+                "longitude": 2.2945"""
+        
+        # Prompt pour Groq 
+        prompt = f"""
+        Veuillez fournir une liste des {self.limite_sites} sites touristiques les plus importants de {ville}.
         
-        prompt += f"""
         Pour chaque site touristique, incluez:
         1. Le nom
         2. Une brève description (1-2 phrases)  
-        3. La catégorie (une des catégories mentionnées ci-dessus)
-        4. L'adresse (aussi précise que possible)
+        3. La catégorie (exactement une des catégories suivantes: {', '.join(self.categories_predefinies)})
+        4. L'adresse (aussi précise que possible){consigne_coordonnees}
         
         La réponse doit être en français et au format JSON, comme suit:
         [
@@ -159,7 +362,7 @@ class RecuperateurSitesTouristiques:
                 "nom": "Nom du site",
                 "description": "Description brève",
                 "categorie": "Catégorie",
-                "adresse": "Adresse complète"
+                "adresse": "Adresse complète"{exemple_coordonnees}
             }},
             ...
         ]
@@ -167,7 +370,6 @@ class RecuperateurSitesTouristiques:
         Ne mettez AUCUN TEXTE supplémentaire avant ou après le JSON, juste le tableau JSON lui-même.
         """
         
-        # Requête API
         en_tetes = {
             "Content-Type": "application/json",
             "Authorization": f"Bearer {self.cle_api}"
@@ -184,9 +386,24 @@ class RecuperateurSitesTouristiques:
             "max_tokens": 2048
         }
         
+        return en_tetes, charge_utile
+    
+    @mesurer("appel_groq")
+    def _charger_catalogue(self, ville):
+        """
+        Interroge l'API Groq pour obtenir le catalogue d'une ville et le met en cache
+        
+        Args:
+            ville (str): Le nom de la ville
+            
+        Returns:
+            list: Les sites du catalogue (vide en cas d'échec)
+        """
+        en_tetes, charge_utile = self._construire_requete(ville)
+        
         try:
             # Envoi de la requête 
-            reponse = requests.post(self.url_base, headers=en_tetes, json=charge_utile, timeout=15)
+            reponse = self.client_http.post(self.url_base, headers=en_tetes, json=charge_utile, timeout=15)
             reponse.raise_for_status() 
             
             # Analyse de la réponse
@@ -195,59 +412,153 @@ class RecuperateurSitesTouristiques:
             # Extraction du contenu de la réponse
             contenu = resultat['choices'][0]['message']['content']
             
-            # Nettoyage du contenu pour obtenir uniquement le JSON
-            contenu = contenu.strip()
-            if contenu.startswith('```json'):
-                contenu = contenu[7:]
-            if contenu.endswith('```'):
-                contenu = contenu[:-3]
-            contenu = contenu.strip()
+            # Extraction en un seul parcours du tableau JSON, même entouré de texte ou tronqué
+            sites_touristiques, complet = extraire_sites(contenu, self.limite_sites)
             
-            # Analyse du JSON
-            try:
-                sites_touristiques = json.loads(contenu)
-                
-                # Limitation du nombre de sites
-                sites_touristiques = sites_touristiques[:self.limite_sites]
-                
-                # Sauvegarde dans le cache
-                self.cache[cache_key] = {
-                    'data': sites_touristiques,
-                    'expiry': time.time() + self.cache_expiry
-                }
-                
-                # Sauvegarde dans un fichier local
-                self.sauvegarder_dans_fichier(ville, sites_touristiques)
-                
+            if not sites_touristiques:
+                print(f"Aucun site valide dans la réponse pour {ville}")
+                print(f"Contenu reçu: {contenu[:500]}")
+                return []
+            
+            if not complet:
+                # Réponse tronquée : les sites récupérés sont utilisés mais pas mis en cache
+                print(f"Réponse tronquée pour {ville}: {len(sites_touristiques)} sites récupérés")
                 return sites_touristiques
-            except json.JSONDecodeError as e:
-                print(f"Erreur lors du décodage JSON: {e}")
-                print(f"Contenu reçu: {contenu}")
-                
-                # Correction du JSON mal formaté
-                try:
-                   
-                    while not (contenu.startswith('[') and contenu.endswith(']')):
-                        if not contenu.startswith('['):
-                            contenu = contenu[contenu.find('['):]
-                        if not contenu.endswith(']'):
-                            contenu = contenu[:contenu.rfind(']')+1]
-                    
-                    sites_touristiques = json.loads(contenu)
-                    return sites_touristiques[:self.limite_sites]
-                except (json.JSONDecodeError, ValueError) as e2:
-                    print(f"Impossible de corriger le JSON: {e2}")
-                    return self.obtenir_sites_locaux(ville)
+            
+            self._enregistrer_catalogue(ville, sites_touristiques)
+            return sites_touristiques
             
         except requests.exceptions.Timeout:
             print(f"Timeout: La requête API a pris trop de temps pour {ville}")
-            return self.obtenir_sites_locaux(ville)
         except requests.exceptions.RequestException as e:
             print(f"Erreur lors de la requête API pour les sites filtrés: {e}")
-            return self.obtenir_sites_locaux(ville)
         except Exception as e:
             print(f"Erreur inattendue lors de l'obtention des sites filtrés: {e}")
-            return self.obtenir_sites_locaux(ville)
+        return []
+    
+    def obtenir_sites_flux(self, ville, categories_souhaitees, categories_exclues, nombre_sites=10):
+        """
+        Variante en flux de obtenir_sites_filtres : chaque site est renvoyé dès que l'API a fini de le générer
+        
+        Si le catalogue de la ville n'est pas en cache, il est chargé en entier (et mis en cache)
+        pendant que les sites correspondant aux critères sont renvoyés. Les demandes simultanées pour
+        la même ville se rattachent au flux déjà en cours au lieu de relancer l'appel à l'API.
+        
+        Args:
+            ville (str): Le nom de la ville
+            categories_souhaitees (list): Liste des catégories souhaitées
+            categories_exclues (list): Liste des catégories à exclure
+            nombre_sites (int): Le nombre de sites à retourner
+            
+        Yields:
+            dict: Les sites touristiques, au fur et à mesure de leur réception
+        """
+        if self.artefact is not None and ville in self.artefact:
+            yield from self.filtrer_catalogue(self.artefact.sites(ville), categories_souhaitees, categories_exclues, nombre_sites)
+            return
+        
+        cle = self._cle_catalogue(ville)
+        entree = self.cache.lire(cle)
+        if entree is not None:
+            if time.time() - entree["date"] > self.cache_expiry:
+                self._rafraichir_catalogue(ville)
+            print(f"Utilisation des résultats en cache pour {ville}")
+            yield from self.filtrer_catalogue(entree["sites"], categories_souhaitees, categories_exclues, nombre_sites)
+            return
+        
+        with self._verrou_flux:
+            flux = self._flux_en_cours.get(cle)
+            if flux is None:
+                flux = _FluxCatalogue()
+                self._flux_en_cours[cle] = flux
+                # Le chargement continue (et met le catalogue en cache) même si ce demandeur abandonne
+                threading.Thread(target=self._diffuser_catalogue, args=(ville, flux), daemon=True).start()
+        
+        nombre_envoyes = 0
+        for site in flux:
+            if self.filtrer_catalogue([site], categories_souhaitees, categories_exclues, 1):
+                nombre_envoyes += 1
+                yield site
+                if nombre_envoyes >= nombre_sites:
+                    return
+        
+        if not flux.sites:
+            yield from self.filtrer_catalogue(
+                self.obtenir_sites_locaux(ville), categories_souhaitees, categories_exclues, nombre_sites
+            )
+    
+    def _diffuser_catalogue(self, ville, flux):
+        """
+        Charge en flux le catalogue d'une ville pour tous les demandeurs rattachés à flux
+        
+        Le chargement passe par requetes_en_vol : il est partagé avec les appels de obtenir_catalogue
+        pour la même ville, et se contente du résultat d'un chargement déjà en cours.
+        
+        Args:
+            ville (str): Le nom de la ville
+            flux (_FluxCatalogue): Le flux alimenté au fur et à mesure de la réception
+        """
+        cle = self._cle_catalogue(ville)
+        sites = []
+        try:
+            sites = self.requetes_en_vol.executer(cle, self._charger_catalogue_flux, ville, flux)
+        except Exception as e:
+            print(f"Erreur inattendue lors de l'obtention des sites filtrés: {e}")
+        finally:
+            with self._verrou_flux:
+                if self._flux_en_cours.get(cle) is flux:
+                    del self._flux_en_cours[cle]
+            flux.terminer(sites)
+    
+    def _charger_catalogue_flux(self, ville, flux):
+        """
+        Interroge l'API Groq en flux pour obtenir le catalogue d'une ville et le met en cache s'il est complet
+        
+        Args:
+            ville (str): Le nom de la ville
+            flux (_FluxCatalogue): Le flux auquel chaque site est ajouté dès sa réception
+            
+        Returns:
+            list: Les sites reçus (vide en cas d'échec)
+        """
+        en_tetes, charge_utile = self._construire_requete(ville)
+        charge_utile["stream"] = True
+        
+        catalogue = []
+        analyseur = AnalyseurTableauJSON()
+        try:
+            reponse = self.client_http.post(self.url_base, headers=en_tetes, json=charge_utile, timeout=15, stream=True)
+            reponse.raise_for_status()
+            
+            # Réponse au format "server-sent events": une ligne "data: {...}" par fragment
+            with reponse:
+                for ligne in reponse.iter_lines(decode_unicode=True):
+                    if not ligne or not ligne.startswith("data:"):
+                        continue
+                    donnees = ligne[5:].strip()
+                    if donnees == "[DONE]":
+                        break
+                    
+                    fragment = json.loads(donnees)['choices'][0].get('delta', {}).get('content') or ""
+                    for objet in analyseur.alimenter(fragment):
+                        site = valider_site(objet)
+                        if site is None or len(catalogue) >= self.limite_sites:
+                            continue
+                        catalogue.append(site)
+                        flux.ajouter(site)
+                    
+                    if analyseur.termine or len(catalogue) >= self.limite_sites:
+                        break
+        except requests.exceptions.Timeout:
+            print(f"Timeout: La requête API a pris trop de temps pour {ville}")
+        except requests.exceptions.RequestException as e:
+            print(f"Erreur lors de la requête API pour les sites filtrés: {e}")
+        except Exception as e:
+            print(f"Erreur inattendue lors de l'obtention des sites filtrés: {e}")
+        
+        if catalogue and (analyseur.termine or len(catalogue) >= self.limite_sites):
+            self._enregistrer_catalogue(ville, catalogue)
+        return catalogue
     
     def obtenir_sites_locaux(self, ville):
         """
@@ -345,18 +656,55 @@ class OptimiseurItineraire:
     Classe pour optimiser l'itinéraire entre les sites touristiques choisis
     """
     
-    def __init__(self, recuperateur, temps_entre_geocodage=0.5):
+    def __init__(self, recuperateur, temps_entre_geocodage=1.0, chemin_cache_geocodage="cache_geocodage.sqlite3",
+                 distance_exacte=False, solveur="auto", limite_temps_solveur=1.0, backend_cache=None, artefact=None,
+                 geocodeur_local=None, mode_geocodage="auto"):
         """
         Initialise l'optimiseur d'itinéraire
         
         Args:
             recuperateur: Instance de RecuperateurSitesTouristiques
-            temps_entre_geocodage: Temps d'attente entre geocodages (pour respecter les limites API)
+            temps_entre_geocodage: Intervalle minimal entre deux requêtes Nominatim, partagé par tout le processus
+                (la politique d'usage de Nominatim impose au plus une requête par seconde ; 0 pour ne pas
+                limiter, par exemple avec une instance locale)
+            chemin_cache_geocodage: Fichier SQLite du cache persistant des coordonnées (None pour le désactiver)
+            distance_exacte: Utilise la distance géodésique exacte au lieu de l'approximation haversine
+            solveur: Nom du solveur d'itinéraire ("auto", "glouton", "held_karp" ou "recherche_locale")
+            limite_temps_solveur: Temps de calcul maximal accordé au solveur, en secondes
+            backend_cache: Stockage partagé entre processus pour les coordonnées (remplace le fichier SQLite dédié)
+            artefact: Coordonnées et matrices de distances préchauffées (ArtefactVilles, optionnel)
+            geocodeur_local: Géocodeur hors ligne (GeocodeurLocal, optionnel)
+            mode_geocodage: "auto" (géocodeur local puis Nominatim en secours), "local" ou "nominatim"
         """
+        if mode_geocodage not in MODES_GEOCODAGE:
+            raise ValueError(f"Mode de géocodage inconnu: {mode_geocodage}")
+        if mode_geocodage == "local" and geocodeur_local is None:
+            raise ValueError("Le mode de géocodage 'local' nécessite un géocodeur local")
+
         self.recuperateur = recuperateur
-        self.geolocator = Nominatim(user_agent="planificateur_touristique")
+        # NOMINATIM_URL permet de viser une autre instance (serveur local, bouchon de test)
+        url_nominatim = urlsplit(os.getenv("NOMINATIM_URL", "https://nominatim.openstreetmap.org"))
+        self.geolocator = Nominatim(user_agent="planificateur_touristique",
+                                    domain=url_nominatim.netloc + url_nominatim.path.rstrip("/"),
+                                    scheme=url_nominatim.scheme)
         self.temps_entre_geocodage = temps_entre_geocodage
-        self.cache_coordonnees = {} 
+        # Un intervalle nul ou négatif désactive la limitation, comme l'ancienne attente fixe
+        debit = 1.0 / temps_entre_geocodage if temps_entre_geocodage > 0 else None
+        self.limiteur = obtenir_limiteur("nominatim", debit=debit)
+        if backend_cache is not None:
+            self.cache_persistant = backend_cache
+        else:
+            self.cache_persistant = CacheGeocodage(chemin_cache_geocodage) if chemin_cache_geocodage else None
+        self.cache_coordonnees = CacheLRU(
+            max_entrees=20000, duree_vie=30 * 24 * 3600, backend=self.cache_persistant,
+            espace="geocodage" if backend_cache is not None else None
+        )
+        self.distance_exacte = distance_exacte
+        self.solveur = solveur
+        self.limite_temps_solveur = limite_temps_solveur
+        self.artefact = artefact
+        self.geocodeur_local = geocodeur_local if mode_geocodage != "nominatim" else None
+        self.mode_geocodage = mode_geocodage
         self.max_workers = 5  
     
     def obtenir_coordonnees(self, adresse, ville):
@@ -370,32 +718,49 @@ class OptimiseurItineraire:
         Returns:
             tuple: Les coordonnées (latitude, longitude) ou None en cas d'erreur
         """
-        # Vérifie si l'adresse est déjà dans le cache
-        cle_cache = f"{adresse}, {ville}".lower()
-        if cle_cache in self.cache_coordonnees:
-            return self.cache_coordonnees[cle_cache]
+        # Coordonnées préchauffées
+        coordonnees = self._coordonnees_artefact(adresse, ville)
+        if coordonnees is not None:
+            return coordonnees
+        
+        # Vérifie si l'adresse est déjà dans le cache (mémoire puis stockage persistant)
+        cle_cache = CacheGeocodage.normaliser_cle(adresse, ville)
+        coordonnees = self.cache_coordonnees.lire(cle_cache)
+        if coordonnees is not None:
+            return tuple(coordonnees)
+        
+        # Géocodeur local hors ligne ; Nominatim ne sert qu'en secours
+        if self.geocodeur_local is not None:
+            coordonnees = self.geocodeur_local.geocoder(adresse, ville)
+            if coordonnees is not None:
+                return coordonnees
+            if self.mode_geocodage == "local":
+                return None
         
         # Ajoute la ville à l'adresse
         adresse_complete = f"{adresse}, {ville}"
         
         try:
-            # Utilise le géocodage pour obtenir les coordonnées avec timeout
+            # Utilise le géocodage pour obtenir les coordonnées avec timeout, au débit autorisé
+            self.limiteur.acquerir()
             lieu = self.geolocator.geocode(adresse_complete, timeout=5)
-            time.sleep(self.temps_entre_geocodage)  
             
             if lieu:
                 coordonnees = (lieu.latitude, lieu.longitude)
-                self.cache_coordonnees[cle_cache] = coordonnees
+                self.cache_coordonnees.ecrire(cle_cache, coordonnees)
                 return coordonnees
             else:
                 # Essayez juste avec la ville si l'adresse complète échoue
+                self.limiteur.acquerir()
                 lieu_ville = self.geolocator.geocode(ville, timeout=5)
                 if lieu_ville:
                     import random
                     lat_offset = random.uniform(-0.01, 0.01)
                     lon_offset = random.uniform(-0.01, 0.01)
                     coordonnees = (lieu_ville.latitude + lat_offset, lieu_ville.longitude + lon_offset)
-                    self.cache_coordonnees[cle_cache] = coordonnees
+                    # Position approximative : gardée peu de temps et jamais dans le cache persistant ou partagé
+                    self.cache_coordonnees.ecrire(cle_cache, coordonnees, duree_vie=DUREE_VIE_POSITION_APPROCHEE,
+                                                  local=True)
                     return coordonnees
                 print(f"Erreur lors du géocodage de l'adresse: {adresse_complete}")
                 return None
@@ -403,14 +768,141 @@ class OptimiseurItineraire:
             print(f"Erreur lors du géocodage: {str(e)}")
             return None
     
-    def geocoder_par_lots(self, adresses, ville, taille_lot=5):
+    def obtenir_emprise_ville(self, ville):
         """
-        Géocode plusieurs adresses en parallèle par lots
+        Obtient l'emprise géographique d'une ville (mise en cache)
+        
+        Le géocodeur local est consulté en premier, puis Nominatim (une seule requête par ville).
+        
+        Args:
+            ville (str): Le nom de la ville
+            
+        Returns:
+            tuple: (sud, nord, ouest, est) en degrés ou None si elle n'a pas pu être déterminée
+        """
+        cle_cache = CacheGeocodage.normaliser_cle("__emprise__", ville)
+        emprise = self.cache_coordonnees.lire(cle_cache)
+        if emprise is not None:
+            return tuple(emprise)
+        
+        if self.geocodeur_local is not None:
+            emprise = self.geocodeur_local.emprise_ville(ville)
+        
+        if emprise is None and self.mode_geocodage != "local":
+            try:
+                self.limiteur.acquerir()
+                lieu = self.geolocator.geocode(ville, timeout=5)
+                if lieu and lieu.raw.get("boundingbox"):
+                    # Nominatim renvoie [sud, nord, ouest, est]
+                    emprise = tuple(float(valeur) for valeur in lieu.raw["boundingbox"])
+            except Exception as e:
+                print(f"Erreur lors du géocodage de la ville {ville}: {str(e)}")
+        
+        if emprise is not None:
+            self.cache_coordonnees.ecrire(cle_cache, emprise)
+        return emprise
+    
+    def valider_coordonnees_fournies(self, sites, ville):
+        """
+        Vérifie les coordonnées fournies avec les sites (champs latitude et longitude)
+        
+        Des coordonnées sont retenues si elles sont dans l'emprise de la ville (avec une marge
+        de MARGE_EMPRISE_KM) et proches de la position médiane des autres sites.
+        
+        Args:
+            sites (list): Liste des sites touristiques
+            ville (str): La ville où se trouvent les sites
+            
+        Returns:
+            list: Les coordonnées (latitude, longitude) validées, ou None, pour chaque site
+        """
+        coordonnees = [None] * len(sites)
+        for i, site in enumerate(sites):
+            try:
+                latitude, longitude = float(site["latitude"]), float(site["longitude"])
+            except (KeyError, TypeError, ValueError):
+                continue
+            if -90 <= latitude <= 90 and -180 <= longitude <= 180 and (latitude, longitude) != (0.0, 0.0):
+                coordonnees[i] = (latitude, longitude)
+        
+        indices = [i for i, c in enumerate(coordonnees) if c is not None]
+        if not indices:
+            return coordonnees
+        
+        # Emprise de la ville, élargie d'une marge (les sites en périphérie restent acceptés)
+        emprise = self.obtenir_emprise_ville(ville)
+        if emprise is not None:
+            sud, nord, ouest, est = emprise
+            marge_lat = MARGE_EMPRISE_KM / 111.32
+            marge_lon = marge_lat / max(np.cos(np.radians((sud + nord) / 2)), 1e-6)
+            for i in indices:
+                latitude, longitude = coordonnees[i]
+                if not (sud - marge_lat <= latitude <= nord + marge_lat and ouest - marge_lon <= longitude <= est + marge_lon):
+                    coordonnees[i] = None
+            indices = [i for i in indices if coordonnees[i] is not None]
+        
+        # Dispersion : sans emprise connue, trois sites au moins sont nécessaires pour juger
+        if len(indices) < 3:
+            return coordonnees if emprise is not None else [None] * len(sites)
+        
+        points = np.array([coordonnees[i] for i in indices])
+        mediane = np.median(points, axis=0)
+        distances = matrice_haversine(np.vstack([mediane, points]))[0, 1:]
+        distance_max = max(DISPERSION_MIN_KM, FACTEUR_DISPERSION * float(np.median(distances)))
+        for i, distance in zip(indices, distances):
+            if distance > distance_max:
+                coordonnees[i] = None
+        
+        return coordonnees
+    
+    def _coordonnees_artefact(self, adresse, ville):
+        """
+        Lit les coordonnées d'une adresse dans l'artefact préchauffé
+        
+        Returns:
+            tuple: Les coordonnées (latitude, longitude) ou None si absentes
+        """
+        if self.artefact is None:
+            return None
+        indice = self.artefact.indice_site(ville, adresse)
+        if indice is None:
+            return None
+        latitude, longitude = self.artefact.coordonnees(ville)[indice]
+        if np.isnan(latitude) or np.isnan(longitude):
+            return None
+        return (float(latitude), float(longitude))
+    
+    def _matrice_artefact(self, sites, ville):
+        """
+        Extrait de l'artefact préchauffé la matrice des distances entre des sites
+
+        Returns:
+            numpy.ndarray: La matrice (n, n) en kilomètres, ou None si un site est absent de l'artefact
+            ou n'y a pas de coordonnées ou de distances (NaN)
+        """
+        if self.artefact is None or ville not in self.artefact:
+            return None
+        lignes = [self.artefact.indice_site(ville, site.get("adresse", "")) for site in sites]
+        if None in lignes:
+            return None
+        if not np.isfinite(self.artefact.coordonnees(ville)[lignes]).all():
+            return None
+        matrice = self.artefact.matrice_distances(ville)[np.ix_(lignes, lignes)].astype(float)
+        if not np.isfinite(matrice).all():
+            return None
+        return matrice
+
+    @mesurer("geocoder_par_lots")
+    def geocoder_par_lots(self, adresses, ville):
+        """
+        Géocode plusieurs adresses en parallèle
+        
+        Les adresses en cache sont résolues immédiatement ; les autres partent au rythme
+        du limiteur de débit partagé.
         
         Args:
             adresses (list): Liste des adresses à géocoder
             ville (str): La ville
-            taille_lot (int): Taille de chaque lot
             
         Returns:
             list: Liste des coordonnées correspondantes
@@ -423,8 +915,6 @@ class OptimiseurItineraire:
             for i, adresse in enumerate(adresses):
                 future = executor.submit(self.obtenir_coordonnees, adresse, ville)
                 futures_to_index[future] = i
-                if i % taille_lot == 0 and i > 0:
-                    time.sleep(1)
             
             # Préparer le tableau de résultats avec des espaces réservés
             resultats = [None] * len(adresses)
@@ -455,9 +945,23 @@ class OptimiseurItineraire:
             return geodesic(coord1, coord2).kilometers
         return float('inf')
     
+    def calculer_matrice_distances(self, coordonnees):
+        """
+        Calcule la matrice des distances entre tous les couples de coordonnées
+        
+        Args:
+            coordonnees (list): Liste de coordonnées (latitude, longitude)
+            
+        Returns:
+            numpy.ndarray: Matrice (n, n) des distances en kilomètres
+        """
+        return calculer_matrice_distances(coordonnees, exacte=self.distance_exacte)
+    
+    @mesurer("optimiser_itineraire")
     def optimiser_itineraire(self, sites, ville, site_depart_nom):
         """
-        Optimise l'itinéraire en utilisant un algorithme glouton pour trouver le lieu le plus proche suivant
+        Optimise l'itinéraire avec le solveur configuré (Held-Karp exact jusqu'à 12 sites,
+        plus proche voisin amélioré par 2-opt et Or-opt au-delà)
         
         Args:
             sites (list): Liste des sites touristiques
@@ -469,9 +973,13 @@ class OptimiseurItineraire:
         """
         print("Calcul de l'itinéraire optimal...")
         
-        # Obtenir les coordonnées de tous les sites en parallèle
-        adresses = [site.get("adresse", "") for site in sites]
-        coordonnees = self.geocoder_par_lots(adresses, ville)
+        # Coordonnées fournies par le modèle et validées ; seuls les autres sites sont géocodés, en parallèle
+        coordonnees = self.valider_coordonnees_fournies(sites, ville)
+        a_geocoder = [i for i, c in enumerate(coordonnees) if c is None]
+        if a_geocoder:
+            adresses = [sites[i].get("adresse", "") for i in a_geocoder]
+            for i, resultat in zip(a_geocoder, self.geocoder_par_lots(adresses, ville)):
+                coordonnees[i] = resultat
         
         # Appliquer les coordonnées aux sites
         for i, site in enumerate(sites):
@@ -485,46 +993,31 @@ class OptimiseurItineraire:
             return []
         
         # Recherche du site de départ dans la liste des sites valides
-        site_depart = None
-        for site in sites_valides:
+        index_depart = None
+        for i, site in enumerate(sites_valides):
             if site_depart_nom.lower() in site["nom"].lower():
-                site_depart = site
+                index_depart = i
                 break
         
         # Si le site de départ n'est pas trouvé, utilise le premier site
-        if not site_depart:
+        if index_depart is None:
             print(f"Site de départ '{site_depart_nom}' non trouvé. Utilisation du premier site.")
-            site_depart = sites_valides[0]
+            index_depart = 0
         
-        # Initialise l'itinéraire avec le site de départ
-        itineraire = [site_depart]
-        sites_restants = [site for site in sites_valides if site != site_depart]
+        # Matrice de toutes les distances entre sites : extraite de l'artefact si tous les sites
+        # y figurent avec des coordonnées et des distances connues, sinon calculée en une seule fois
+        matrice = self._matrice_artefact(sites_valides, ville)
+        if matrice is None:
+            matrice = self.calculer_matrice_distances([site["coordonnees"] for site in sites_valides])
         
-        # Pour trouver la destination la plus proche suivante
-        while sites_restants:
-            site_actuel = itineraire[-1]
-            coordonnees_actuelles = site_actuel["coordonnees"]
-            
-            site_suivant = None
-            distance_min = float('inf')
-            
-            # Trouve le site le plus proche parmi ceux qui restent
-            for site in sites_restants:
-                coordonnees = site["coordonnees"]
-                distance = self.calculer_distance(coordonnees_actuelles, coordonnees)
-                
-                if distance < distance_min:
-                    distance_min = distance
-                    site_suivant = site
-            
-            itineraire.append(site_suivant)
-            sites_restants.remove(site_suivant)
-        
-        # Calcul des distances entre sites consécutifs
-        for i in range(len(itineraire) - 1):
-            coord1 = itineraire[i]["coordonnees"]
-            coord2 = itineraire[i + 1]["coordonnees"]
-            itineraire[i]["distance_suivant"] = self.calculer_distance(coord1, coord2)
+        # Ordre de visite calculé par le solveur, le site de départ restant en tête
+        ordre = resoudre(matrice, index_depart, self.solveur, self.limite_temps_solveur)
+        
+        itineraire = [sites_valides[i] for i in ordre]
+        
+        # Distances entre sites consécutifs lues dans la matrice
+        for i in range(len(ordre) - 1):
+            itineraire[i]["distance_suivant"] = float(matrice[ordre[i], ordre[i + 1]])
         
         # Pour le dernier site, la distance est 0
         itineraire[-1]["distance_suivant"] = 0
@@ -71,7 +71,16 @@ function initSocketConnection() {
 			loadFallbackTransportOptions()
 		})
 
-		socket.on('transport_result', function (data) {
+		// Cached legs arrive together, the others one by one as they are resolved
+		socket.on('transport_batch_result', function (data) {
+			if (data.error) {
+				console.error('Transport batch error:', data.error)
+				return
+			}
+			data.results.forEach(handleTransportResult)
+		})
+
+		socket.on('transport_leg_result', function (data) {
 			handleTransportResult(data)
 		})
 
@@ -88,6 +97,7 @@ function initSocketConnection() {
 // Load transport options via Socket.IO
 function loadTransportOptionsViaSocket(socket) {
 	const stepCount = itinerairePoints.length
+	const legs = []
 
 	// For each step (except the last one), request transport options
 	for (let i = 0; i < stepCount - 1; i++) {
@@ -97,22 +107,36 @@ function loadTransportOptionsViaSocket(socket) {
 		const transportSection = document.getElementById(`transport-${i + 1}`)
 		if (!transportSection) continue
 
-		// Show loading indicator
-		const transportLoading =
-			transportSection.querySelector('.transport-loading')
-		const transportOptions =
-			transportSection.querySelector('.transport-options')
-
-		if (transportLoading) transportLoading.classList.remove('hidden')
-		if (transportOptions) transportOptions.classList.add('hidden')
+		if (currentStep.transport_estimates) {
+			// Show the server's estimates at once, the scraped options replace them when they arrive
+			handleTransportResult({
+				options: currentStep.transport_estimates,
+				step_id: i + 1,
+			})
+		} else {
+			// Show loading indicator
+			const transportLoading =
+				transportSection.querySelector('.transport-loading')
+			const transportOptions =
+				transportSection.querySelector('.transport-options')
+
+			if (transportLoading) transportLoading.classList.remove('hidden')
+			if (transportOptions) transportOptions.classList.add('hidden')
+		}
 
-		// Request transport options via Socket.IO
-		socket.emit('request_transport', {
+		legs.push({
 			origin: currentStep.address,
 			destination: nextStep.address,
+			origin_coordinates: currentStep.coordinates,
+			destination_coordinates: nextStep.coordinates,
 			step_id: i + 1,
 		})
 	}
+
+	// Request all legs in a single Socket.IO message
+	if (legs.length) {
+		socket.emit('request_transport_batch', { city: ville, legs: legs })
+	}
 }
 
 // Handle transport result from Socket.IO
@@ -141,7 +165,7 @@ function handleTransportResult(data) {
 		let optionsHTML = ''
 
 		data.options.forEach(option => {
-			const transportType = getTransportType(option)
+			const transportType = getTransportType(option.name)
 
 			optionsHTML += `
 					<div class="transport-option">
@@ -151,8 +175,8 @@ function handleTransportResult(data) {
 							<div class="transport-details">
 									<div class="transport-mode">${transportType.name}</div>
 									<div class="transport-info">
-											<span><i class="fas fa-clock"></i> ${extractTime(option)}</span>
-											<span><i class="fas fa-euro-sign"></i> ${extractPrice(option)}</span>
+											<span><i class="fas fa-clock"></i> ${formatDuration(option.minutes)}</span>
+											<span><i class="fas fa-euro-sign"></i> ${formatPrice(option)}</span>
 									</div>
 							</div>
 					</div>`
@@ -189,8 +213,13 @@ function loadFallbackTransportOptions() {
 		if (transportLoading) transportLoading.classList.add('hidden')
 		if (transportOptions) transportOptions.classList.remove('hidden')
 
-		// Generate fallback options
-		if (transportOptions) {
+		// Server estimates first, options computed in the browser otherwise
+		if (currentStep.transport_estimates) {
+			handleTransportResult({
+				options: currentStep.transport_estimates,
+				step_id: i + 1,
+			})
+		} else if (transportOptions) {
 			const distance = calculateDistance(
 				currentStep.coordinates[0],
 				currentStep.coordinates[1],
@@ -415,8 +444,8 @@ function initMap() {
 }
 
 // Helper function to determine transport type and icon
-function getTransportType(option) {
-	const text = option.toLowerCase()
+function getTransportType(name) {
+	const text = name.toLowerCase()
 
 	if (text.includes('bus') || text.includes('autobus')) {
 		return { name: 'Bus', icon: 'fas fa-bus' }
@@ -430,6 +459,8 @@ function getTransportType(option) {
 		return { name: 'Train', icon: 'fas fa-train' }
 	} else if (text.includes('tram')) {
 		return { name: 'Tramway', icon: 'fas fa-tram' }
+	} else if (text.includes('en commun')) {
+		return { name: 'Transports en commun', icon: 'fas fa-bus' }
 	} else if (text.includes('taxi')) {
 		return { name: 'Taxi', icon: 'fas fa-taxi' }
 	} else if (
@@ -447,28 +478,20 @@ function getTransportType(option) {
 	}
 }
 
-// Helper function to extract time from the option text
-function extractTime(option) {
-	const timeMatch = option.match(/\b(\d+)h\s?(\d+)?min?|\b(\d+)\s?min/i)
-	if (timeMatch) {
-		if (timeMatch[1] && timeMatch[2]) {
-			return `${timeMatch[1]}h ${timeMatch[2]}min`
-		} else if (timeMatch[1]) {
-			return `${timeMatch[1]}h`
-		} else if (timeMatch[3]) {
-			return `${timeMatch[3]}min`
-		}
-	}
-	return 'Durée inconnue'
+// Helper function to format a duration in minutes
+function formatDuration(minutes) {
+	if (minutes < 60) return `${minutes}min`
+	return `${Math.floor(minutes / 60)}h ${String(minutes % 60).padStart(2, '0')}min`
 }
 
-// Helper function to extract price from the option text
-function extractPrice(option) {
-	const priceMatch = option.match(/\b(\d+(?:[,.]\d+)?)\s?€/)
-	if (priceMatch) {
-		return `${priceMatch[1]}€`
+// Helper function to format an option's price or price range
+function formatPrice(option) {
+	const currency = option.currency === 'EUR' ? '€' : ` ${option.currency}`
+	const amount = value => (Number.isInteger(value) ? value : value.toFixed(2))
+	if (option.price_max !== null && option.price_max !== undefined) {
+		return `${amount(option.price)}–${amount(option.price_max)}${currency}`
 	}
-	return 'Prix inconnu'
+	return `${amount(option.price)}${currency}`
 }
 
 // Initialize language selector functionality
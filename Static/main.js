@@ -93,6 +93,7 @@ function initCityForm() {
 			const formData = new FormData()
 			formData.append('ville', cityInput.value)
 			formData.append('nombre_sites', sitesCount.value)
+			formData.append('stream', '1')
 
 			// Start progress animation
 			let progressDots = 0
@@ -34,8 +34,122 @@ document.addEventListener('DOMContentLoaded', function () {
 
 	// Process sites JSON if available
 	processSitesData()
+
+	// Receive sites over Socket.IO when the page was rendered in streaming mode
+	initSitesStream()
 })
 
+// Receive sites one by one over Socket.IO as the server generates them
+function initSitesStream() {
+	if (typeof sitesStream === 'undefined') return
+
+	const subtitle = document.querySelector('.subtitle')
+
+	if (typeof io === 'undefined') {
+		console.error('Socket.IO client not available, cannot stream sites')
+		if (subtitle) subtitle.textContent = 'Impossible de charger les sites touristiques.'
+		return
+	}
+
+	window.sitesData = []
+	if (subtitle) subtitle.textContent = 'Recherche des sites touristiques...'
+
+	const socket = io()
+	let requested = false
+
+	socket.on('connect', () => {
+		// Only ask once, even if the connection is re-established
+		if (requested) return
+		requested = true
+		socket.emit('request_sites', {
+			ville: sitesStream.ville,
+			nombre_sites: sitesStream.nombre_sites,
+		})
+	})
+
+	socket.on('site_result', data => {
+		if (data && data.site) appendSiteCard(data.site, data.index)
+	})
+
+	socket.on('sites_done', data => {
+		socket.disconnect()
+
+		const categories = new Set()
+		window.sitesData.forEach(site => {
+			if (site && site.categorie) categories.add(site.categorie)
+		})
+		window.siteCategories = Array.from(categories).sort()
+		enhanceCategoryDropdown(window.siteCategories)
+
+		if (!data || !data.count) {
+			if (subtitle) subtitle.textContent = 'Aucun site touristique trouvé.'
+			return
+		}
+		if (subtitle) {
+			subtitle.textContent =
+				'Sélectionnez les sites que vous souhaitez visiter et définissez votre point de départ.'
+		}
+	})
+}
+
+// Escape text before inserting it into HTML markup
+function escapeHtml(text) {
+	const div = document.createElement('div')
+	div.textContent = text == null ? '' : String(text)
+	return div.innerHTML.replace(/"/g, '&quot;')
+}
+
+// Add a site card with the same markup as the server-side template
+function appendSiteCard(site, index) {
+	const grid = document.querySelector('.sites-grid')
+	if (!grid) return
+
+	window.sitesData[index] = site
+
+	// Keep the JSON sent with the form in sync with the displayed cards
+	const sitesDataElement = document.getElementById('sites-data')
+	if (sitesDataElement) {
+		sitesDataElement.textContent = JSON.stringify(window.sitesData)
+	}
+
+	const number = index + 1
+	const category = escapeHtml(site.categorie)
+	const card = document.createElement('div')
+	card.className = 'site-card animate__animated animate__fadeIn'
+	card.setAttribute('data-category', site.categorie || '')
+	card.innerHTML = `
+		<div class="site-card-header">
+			<div class="category-badge">${category}</div>
+			<div class="selection-checkbox">
+				<input type="checkbox" id="site-${number}" name="sites_selected" value="${index}" checked />
+				<label for="site-${number}"></label>
+			</div>
+		</div>
+		<h3 class="site-name">${escapeHtml(site.nom)}</h3>
+		<p class="site-description">${escapeHtml(site.description)}</p>
+		<div class="site-address">
+			<i class="fas fa-map-marker-alt"></i>
+			<span>${escapeHtml(site.adresse)}</span>
+		</div>
+		<div class="starting-point">
+			<input type="radio" name="starting_point" id="start-${number}" value="${index}" ${index === 0 ? 'checked' : ''}>
+			<label for="start-${number}">Démarrer ici</label>
+		</div>
+	`
+
+	// Respect the category filter currently selected
+	const categoryFilter = document.getElementById('category-filter')
+	if (
+		categoryFilter &&
+		categoryFilter.value !== 'all' &&
+		categoryFilter.value !== site.categorie
+	) {
+		card.style.display = 'none'
+	}
+
+	grid.appendChild(card)
+}
+
 // Process sites data from JSON if available
 function processSitesData() {
 	// Check if sites data is available
@@ -0,0 +1,158 @@
+import json
+
+# Taille maximale du texte analysé et d'un objet individuel (en caractères)
+TAILLE_MAX_CONTENU = 1_000_000
+TAILLE_MAX_OBJET = 20_000
+
+# Champs d'un site touristique : obligatoires et facultatifs (avec leur valeur par défaut)
+CHAMPS_OBLIGATOIRES = ("nom", "adresse")
+CHAMPS_FACULTATIFS = {"description": "", "categorie": "Autre"}
+
+
+class AnalyseurTableauJSON:
+    """
+    Analyse incrémentale d'un tableau JSON d'objets, reçu par fragments.
+
+    Chaque objet de premier niveau est renvoyé dès que son accolade fermante est reçue.
+    Le texte qui précède le tableau (balises ```json, phrases d'introduction) est ignoré, y compris
+    les crochets d'une phrase qui ne commencent pas un tableau d'objets.
+    Chaque caractère n'est examiné qu'une seule fois et chaque objet n'est décodé qu'une fois,
+    d'où un temps d'exécution linéaire quelle que soit la réponse.
+    """
+
+    def __init__(self):
+        self._texte = ""
+        self._position = 0
+        self._profondeur = 0
+        self._debut_objet = None
+        self._dans_chaine = False
+        self._echappement = False
+        self._nb_objets = 0
+        self.tableau_ouvert = False
+        self.termine = False
+
+    def alimenter(self, fragment):
+        """
+        Ajoute un fragment de texte et retourne les objets complétés
+
+        Args:
+            fragment (str): La suite du texte reçu
+
+        Returns:
+            list: Les objets (dict) terminés dans ce fragment
+        """
+        if self.termine or not fragment:
+            return []
+
+        objets = []
+        texte = self._texte + fragment
+        i = self._position
+
+        while i < len(texte):
+            caractere = texte[i]
+
+            if self._dans_chaine:
+                if self._echappement:
+                    self._echappement = False
+                elif caractere == "\\":
+                    self._echappement = True
+                elif caractere == '"':
+                    self._dans_chaine = False
+            elif not self.tableau_ouvert:
+                if caractere == "[":
+                    self.tableau_ouvert = True
+                    self._nb_objets = 0
+            elif self._profondeur == 0 and self._nb_objets == 0 and caractere not in "{,] \t\r\n":
+                # Ce crochet n'ouvrait pas un tableau d'objets : on cherche le suivant
+                self.tableau_ouvert = caractere == "["
+            elif caractere == '"':
+                self._dans_chaine = True
+            elif caractere in "{[":
+                if self._profondeur == 0 and caractere == "{":
+                    self._debut_objet = i
+                self._profondeur += 1
+            elif caractere in "}]":
+                if self._profondeur == 0:
+                    if caractere == "]":
+                        if self._nb_objets == 0:
+                            # Tableau vide ou crochets d'une phrase
+                            self.tableau_ouvert = False
+                        else:
+                            self.termine = True
+                            i += 1
+                            break
+                else:
+                    self._profondeur -= 1
+                    if self._profondeur == 0 and self._debut_objet is not None:
+                        if i + 1 - self._debut_objet <= TAILLE_MAX_OBJET:
+                            try:
+                                objet = json.loads(texte[self._debut_objet:i + 1])
+                                if isinstance(objet, dict):
+                                    objets.append(objet)
+                                    self._nb_objets += 1
+                            except (ValueError, RecursionError):
+                                pass
+                        self._debut_objet = None
+
+            i += 1
+
+        # Ne conserve que le texte de l'objet en cours
+        debut = self._debut_objet if self._debut_objet is not None else i
+        self._texte = texte[debut:]
+        self._position = i - debut
+        if self._debut_objet is not None:
+            self._debut_objet = 0
+
+        return objets
+
+
+def valider_site(objet):
+    """
+    Vérifie qu'un objet décrit bien un site touristique
+
+    Args:
+        objet (dict): L'objet décodé depuis la réponse
+
+    Returns:
+        dict: Le site nettoyé (champs texte sans espaces superflus) ou None s'il est invalide
+    """
+    if not isinstance(objet, dict):
+        return None
+
+    site = dict(objet)
+    for champ in CHAMPS_OBLIGATOIRES:
+        valeur = site.get(champ)
+        if not isinstance(valeur, str) or not valeur.strip():
+            return None
+        site[champ] = valeur.strip()
+
+    for champ, defaut in CHAMPS_FACULTATIFS.items():
+        valeur = site.get(champ)
+        site[champ] = valeur.strip() if isinstance(valeur, str) and valeur.strip() else defaut
+
+    return site
+
+
+def extraire_sites(contenu, limite=None):
+    """
+    Extrait les sites touristiques d'une réponse texte du modèle, en un seul parcours
+
+    Les objets complets d'un tableau tronqué (limite de jetons atteinte) sont conservés.
+
+    Args:
+        contenu (str): La réponse du modèle
+        limite (int): Nombre maximal de sites à retourner
+
+    Returns:
+        tuple: (liste des sites valides, True si la réponse était complète)
+    """
+    analyseur = AnalyseurTableauJSON()
+    sites = []
+    for objet in analyseur.alimenter((contenu or "")[:TAILLE_MAX_CONTENU]):
+        site = valider_site(objet)
+        if site is not None:
+            sites.append(site)
+
+    if limite is not None and len(sites) >= limite:
+        return sites[:limite], True
+    return sites, analyseur.termine
@@ -1,11 +1,20 @@
-from flask import Flask, render_template, request, jsonify, redirect, url_for, session
-from flask_socketio import SocketIO, emit
 import os
+
+# 'eventlet' serves each socket from a green thread so one process can hold thousands of idle connections.
+# The standard library has to be patched before anything else imports it.
+ASYNC_MODE = os.getenv('TOURGUIDE_ASYNC_MODE', 'threading')
+if ASYNC_MODE == 'eventlet':
+    import eventlet
+    eventlet.monkey_patch()
+
+from flask import Flask, request, jsonify, redirect, url_for, session, g, Response
+from flask import render_template as flask_render_template
+from flask_socketio import SocketIO, emit
 import sys
 import json
 import time
-import concurrent.futures
-from threading import Thread
+import functools
+from threading import Thread, Lock
 import logging
 
 # Configure logging
@@ -17,7 +26,17 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 # Import modules from project
 from modules.API_Tourist_Sites import RecuperateurSitesTouristiques, OptimiseurItineraire
-from modules.scraping import get_itineraries_for_pair
+from modules.scraping import get_default_pool, POOL_SIZE
+from modules.transport_providers import create_provider, make_option, format_option
+from modules.estimation_transport import EstimateurTransport
+from modules.ordonnanceur import OrdonnanceurTaches, FilePleine, EcheanceDepassee
+from modules.singleflight import SingleFlight
+from modules.cache import CacheLRU, creer_backend
+from modules.artefact_villes import ouvrir_artefact
+from modules.geocodeur_local import GeocodeurLocal
+from modules.metriques import (REGISTRE, mesurer, debut_requete, fin_requete,
+                               collecteur_cache, collecteur_limiteur, collecteur_ordonnanceur,
+                               collecteur_singleflight)
 
 # Create Flask app
 app = Flask(__name__)
@@ -26,16 +45,110 @@ app.config['JSON_AS_ASCII'] = False
 app.config['TIMEOUT'] = 60  # Increased timeout
 
 # Initialize Socket.IO
-socketio = SocketIO(app, cors_allowed_origins="*", async_mode='threading')
+socketio = SocketIO(app, cors_allowed_origins="*", async_mode=ASYNC_MODE)
+
+# Optional cache backend shared by all worker processes, e.g. sqlite:///tourguide_cache.sqlite3
+shared_cache_backend = creer_backend(os.getenv('TOURGUIDE_CACHE_BACKEND'))
+
+# Pre-warmed cities (built offline by prechauffage.py), memory-mapped and served without upstream calls
+city_artifact = ouvrir_artefact(os.getenv('TOURGUIDE_ARTEFACT', 'villes_prechauffees.tgv'))
+if city_artifact is not None:
+    logger.info(f"Loaded {len(city_artifact)} pre-warmed cities from {city_artifact.chemin}")
 
 # Initialize site retriever
-recup = RecuperateurSitesTouristiques()
+recup = RecuperateurSitesTouristiques(backend_cache=shared_cache_backend, artefact=city_artifact,
+                                      coordonnees_llm=os.getenv('TOURGUIDE_COORDONNEES_LLM') == '1')
+
+# Optional offline geocoder built from an OSM/GeoNames extract; Nominatim is then only a fallback
+gazetteer_path = os.getenv('TOURGUIDE_GAZETTEER')
+local_geocoder = GeocodeurLocal.depuis_fichier(gazetteer_path) if gazetteer_path else None
+if local_geocoder is not None:
+    logger.info(f"Loaded {len(local_geocoder)} places from {gazetteer_path}")
 
 # Initialize route optimizer
-optimiseur = OptimiseurItineraire(recup)
+optimiseur = OptimiseurItineraire(recup, backend_cache=shared_cache_backend, artefact=city_artifact,
+                                  geocodeur_local=local_geocoder,
+                                  mode_geocodage=os.getenv('TOURGUIDE_GEOCODEUR', 'auto'))
+
+# Cache for storing transport option records (bounded, entries expire after 6 hours)
+transport_cache = CacheLRU(max_entrees=5000, duree_vie=6 * 3600, backend=shared_cache_backend, espace='transport_options')
+
+# Under eventlet all green threads share one OS thread: Selenium calls (Chrome start-up, page loads, waits)
+# run on eventlet's pool of real OS threads instead, so they never stall the other sockets
+if ASYNC_MODE == 'eventlet':
+    from eventlet import tpool
+    run_blocking = tpool.execute
+else:
+    run_blocking = None
+
+# Transport options come from the rome2rio API when a key is configured, the browser scraper otherwise or on failure
+transport_provider = create_provider(offload=run_blocking)
+
+# Offline time and fare estimates per leg, shown at once and refined by the provider when the scraper has capacity
+transport_profiles_path = os.getenv('TOURGUIDE_PROFILS_TRANSPORT')
+transport_estimator = (EstimateurTransport.depuis_fichier(transport_profiles_path) if transport_profiles_path
+                       else EstimateurTransport())
+
+# Concurrent scrapes for the same origin/destination share a single fetch
+transport_flights = SingleFlight()
+
+# Transport scrapes run on as many workers as there are warm browsers, from a bounded priority queue:
+# the first legs of an itinerary go first and clients get fallback options at once when the queue is full
+TRANSPORT_WORKERS = int(os.getenv('TOURGUIDE_TRANSPORT_WORKERS', str(POOL_SIZE)))
+TRANSPORT_QUEUE_SIZE = int(os.getenv('TOURGUIDE_TRANSPORT_QUEUE', '50'))
+TRANSPORT_TIMEOUT = 20  # seconds before the client gets fallback options
+TRANSPORT_BATCH_MAX_LEGS = 50  # legs accepted in one request_transport_batch
+transport_scheduler = OrdonnanceurTaches(TRANSPORT_WORKERS, taille_max=TRANSPORT_QUEUE_SIZE, nom='transport')
+
+# Lookups still owed an answer, per Socket.IO session: cancelled when the client disconnects
+transport_jobs = {}
+transport_jobs_lock = Lock()
+
+# Metrics exposed on /metrics: per-stage latency histograms plus cache and rate limiter counters
+REGISTRE.ajouter_collecteur(collecteur_cache('sites', recup.cache))
+REGISTRE.ajouter_collecteur(collecteur_cache('geocodage', optimiseur.cache_coordonnees))
+REGISTRE.ajouter_collecteur(collecteur_cache('transport', transport_cache))
+REGISTRE.ajouter_collecteur(collecteur_limiteur('nominatim', optimiseur.limiteur))
+REGISTRE.ajouter_collecteur(collecteur_ordonnanceur('transport', transport_scheduler))
+REGISTRE.ajouter_collecteur(collecteur_singleflight('sites', recup.requetes_en_vol))
+REGISTRE.ajouter_collecteur(collecteur_singleflight('transport', transport_flights))
+route_duration = REGISTRE.histogramme(
+    'tourguide_http_requete_duree_secondes', 'Durée des requêtes HTTP, en secondes', ('route', 'methode', 'statut')
+)
+
+def render_template(template_name, **context):
+    with mesurer('render_template'):
+        return flask_render_template(template_name, **context)
+
+@app.before_request
+def start_request_timing():
+    g.request_start = time.perf_counter()
+    g.timing_token = debut_requete()
+
+@app.after_request
+def log_request_timing(response):
+    if 'request_start' not in g:
+        return response
+    
+    duration = time.perf_counter() - g.request_start
+    stages = fin_requete(g.timing_token)
+    route = request.url_rule.rule if request.url_rule else 'inconnue'
+    route_duration.observer(duration, route=route, methode=request.method, statut=response.status_code)
+    
+    # One structured line per request, static files and metrics scrapes excluded
+    if request.endpoint not in ('static', 'metrics'):
+        logger.info('request_timing ' + json.dumps({
+            'route': route,
+            'method': request.method,
+            'status': response.status_code,
+            'duration_ms': round(duration * 1000, 1),
+            'stages_ms': stages,
+        }, ensure_ascii=False))
+    return response
 
-# Cache for storing transport data
-transport_cache = {}
+@app.route('/metrics')
+def metrics():
+    return Response(REGISTRE.exposer(), mimetype='text/plain; version=0.0.4')
 
 @app.route('/')
 def index():
@@ -49,6 +162,16 @@ def lieux():
             ville = request.form.get('ville')
             nombre_sites = int(request.form.get('nombre_sites', 10))
             
+            # Streaming mode: render the page right away, sites are pushed over Socket.IO as they arrive
+            if request.form.get('stream') == '1':
+                return render_template('sites.html', 
+                                    ville=ville, 
+                                    sites=[], 
+                                    categories=[],
+                                    sites_json='[]',
+                                    streaming=True,
+                                    nombre_sites=nombre_sites)
+            
             # Get tourist sites using the API
             sites = recup.obtenir_sites_filtres(ville, [], [], nombre_sites=nombre_sites)
             
@@ -199,6 +322,11 @@ def generer_itineraire():
                     'coordinates': coordinates
                 })
         
+        # Estimated transport options for every leg at once, rendered before any scrape completes
+        leg_estimates = transport_estimator.estimer([point['coordinates'] for point in itineraire_points], ville)
+        for point, estimates in zip(itineraire_points, leg_estimates):
+            point['transport_estimates'] = estimate_options(estimates)
+        
         return render_template('itineraire.html', 
                             ville=ville, 
                             itineraire=itineraire, 
@@ -218,34 +346,59 @@ def transport_options():
     if not origin or not destination:
         return jsonify([])
     
+    fallback_options = fallback_transport_options(parse_coordinates(data.get('origin_coordinates')),
+                                                  parse_coordinates(data.get('destination_coordinates')),
+                                                  data.get('city'))
+    
     # Check cache first
     cache_key = f"{origin}_{destination}".lower()
-    if cache_key in transport_cache:
+    cached_options = transport_cache.lire(cache_key)
+    if cached_options:
         logger.info(f"Using cached transport options for {origin} to {destination}")
-        return jsonify(transport_cache[cache_key])
+        return jsonify(format_options(origin, destination, cached_options))
     
     # Get transport options using the scraping module with timeout
     try:
         logger.info(f"Fetching transport options for {origin} to {destination}")
-        transport_options = get_itineraries_for_pair(origin, destination)
+        transport_options = transport_flights.executer(cache_key, transport_provider.get_itineraries, origin, destination)
         
-        # Cache the results (with default options if empty)
+        # Only real results are cached, estimates are recomputed on every request
         if not transport_options:
-            transport_options = [
-                f"Adresse: {origin} → {destination} | Moyen: Marche à pied | Temps: 30min | Prix: 0€",
-                f"Adresse: {origin} → {destination} | Moyen: Taxi | Temps: 10min | Prix: 15€"
-            ]
+            return jsonify(format_options(origin, destination, fallback_options))
         
-        transport_cache[cache_key] = transport_options
-        return jsonify(transport_options)
+        transport_cache.ecrire(cache_key, transport_options)
+        return jsonify(format_options(origin, destination, transport_options))
     except Exception as e:
         logger.error(f"Error getting transport options: {e}")
         # Return fallback options
-        fallback_options = [
-            f"Adresse: {origin} → {destination} | Moyen: Marche à pied | Temps: 30min | Prix: 0€",
-            f"Adresse: {origin} → {destination} | Moyen: Taxi | Temps: 10min | Prix: 15€"
-        ]
-        return jsonify(fallback_options)
+        return jsonify(format_options(origin, destination, fallback_options))
+
+@socketio.on('request_sites')
+def handle_sites_request(data):
+    ville = data.get('ville')
+    
+    try:
+        nombre_sites = int(data.get('nombre_sites', 10))
+    except (TypeError, ValueError):
+        nombre_sites = 10
+    
+    if not ville:
+        emit('sites_done', {'error': 'Données invalides', 'count': 0, 'success': False})
+        return
+    
+    # Stream in the background so the socket handler returns immediately
+    socketio.start_background_task(stream_sites, request.sid, ville, nombre_sites)
+
+def stream_sites(sid, ville, nombre_sites):
+    count = 0
+    try:
+        for site in recup.obtenir_sites_flux(ville, [], [], nombre_sites=nombre_sites):
+            socketio.emit('site_result', {'site': site, 'index': count}, to=sid)
+            count += 1
+    except Exception as e:
+        logger.error(f"Error streaming sites for {ville}: {e}")
+    
+    socketio.emit('sites_done', {'count': count, 'success': count > 0}, to=sid)
 
 @socketio.on('request_transport')
 def handle_transport_request(data):
@@ -257,55 +410,206 @@ def handle_transport_request(data):
         emit('transport_result', {'error': 'Données invalides', 'step_id': step_id, 'success': False})
         return
     
+    fallback_options = fallback_transport_options(parse_coordinates(data.get('origin_coordinates')),
+                                                  parse_coordinates(data.get('destination_coordinates')),
+                                                  data.get('city'))
+    
     # Check cache first
     cache_key = f"{origin}_{destination}".lower()
-    if cache_key in transport_cache:
-        emit('transport_result', {
-            'options': transport_cache[cache_key],
-            'step_id': step_id,
-            'success': True
-        })
+    cached_options = transport_cache.lire(cache_key)
+    if cached_options:
+        emit('transport_result', legacy_payload(origin, destination,
+                                                transport_payload(step_id, cached_options, fallback_options)))
         return
     
-    # Start a background task to not block
-    Thread(target=fetch_transport_options, args=(origin, destination, step_id)).start()
-
-def fetch_transport_options(origin, destination, step_id):
+    # Earlier legs are the ones on screen: they are scraped first
     try:
-        # Set a timeout for the scraping
-        with concurrent.futures.ThreadPoolExecutor() as executor:
-            future = executor.submit(get_itineraries_for_pair, origin, destination)
-            try:
-                transport_options = future.result(timeout=20)  # 20 second timeout
-            except concurrent.futures.TimeoutError:
-                logger.warning(f"Transport options fetch timed out for {origin} to {destination}")
-                transport_options = [
-                    f"Adresse: {origin} → {destination} | Moyen: Marche à pied | Temps: 30min | Prix: 0€",
-                    f"Adresse: {origin} → {destination} | Moyen: Taxi | Temps: 10min | Prix: 15€"
-                ]
+        priority = int(data.get('priority', step_id))
+    except (TypeError, ValueError):
+        priority = 0
+    
+    try:
+        future = transport_scheduler.soumettre(scrape_transport_options, origin, destination,
+                                               cle=cache_key, priorite=priority, delai=TRANSPORT_TIMEOUT)
+    except FilePleine:
+        logger.warning(f"Transport queue full, sending fallback options for {origin} to {destination}")
+        emit('transport_result', legacy_payload(origin, destination,
+                                                transport_payload(step_id, None, fallback_options)))
+        return
+    
+    # The result is pushed back to the requesting session from the future's completion callback
+    sid = request.sid
+    with transport_jobs_lock:
+        transport_jobs.setdefault(sid, set()).add(future)
+    future.add_done_callback(functools.partial(send_transport_result, sid, origin, destination, step_id,
+                                                 fallback_options))
+
+@socketio.on('request_transport_batch')
+def handle_transport_batch_request(data):
+    legs = data.get('legs') if isinstance(data, dict) else None
+    
+    if not isinstance(legs, list) or not legs:
+        emit('transport_batch_result', {'error': 'Données invalides', 'results': [], 'pending': [], 'success': False})
+        return
+    
+    legs = [leg if isinstance(leg, dict) else {} for leg in legs[:TRANSPORT_BATCH_MAX_LEGS]]
+    fallbacks = batch_fallback_options(legs, data.get('city'))
+    
+    # Cached and invalid legs are answered together in the reply
+    results = []
+    uncached = {}
+    for position, (leg, fallback_options) in enumerate(zip(legs, fallbacks)):
+        origin = leg.get('origin')
+        destination = leg.get('destination')
+        step_id = leg.get('step_id', position + 1)
         
-        # Cache the results
-        cache_key = f"{origin}_{destination}".lower()
-        transport_cache[cache_key] = transport_options
+        if not origin or not destination:
+            results.append({'error': 'Données invalides', 'step_id': step_id, 'success': False})
+            continue
         
-        socketio.emit('transport_result', {
-            'options': transport_options,
-            'step_id': step_id,
-            'success': True
-        })
+        cache_key = f"{origin}_{destination}".lower()
+        cached_options = transport_cache.lire(cache_key)
+        if cached_options:
+            results.append(transport_payload(step_id, cached_options, fallback_options))
+            continue
+        uncached[step_id] = (origin, destination, fallback_options)
+    
+    # The other legs are looked up one task per leg: the same leg requested by other sessions shares the task,
+    # the scrape and the cache entry. Legs are served in waves of TRANSPORT_WORKERS, so the deadline of each
+    # leg grows with the number of legs queued ahead of it in this batch
+    sid = request.sid
+    pending = {}
+    for position, (step_id, (origin, destination, fallback_options)) in enumerate(uncached.items()):
+        try:
+            future = transport_scheduler.soumettre(
+                scrape_transport_options, origin, destination, cle=f"{origin}_{destination}".lower(),
+                priorite=position, delai=TRANSPORT_TIMEOUT * (1 + position // TRANSPORT_WORKERS))
+        except FilePleine:
+            logger.warning(f"Transport queue full, sending fallback options for {origin} to {destination}")
+            results.append(transport_payload(step_id, None, fallback_options))
+            continue
+        pending[step_id] = (future, fallback_options)
+    
+    emit('transport_batch_result', {
+        'results': results,
+        'pending': list(pending),
+        'success': True
+    })
+    
+    # The pending legs are streamed to the requesting session as they resolve
+    for step_id, (future, fallback_options) in pending.items():
+        with transport_jobs_lock:
+            transport_jobs.setdefault(sid, set()).add(future)
+        future.add_done_callback(functools.partial(send_leg_result, sid, step_id, fallback_options))
+
+@socketio.on('disconnect')
+def handle_disconnect(reason=None):
+    with transport_jobs_lock:
+        jobs = transport_jobs.pop(request.sid, set())
+    
+    # Scrapes still queued for this session only are dropped by the scheduler
+    cancelled = sum(1 for future in jobs if future.cancel())
+    if cancelled:
+        logger.info(f"Cancelled {cancelled} transport lookups for disconnected session {request.sid}")
+
+def parse_coordinates(value):
+    try:
+        latitude, longitude = (float(x) for x in value)
+    except (TypeError, ValueError):
+        return None
+    return latitude, longitude
+
+def estimate_options(estimates):
+    return [make_option(estimate['moyen'], estimate['minutes'], estimate['prix'], estimated=True)
+            for estimate in estimates]
+
+def format_options(origin, destination, options):
+    return [format_option(origin, destination, option) for option in options]
+
+def fallback_transport_options(origin_coordinates=None, destination_coordinates=None, city=None):
+    # Estimated from the leg's distance when the client sent its coordinates
+    if origin_coordinates and destination_coordinates:
+        return estimate_options(transport_estimator.estimer_trajet(origin_coordinates, destination_coordinates, city))
+    return [
+        make_option('Marche à pied', 30, 0, estimated=True),
+        make_option('Taxi', 10, 15, estimated=True)
+    ]
+
+def batch_fallback_options(legs, city):
+    coordinates = [(parse_coordinates(leg.get('origin_coordinates')), parse_coordinates(leg.get('destination_coordinates')))
+                   for leg in legs]
+    located = [i for i, (origin, destination) in enumerate(coordinates) if origin and destination]
+    
+    # All the legs with coordinates are estimated in a single pass
+    estimates = transport_estimator.estimer_paires([coordinates[i][0] for i in located],
+                                                   [coordinates[i][1] for i in located], city)
+    fallbacks = [None] * len(legs)
+    for i, leg_estimates in zip(located, estimates):
+        fallbacks[i] = estimate_options(leg_estimates)
+    return [options if options is not None else fallback_transport_options() for options in fallbacks]
+
+def transport_payload(step_id, options, fallback_options):
+    # Estimates stand in for legs the provider found nothing for
+    if options:
+        return {'options': options, 'step_id': step_id, 'success': True}
+    return {'options': fallback_options, 'step_id': step_id, 'success': True, 'fallback': True}
+
+def legacy_payload(origin, destination, payload):
+    # request_transport clients expect the options as "Adresse: … | Moyen: …" lines
+    return {**payload, 'options': format_options(origin, destination, payload['options'])}
+
+def scrape_transport_options(origin, destination):
+    cache_key = f"{origin}_{destination}".lower()
+    transport_options = transport_flights.executer(cache_key, transport_provider.get_itineraries, origin, destination)
+    
+    # Cached even when the client was already answered with fallback options after the timeout; empty results
+    # are not, so that a leg the provider had nothing for is looked up again by the next request
+    if transport_options:
+        transport_cache.ecrire(cache_key, transport_options)
+    return transport_options
+
+def send_leg_result(sid, step_id, fallback_options, future):
+    forget_transport_job(sid, future)
+    
+    if future.cancelled():
+        return
+    
+    try:
+        transport_options = future.result()
+    except EcheanceDepassee:
+        logger.warning(f"Transport lookup for step {step_id} timed out")
+        transport_options = None
+    except Exception as e:
+        logger.error(f"Error fetching transport options for step {step_id}: {e}")
+        transport_options = None
+    
+    socketio.emit('transport_leg_result', transport_payload(step_id, transport_options, fallback_options), to=sid)
+
+def forget_transport_job(sid, future):
+    with transport_jobs_lock:
+        jobs = transport_jobs.get(sid)
+        if jobs is not None:
+            jobs.discard(future)
+            if not jobs:
+                del transport_jobs[sid]
+
+def send_transport_result(sid, origin, destination, step_id, fallback_options, future):
+    forget_transport_job(sid, future)
+    
+    if future.cancelled():
+        return
+    
+    try:
+        transport_options = future.result()
+    except EcheanceDepassee:
+        logger.warning(f"Transport options fetch timed out for {origin} to {destination}")
+        transport_options = None
     except Exception as e:
         logger.error(f"Error fetching transport options: {e}")
-        # Send fallback options
-        fallback_options = [
-            f"Adresse: {origin} → {destination} | Moyen: Marche à pied | Temps: 30min | Prix: 0€",
-            f"Adresse: {origin} → {destination} | Moyen: Taxi | Temps: 10min | Prix: 15€"
-        ]
-        socketio.emit('transport_result', {
-            'options': fallback_options,
-            'step_id': step_id,
-            'success': True,
-            'fallback': True
-        })
+        transport_options = None
+    
+    payload = transport_payload(step_id, transport_options, fallback_options)
+    socketio.emit('transport_result', legacy_payload(origin, destination, payload), to=sid)
 
 @app.errorhandler(404)
 def page_not_found(e):
@@ -321,5 +625,11 @@ if __name__ == '__main__':
     os.makedirs('static/js', exist_ok=True)
     os.makedirs('modules', exist_ok=True)
     
+    # Launch the headless browsers used for transport scraping ahead of the first request
+    if run_blocking is not None:
+        socketio.start_background_task(run_blocking, get_default_pool().prewarm)
+    else:
+        Thread(target=get_default_pool().prewarm, daemon=True).start()
+    
     # Run the application
     socketio.run(app, debug=True, host='0.0.0.0', port=8000)
@@ -0,0 +1,231 @@
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+
+import numpy as np
+
+# En-tête : signature, version du format, taille de l'index JSON (entiers petit-boutistes)
+SIGNATURE = b"TGVILLES"
+VERSION_FORMAT = 1
+FORMAT_EN_TETE = "<8sII"
+TAILLE_EN_TETE = struct.calcsize(FORMAT_EN_TETE)
+
+# Les tableaux sont alignés sur 8 octets pour être lus directement depuis la projection mémoire
+ALIGNEMENT = 8
+
+
+def normaliser_ville(ville):
+    """
+    Normalise un nom de ville pour l'index de l'artefact (minuscules, espaces réduits)
+    """
+    return " ".join((ville or "").lower().split())
+
+
+def normaliser_adresse(adresse):
+    """
+    Normalise une adresse pour la recherche d'un site dans l'artefact
+    """
+    return " ".join((adresse or "").lower().split())
+
+
+def _aligner(flux):
+    reste = flux.tell() % ALIGNEMENT
+    if reste:
+        flux.write(b"\0" * (ALIGNEMENT - reste))
+
+
+def ecrire_artefact(chemin, villes):
+    """
+    Écrit l'artefact des villes préchauffées
+
+    Le fichier est écrit à côté de sa destination puis renommé, de sorte que les processus
+    qui lisent l'ancienne version ne voient jamais un fichier partiel.
+
+    Args:
+        chemin (str): Chemin du fichier à produire
+        villes (dict): Nom de la ville -> dict avec "sites" (liste), "coordonnees" (tableau (n, 2),
+            NaN pour les sites non géocodés) et "distances" (matrice (n, n) en kilomètres)
+    """
+    index = {}
+    blocs = []
+    position = 0
+
+    # Calcul des positions des blocs, relatives au début de la zone de données
+    for ville, donnees in villes.items():
+        sites = json.dumps(donnees["sites"], ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        coordonnees = np.ascontiguousarray(donnees["coordonnees"], dtype="<f8").reshape(-1, 2)
+        distances = np.ascontiguousarray(donnees["distances"], dtype="<f4")
+        n = len(coordonnees)
+        if distances.shape != (n, n) or len(donnees["sites"]) != n:
+            raise ValueError(f"Données incohérentes pour {ville}")
+
+        entree = {"nom": ville, "n": n}
+        for nom, contenu in (("sites", sites), ("coordonnees", coordonnees.tobytes()),
+                             ("distances", distances.tobytes())):
+            position += -position % ALIGNEMENT
+            entree[nom] = [position, len(contenu)]
+            blocs.append((position, contenu))
+            position += len(contenu)
+        index[normaliser_ville(ville)] = entree
+
+    en_tete_index = json.dumps(
+        {"version": VERSION_FORMAT, "cree_le": time.time(), "villes": index},
+        ensure_ascii=False, separators=(",", ":")
+    ).encode("utf-8")
+
+    chemin_temporaire = f"{chemin}.{os.getpid()}.tmp"
+    with open(chemin_temporaire, "wb") as flux:
+        flux.write(struct.pack(FORMAT_EN_TETE, SIGNATURE, VERSION_FORMAT, len(en_tete_index)))
+        flux.write(en_tete_index)
+        _aligner(flux)
+        debut_donnees = flux.tell()
+        for position, contenu in blocs:
+            flux.write(b"\0" * (debut_donnees + position - flux.tell()))
+            flux.write(contenu)
+    os.replace(chemin_temporaire, chemin)
+
+
+class ArtefactVilles:
+    """
+    Lecture d'un artefact de villes préchauffées, projeté en mémoire.
+
+    Les coordonnées et les matrices de distances sont des vues numpy sur la projection :
+    rien n'est copié et les pages sont partagées entre les processus qui ouvrent le même fichier.
+    """
+
+    def __init__(self, chemin):
+        """
+        Ouvre l'artefact et lit son index
+
+        Args:
+            chemin (str): Chemin du fichier produit par ecrire_artefact
+
+        Raises:
+            ValueError: Si le fichier n'est pas un artefact ou si sa version n'est pas prise en charge
+        """
+        self.chemin = chemin
+        with open(chemin, "rb") as fichier:
+            self._memoire = mmap.mmap(fichier.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if len(self._memoire) < TAILLE_EN_TETE:
+            raise ValueError(f"Artefact invalide: {chemin}")
+        signature, version, taille_index = struct.unpack_from(FORMAT_EN_TETE, self._memoire, 0)
+        if signature != SIGNATURE:
+            raise ValueError(f"Artefact invalide: {chemin}")
+        if version != VERSION_FORMAT:
+            raise ValueError(f"Version d'artefact non prise en charge: {version}")
+
+        index = json.loads(self._memoire[TAILLE_EN_TETE:TAILLE_EN_TETE + taille_index].decode("utf-8"))
+        fin_index = TAILLE_EN_TETE + taille_index
+        self._debut_donnees = fin_index + (-fin_index % ALIGNEMENT)
+        self.cree_le = index["cree_le"]
+        self._villes = index["villes"]
+
+        # Sites décodés et index des adresses, construits à la première utilisation
+        self._sites = {}
+        self._adresses = {}
+        self._verrou = threading.Lock()
+
+    def __contains__(self, ville):
+        return normaliser_ville(ville) in self._villes
+
+    def __len__(self):
+        return len(self._villes)
+
+    def villes(self):
+        """
+        Retourne les noms des villes présentes dans l'artefact
+        """
+        return [entree["nom"] for entree in self._villes.values()]
+
+    def _entree(self, ville):
+        entree = self._villes.get(normaliser_ville(ville))
+        if entree is None:
+            raise KeyError(ville)
+        return entree
+
+    def sites(self, ville):
+        """
+        Retourne le catalogue des sites d'une ville
+
+        Args:
+            ville (str): Le nom de la ville
+
+        Returns:
+            list: Les sites, dans l'ordre des lignes des tableaux de l'artefact
+        """
+        cle = normaliser_ville(ville)
+        sites = self._sites.get(cle)
+        if sites is None:
+            position, taille = self._entree(ville)["sites"]
+            debut = self._debut_donnees + position
+            sites = json.loads(self._memoire[debut:debut + taille].decode("utf-8"))
+            with self._verrou:
+                self._sites[cle] = sites
+                self._adresses[cle] = {normaliser_adresse(site.get("adresse")): i for i, site in enumerate(sites)}
+        return sites
+
+    def coordonnees(self, ville):
+        """
+        Retourne les coordonnées des sites d'une ville
+
+        Returns:
+            numpy.ndarray: Vue (n, 2) en lecture seule (latitude, longitude), NaN si non géocodé
+        """
+        entree = self._entree(ville)
+        position, _ = entree["coordonnees"]
+        return np.frombuffer(self._memoire, dtype="<f8", count=entree["n"] * 2,
+                             offset=self._debut_donnees + position).reshape(entree["n"], 2)
+
+    def matrice_distances(self, ville):
+        """
+        Retourne la matrice des distances entre les sites d'une ville
+
+        Returns:
+            numpy.ndarray: Vue (n, n) en lecture seule des distances en kilomètres (float32)
+        """
+        entree = self._entree(ville)
+        position, _ = entree["distances"]
+        n = entree["n"]
+        return np.frombuffer(self._memoire, dtype="<f4", count=n * n,
+                             offset=self._debut_donnees + position).reshape(n, n)
+
+    def indice_site(self, ville, adresse):
+        """
+        Retourne la ligne d'un site dans les tableaux de la ville, à partir de son adresse
+
+        Returns:
+            int: L'indice du site ou None s'il est absent de l'artefact
+        """
+        if ville not in self:
+            return None
+        self.sites(ville)
+        return self._adresses[normaliser_ville(ville)].get(normaliser_adresse(adresse))
+
+    def fermer(self):
+        """
+        Libère la projection mémoire
+        """
+        self._memoire.close()
+
+
+def ouvrir_artefact(chemin):
+    """
+    Ouvre un artefact s'il existe
+
+    Args:
+        chemin (str): Chemin du fichier (None pour aucun artefact)
+
+    Returns:
+        ArtefactVilles: L'artefact ou None s'il est absent ou illisible
+    """
+    if not chemin or not os.path.exists(chemin):
+        return None
+    try:
+        return ArtefactVilles(chemin)
+    except (OSError, ValueError) as e:
+        print(f"Impossible de charger l'artefact {chemin}: {e}")
+        return None
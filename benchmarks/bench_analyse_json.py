@@ -0,0 +1,203 @@
+"""
+Vérifie par fuzzing que l'extraction des sites dans les réponses du modèle a un temps
+d'exécution borné, et mesure son débit sur des réponses adverses de taille croissante.
+
+Le script échoue (code de sortie 1) si une réponse lève une exception, renvoie un site
+invalide, perd des sites complets d'une réponse tronquée ou si le temps par caractère
+croît avec la taille de la réponse (signe d'un comportement non linéaire).
+
+Usage:
+    python benchmarks/bench_analyse_json.py --iterations 2000 --tailles 1000 10000 100000 1000000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+from tabulate import tabulate
+
+# Permet d'importer les modules du projet depuis le dossier parent
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analyse_json import TAILLE_MAX_CONTENU, extraire_sites, valider_site
+
+# Rapport maximal toléré entre le temps par caractère de la plus grande et de la plus petite taille
+FACTEUR_LINEARITE_MAX = 5.0
+
+
+def generer_site(generateur, i):
+    """
+    Génère un site touristique synthétique, avec des caractères spéciaux dans les textes
+
+    Args:
+        generateur (random.Random): Générateur aléatoire
+        i (int): Numéro du site
+
+    Returns:
+        dict: Le site
+    """
+    bruit = "".join(generateur.choice('abc []{}",:\\é') for _ in range(generateur.randint(0, 20)))
+    return {
+        "nom": f"Site {i} {bruit}",
+        "description": f"Description {bruit}",
+        "categorie": generateur.choice(["Musées thématiques", "Centres historiques"]),
+        "adresse": f"{i} rue de l'Exemple",
+    }
+
+
+def generer_reponse(generateur, nb_sites):
+    """
+    Génère une réponse valide du modèle : tableau JSON entouré de texte et de balises markdown.
+    Les sites sont renvoyés tels qu'après validation (textes sans espaces superflus).
+
+    Returns:
+        tuple: (texte de la réponse, liste des sites, position de fin de chaque site dans le texte)
+    """
+    sites = [valider_site(generer_site(generateur, i)) for i in range(nb_sites)]
+    texte = "Voici [la liste] demandée :\n```json\n["
+    fins = []
+    for i, site in enumerate(sites):
+        texte += ("," if i else "") + "\n  " + json.dumps(site, ensure_ascii=False)
+        fins.append(len(texte))
+    texte += "\n]\n```"
+    return texte, sites, fins
+
+
+def reponses_adverses(taille):
+    """
+    Construit des réponses pathologiques de la taille demandée
+
+    Args:
+        taille (int): Nombre de caractères approximatif
+
+    Returns:
+        dict: Nom du cas -> texte
+    """
+    site = json.dumps({"nom": "A", "adresse": "1 rue", "description": "x", "categorie": "y"})
+    return {
+        "crochets ouvrants": "[" * taille,
+        "crochets fermants puis ouvrant": "]" * taille + "[",
+        "accolades ouvrantes": "[" + "{" * taille,
+        "imbrication profonde": "[" + '{"a":' * (taille // 5) + "1" + "}" * (taille // 5) + "]",
+        "chaîne non terminée": '[{"nom": "' + "x" * taille,
+        "échappements": '[{"nom": "' + "\\" * taille,
+        "phrases entre crochets": "[note] " * (taille // 7),
+        "objets invalides": "[" + "{bad}," * (taille // 6),
+        "tableau tronqué": "[" + ",".join([site] * (taille // len(site))),
+        "texte sans tableau": "lorem ipsum " * (taille // 12),
+    }
+
+
+def muter(generateur, texte):
+    """
+    Applique une mutation aléatoire à une réponse (troncature, insertion, suppression, remplacement)
+    """
+    if not texte:
+        return texte
+    position = generateur.randrange(len(texte))
+    mutation = generateur.randrange(4)
+    if mutation == 0:
+        return texte[:position]
+    if mutation == 1:
+        return texte[:position] + generateur.choice('[]{}",:\\') + texte[position:]
+    if mutation == 2:
+        return texte[:position] + texte[position + 1:]
+    return texte[:position] + generateur.choice('[]{}",:\\ax') + texte[position + 1:]
+
+
+def fuzzer(iterations, graine):
+    """
+    Vérifie l'extraction sur des réponses valides, tronquées et mutées
+
+    Returns:
+        list: Les erreurs détectées
+    """
+    generateur = random.Random(graine)
+    erreurs = []
+
+    for iteration in range(iterations):
+        texte, sites, fins = generer_reponse(generateur, generateur.randint(0, 25))
+
+        # Réponse intacte : tous les sites sont retrouvés
+        extraits, complet = extraire_sites(texte)
+        if sites and (extraits != sites or not complet):
+            erreurs.append(f"itération {iteration}: réponse valide mal extraite")
+
+        # Réponse tronquée : chaque site complet avant la coupure est récupéré, dans l'ordre
+        coupure = generateur.randrange(len(texte) + 1)
+        extraits, _ = extraire_sites(texte[:coupure])
+        attendus = [site for site, fin in zip(sites, fins) if fin <= coupure]
+        if extraits != attendus:
+            erreurs.append(f"itération {iteration}: sites perdus après troncature à {coupure}")
+
+        # Réponse mutée : aucune exception et uniquement des sites valides
+        mutee = texte
+        for _ in range(generateur.randint(1, 5)):
+            mutee = muter(generateur, mutee)
+        try:
+            extraits, _ = extraire_sites(mutee)
+        except Exception as e:
+            erreurs.append(f"itération {iteration}: exception {e!r}")
+            continue
+        if any(valider_site(site) != site for site in extraits):
+            erreurs.append(f"itération {iteration}: site invalide renvoyé")
+
+    return erreurs
+
+
+def mesurer(texte, repetitions=3):
+    """
+    Mesure le meilleur temps d'extraction sur plusieurs répétitions, en secondes
+    """
+    meilleur = float("inf")
+    for _ in range(repetitions):
+        debut = time.perf_counter()
+        extraire_sites(texte)
+        meilleur = min(meilleur, time.perf_counter() - debut)
+    return meilleur
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=2000, help="Nombre de réponses générées pour le fuzzing")
+    parser.add_argument("--tailles", type=int, nargs="+", default=[1000, 10000, 100000, 1000000],
+                        help="Tailles (en caractères) des réponses adverses")
+    parser.add_argument("--graine", type=int, default=42, help="Graine du générateur aléatoire")
+    args = parser.parse_args()
+
+    debut = time.perf_counter()
+    erreurs = fuzzer(args.iterations, args.graine)
+    print(f"Fuzzing: {args.iterations} réponses en {time.perf_counter() - debut:.2f}s, {len(erreurs)} erreur(s)")
+    for erreur in erreurs[:20]:
+        print(f"  {erreur}")
+
+    tailles = sorted(min(taille, TAILLE_MAX_CONTENU) for taille in args.tailles)
+    lignes = []
+    non_lineaires = []
+    for cas in reponses_adverses(tailles[0]):
+        temps_par_caractere = []
+        ligne = [cas]
+        for taille in tailles:
+            texte = reponses_adverses(taille)[cas]
+            duree = mesurer(texte)
+            temps_par_caractere.append(duree / max(1, len(texte)))
+            ligne.append(f"{duree * 1000:.2f}")
+        rapport = temps_par_caractere[-1] / max(temps_par_caractere[0], 1e-12)
+        ligne.append(f"{rapport:.2f}")
+        lignes.append(ligne)
+        if rapport > FACTEUR_LINEARITE_MAX:
+            non_lineaires.append(cas)
+
+    en_tetes = ["Cas"] + [f"{taille} car. (ms)" for taille in tailles] + ["Rapport temps/car."]
+    print(tabulate(lignes, headers=en_tetes, tablefmt="github"))
+
+    if non_lineaires:
+        print(f"Temps d'exécution non linéaire: {', '.join(non_lineaires)}")
+    if erreurs or non_lineaires:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
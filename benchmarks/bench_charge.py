@@ -0,0 +1,536 @@
+"""
+Test de charge de l'application : des utilisateurs virtuels enchaînent des sessions réalistes
+contre app.py lancé dans un processus séparé :
+
+1. POST /lieux (recherche des sites d'une ville) ;
+2. POST /generer-itineraire avec une partie des sites ;
+3. connexion Socket.IO et événement request_transport_batch portant toutes les étapes de l'itinéraire.
+
+Groq, Nominatim et rome2rio sont remplacés par des bouchons locaux à latence réglable. Par défaut
+l'application interroge l'API de rome2rio, qui renvoie une réponse enregistrée
+(benchmarks/fixtures/rome2rio_search.json) ; avec --navigateur, le scraper (Chrome) interroge
+une copie statique des pages du site.
+
+Le rapport donne, par route et par événement, les latences p50/p95/p99, le débit et le taux
+d'erreur, ainsi que le nombre maximal de threads et la mémoire résidente maximale du processus
+de l'application (lus dans /proc, Linux uniquement).
+
+Usage:
+    python benchmarks/bench_charge.py --utilisateurs 50 --duree 60
+    python benchmarks/bench_charge.py --utilisateurs 200 --duree 120 --latence-groq 3 --sortie charge.json
+"""
+import argparse
+import http.server
+import json
+import os
+import random
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import zlib
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+import requests
+import socketio
+from tabulate import tabulate
+
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DOSSIER_FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+VILLES = ["Paris", "Lyon", "Marseille", "Bordeaux", "Lille", "Nantes", "Strasbourg", "Toulouse"]
+CATEGORIES = ["Musées thématiques", "Centres historiques", "Parcs, jardins et arboretums",
+              "Monuments et sites emblématiques"]
+RUES = ["rue de la République", "avenue Jean Jaurès", "place de l'Hôtel de Ville", "quai des Arts",
+        "boulevard Victor Hugo", "rue du Musée", "allée des Jardins"]
+
+# Modules du projet, placés dans le paquet modules comme dans l'installation décrite dans le README
+MODULES = ["analyse_json", "artefact_villes", "cache", "cache_geocodage", "client_http", "estimation_transport",
+           "geocodeur_local", "limiteur_debit", "matrice_distances", "metriques", "ordonnanceur", "scraping",
+           "singleflight", "solveurs", "transport_providers"]
+
+# Lance l'application dans le processus fils
+LANCEUR = """
+import os
+import app
+
+app.socketio.run(app.app, host="127.0.0.1", port=int(os.environ["CHARGE_PORT"]), allow_unsafe_werkzeug=True)
+"""
+
+MARQUEUR_ERREUR = "<title>Erreur | TourGuide</title>"
+MOTIF_SITES = re.compile(r'<script type="application/json" id="sites-data">(.*?)</script>', re.S)
+MOTIF_POINTS = re.compile(r"const itinerairePoints = (.*?);\s*\n")
+MOTIF_VILLE = re.compile(r"sites touristiques les plus importants de (.+?)\.\s*\n")
+MOTIF_NOMBRE = re.compile(r"liste des (\d+) sites")
+
+
+class ServeurFactice:
+    """
+    Serveur HTTP local dans un thread ; chaque réponse est retardée de latence secondes
+    (plus ou moins gigue, en proportion)
+    """
+
+    def __init__(self, gestionnaire, latence, gigue, graine):
+        aleatoire = random.Random(graine)
+        verrou = threading.Lock()
+
+        def attendre():
+            with verrou:
+                facteur = 1 + aleatoire.uniform(-gigue, gigue)
+            time.sleep(max(0.0, latence * facteur))
+
+        classe = type(gestionnaire.__name__, (gestionnaire,), {"attendre": staticmethod(attendre)})
+        self.serveur = http.server.ThreadingHTTPServer(("127.0.0.1", 0), classe)
+        self.serveur.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.serveur.server_port}"
+        threading.Thread(target=self.serveur.serve_forever, daemon=True).start()
+
+    def arreter(self):
+        self.serveur.shutdown()
+        self.serveur.server_close()
+
+
+class _GestionnaireSilencieux(http.server.BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def repondre_json(self, donnees):
+        corps = json.dumps(donnees, ensure_ascii=False).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(corps)))
+        self.end_headers()
+        self.wfile.write(corps)
+
+
+class GestionnaireGroq(_GestionnaireSilencieux):
+    """
+    Bouchon de l'API chat-completions de Groq : des sites fictifs pour la ville du prompt,
+    en une réponse ou en flux ("server-sent events")
+    """
+
+    def do_POST(self):
+        charge_utile = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        prompt = charge_utile["messages"][0]["content"]
+        ville = MOTIF_VILLE.search(prompt)
+        nombre = MOTIF_NOMBRE.search(prompt)
+        ville = ville.group(1) if ville else "Ville"
+        nombre = int(nombre.group(1)) if nombre else 20
+
+        sites = [{
+            "nom": f"{ville} - site {i}",
+            "description": f"Site touristique numéro {i} de {ville}.",
+            "categorie": CATEGORIES[i % len(CATEGORIES)],
+            "adresse": f"{i + 1} {RUES[i % len(RUES)]}",
+        } for i in range(nombre)]
+        contenu = json.dumps(sites, ensure_ascii=False, indent=2)
+
+        self.attendre()
+        if not charge_utile.get("stream"):
+            self.repondre_json({"choices": [{"message": {"role": "assistant", "content": contenu}}]})
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.end_headers()
+        for debut in range(0, len(contenu), 64):
+            fragment = {"choices": [{"delta": {"content": contenu[debut:debut + 64]}}]}
+            self.wfile.write(f"data: {json.dumps(fragment, ensure_ascii=False)}\n\n".encode("utf-8"))
+        self.wfile.write(b"data: [DONE]\n\n")
+
+
+class GestionnaireNominatim(_GestionnaireSilencieux):
+    """
+    Bouchon de Nominatim : coordonnées déterministes, proches du centre (fictif) de la ville
+    """
+
+    def do_GET(self):
+        requete = parse_qs(urlsplit(self.path).query).get("q", [""])[0]
+        parties = [partie.strip() for partie in requete.split(",")]
+        graine_ville = zlib.crc32(parties[-1].lower().encode("utf-8"))
+        latitude = 43.0 + (graine_ville % 800) / 100
+        longitude = -1.0 + (graine_ville // 800 % 800) / 100
+        if len(parties) > 1:
+            graine_adresse = zlib.crc32(requete.lower().encode("utf-8"))
+            latitude += (graine_adresse % 600) / 10000 - 0.03
+            longitude += (graine_adresse // 600 % 600) / 10000 - 0.03
+
+        self.attendre()
+        self.repondre_json([{
+            "place_id": graine_ville,
+            "lat": f"{latitude:.7f}",
+            "lon": f"{longitude:.7f}",
+            "display_name": requete,
+            "boundingbox": [f"{latitude - 0.1:.7f}", f"{latitude + 0.1:.7f}",
+                            f"{longitude - 0.15:.7f}", f"{longitude + 0.15:.7f}"],
+        }])
+
+
+class GestionnaireRome2rio(http.server.SimpleHTTPRequestHandler):
+    """
+    Copie statique des pages de rome2rio et d'une réponse de son API (benchmarks/fixtures)
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, directory=DOSSIER_FIXTURES, **kwargs)
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        self.attendre()
+        super().do_GET()
+
+
+class Statistiques:
+    """
+    Durées et erreurs par route ou événement, partagées par les utilisateurs virtuels
+    """
+
+    def __init__(self):
+        self._mesures = {}
+        self._fallbacks = {}
+        self._verrou = threading.Lock()
+
+    def enregistrer(self, nom, duree, erreur=False, fallback=False):
+        with self._verrou:
+            self._mesures.setdefault(nom, []).append((duree, erreur))
+            if fallback:
+                self._fallbacks[nom] = self._fallbacks.get(nom, 0) + 1
+
+    def rapport(self, duree_totale):
+        """
+        Returns:
+            list: Un dict par route ou événement
+        """
+        with self._verrou:
+            mesures = {nom: list(valeurs) for nom, valeurs in self._mesures.items()}
+            fallbacks = dict(self._fallbacks)
+
+        lignes = []
+        for nom, valeurs in mesures.items():
+            durees = np.array([duree for duree, _ in valeurs]) * 1000
+            erreurs = sum(1 for _, erreur in valeurs if erreur)
+            p50, p95, p99 = np.percentile(durees, [50, 95, 99])
+            lignes.append({
+                "nom": nom,
+                "requetes": len(valeurs),
+                "erreurs": erreurs,
+                "taux_erreur": erreurs / len(valeurs),
+                "secours": fallbacks.get(nom, 0),
+                "debit": len(valeurs) / duree_totale,
+                "p50_ms": round(float(p50), 1),
+                "p95_ms": round(float(p95), 1),
+                "p99_ms": round(float(p99), 1),
+            })
+        return lignes
+
+
+class SurveillanceProcessus:
+    """
+    Relève régulièrement le nombre de threads et la mémoire résidente d'un processus dans /proc
+    """
+
+    def __init__(self, pid, intervalle=0.1):
+        self.chemin = f"/proc/{pid}/status"
+        self.intervalle = intervalle
+        self.threads_max = 0
+        self.rss_max_ko = 0
+        self._arret = threading.Event()
+        self._thread = threading.Thread(target=self._surveiller, daemon=True)
+
+    def relever(self):
+        """
+        Returns:
+            dict: Valeurs actuelles de Threads, VmRSS et VmHWM (en Kio)
+        """
+        valeurs = {}
+        try:
+            with open(self.chemin, "r") as f:
+                for ligne in f:
+                    cle, _, valeur = ligne.partition(":")
+                    if cle in ("Threads", "VmRSS", "VmHWM"):
+                        valeurs[cle] = int(valeur.split()[0])
+        except OSError:
+            pass
+        return valeurs
+
+    def _surveiller(self):
+        while not self._arret.is_set():
+            valeurs = self.relever()
+            self.threads_max = max(self.threads_max, valeurs.get("Threads", 0))
+            self.rss_max_ko = max(self.rss_max_ko, valeurs.get("VmRSS", 0), valeurs.get("VmHWM", 0))
+            self._arret.wait(self.intervalle)
+
+    def demarrer(self):
+        self._thread.start()
+
+    def arreter(self):
+        self._arret.set()
+        self._thread.join()
+
+
+def preparer_installation(dossier):
+    """
+    Reproduit dans dossier l'arborescence d'installation (modules/, templates/, static/)
+    avec des liens vers les fichiers du dépôt
+    """
+    os.makedirs(os.path.join(dossier, "modules"))
+    open(os.path.join(dossier, "modules", "__init__.py"), "w").close()
+    for module in MODULES:
+        os.symlink(os.path.join(RACINE, f"{module}.py"), os.path.join(dossier, "modules", f"{module}.py"))
+    os.symlink(os.path.join(RACINE, "API-Tourist-Sites.py"), os.path.join(dossier, "modules", "API_Tourist_Sites.py"))
+    os.symlink(os.path.join(RACINE, "app.py"), os.path.join(dossier, "app.py"))
+    os.symlink(os.path.join(RACINE, "Templates"), os.path.join(dossier, "templates"))
+    os.symlink(os.path.join(RACINE, "Static"), os.path.join(dossier, "static"))
+
+
+def port_libre():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def attendre_demarrage(url, processus, delai=60):
+    limite = time.monotonic() + delai
+    while time.monotonic() < limite:
+        if processus.poll() is not None:
+            return False
+        try:
+            if requests.get(url, timeout=1).status_code == 200:
+                return True
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    return False
+
+
+def requete_http(session, stats, nom, url, donnees, delai):
+    """
+    Envoie un formulaire et mesure la réponse ; une page d'erreur de l'application compte comme une erreur
+
+    Returns:
+        str: Le contenu de la réponse, ou None en cas d'erreur
+    """
+    debut = time.perf_counter()
+    try:
+        reponse = session.post(url, data=donnees, timeout=delai)
+        erreur = reponse.status_code >= 400 or MARQUEUR_ERREUR in reponse.text
+    except requests.RequestException:
+        reponse, erreur = None, True
+    stats.enregistrer(nom, time.perf_counter() - debut, erreur)
+    return None if erreur else reponse.text
+
+
+def rafale_transport(url, stats, ville, points, identifiant, delai):
+    """
+    Demande les moyens de transport de toutes les étapes en un seul message et attend les réponses
+    """
+    client = socketio.Client(reconnection=False)
+    en_attente = {}
+    verrou = threading.Lock()
+    termine = threading.Event()
+
+    def recevoir(donnees):
+        with verrou:
+            debut = en_attente.pop(donnees.get("step_id"), None)
+            restants = len(en_attente)
+        # Les réponses destinées aux autres clients sont ignorées
+        if debut is None:
+            return
+        stats.enregistrer("transport_etape", time.perf_counter() - debut,
+                          erreur=not donnees.get("success"), fallback=bool(donnees.get("fallback")))
+        if not restants:
+            termine.set()
+
+    @client.on("transport_batch_result")
+    def recevoir_lot(donnees):
+        stats.enregistrer("request_transport_batch", time.perf_counter() - debut_lot,
+                          erreur=not donnees.get("success"))
+        for resultat in donnees.get("results", []):
+            recevoir(resultat)
+
+    client.on("transport_leg_result", recevoir)
+
+    debut = time.perf_counter()
+    try:
+        client.connect(url, transports=["websocket"], wait_timeout=delai)
+    except socketio.exceptions.ConnectionError:
+        stats.enregistrer("connect", time.perf_counter() - debut, erreur=True)
+        return
+    stats.enregistrer("connect", time.perf_counter() - debut)
+
+    try:
+        etapes = [{
+            "origin": points[i]["address"],
+            "destination": points[i + 1]["address"],
+            "origin_coordinates": points[i]["coordinates"],
+            "destination_coordinates": points[i + 1]["coordinates"],
+            "step_id": f"{identifiant}-{i + 1}",
+        } for i in range(len(points) - 1)]
+        if etapes:
+            debut_lot = time.perf_counter()
+            with verrou:
+                en_attente.update((etape["step_id"], debut_lot) for etape in etapes)
+            client.emit("request_transport_batch", {"city": ville, "legs": etapes})
+            termine.wait(delai)
+        # Étapes restées sans réponse
+        with verrou:
+            restes = list(en_attente.values())
+            en_attente.clear()
+        for debut_etape in restes:
+            stats.enregistrer("transport_etape", time.perf_counter() - debut_etape, erreur=True)
+    finally:
+        client.disconnect()
+
+
+def utilisateur(numero, url, stats, args, fin):
+    """
+    Enchaîne des sessions jusqu'à l'instant fin
+    """
+    aleatoire = random.Random(args.graine * 1000 + numero)
+    villes = (VILLES + [f"Ville {i}" for i in range(len(VILLES), args.villes)])[:args.villes]
+    session = requests.Session()
+    numero_session = 0
+
+    while time.monotonic() < fin:
+        numero_session += 1
+        ville = aleatoire.choice(villes)
+
+        page = requete_http(session, stats, "POST /lieux", f"{url}/lieux",
+                            {"ville": ville, "nombre_sites": args.sites}, args.delai)
+        resultat = MOTIF_SITES.search(page) if page else None
+        sites = json.loads(resultat.group(1)) if resultat else []
+
+        if sites:
+            choisis = sorted(aleatoire.sample(range(len(sites)), min(args.etapes, len(sites))))
+            page = requete_http(session, stats, "POST /generer-itineraire", f"{url}/generer-itineraire", {
+                "ville": ville,
+                "sites_selected": [str(i) for i in choisis],
+                "starting_point": "0",
+                "sites_data": json.dumps(sites, ensure_ascii=False),
+            }, args.delai)
+            resultat = MOTIF_POINTS.search(page) if page else None
+            if resultat:
+                rafale_transport(url, stats, ville, json.loads(resultat.group(1)), f"u{numero}-s{numero_session}",
+                                 args.delai)
+
+        if args.reflexion:
+            time.sleep(aleatoire.uniform(0, 2 * args.reflexion))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--utilisateurs", type=int, default=20, help="Utilisateurs virtuels simultanés")
+    parser.add_argument("--duree", type=float, default=30, help="Durée du test, en secondes")
+    parser.add_argument("--montee", type=float, default=5, help="Durée de l'arrivée progressive des utilisateurs")
+    parser.add_argument("--reflexion", type=float, default=1.0, help="Pause moyenne entre deux sessions, en secondes")
+    parser.add_argument("--villes", type=int, default=5, help="Nombre de villes demandées")
+    parser.add_argument("--sites", type=int, default=10, help="Sites demandés par recherche")
+    parser.add_argument("--etapes", type=int, default=5, help="Sites choisis pour l'itinéraire")
+    parser.add_argument("--latence-groq", type=float, default=1.5, help="Latence du bouchon Groq, en secondes")
+    parser.add_argument("--latence-nominatim", type=float, default=0.2, help="Latence du bouchon Nominatim")
+    parser.add_argument("--latence-rome2rio", type=float, default=4.0, help="Durée d'une recherche rome2rio, en secondes")
+    parser.add_argument("--gigue", type=float, default=0.2, help="Variation relative des latences (0 à 1)")
+    parser.add_argument("--navigateur", action="store_true",
+                        help="Utilise le scraper (Chrome) sur une copie locale du site de rome2rio")
+    parser.add_argument("--mode-async", choices=["threading", "eventlet"], default="threading",
+                        help="Mode de Socket.IO de l'application (TOURGUIDE_ASYNC_MODE)")
+    parser.add_argument("--delai", type=float, default=60, help="Délai maximal d'une réponse, en secondes")
+    parser.add_argument("--graine", type=int, default=42, help="Graine du générateur aléatoire")
+    parser.add_argument("--sortie", help="Fichier JSON où enregistrer le rapport")
+    args = parser.parse_args()
+
+    groq = ServeurFactice(GestionnaireGroq, args.latence_groq, args.gigue, args.graine)
+    nominatim = ServeurFactice(GestionnaireNominatim, args.latence_nominatim, args.gigue, args.graine + 1)
+    # Une recherche dans le navigateur charge deux pages (formulaire puis résultats)
+    latence_page = args.latence_rome2rio / 2 if args.navigateur else args.latence_rome2rio
+    rome2rio = ServeurFactice(GestionnaireRome2rio, latence_page, args.gigue, args.graine + 2)
+
+    port = port_libre()
+    url = f"http://127.0.0.1:{port}"
+    with tempfile.TemporaryDirectory() as dossier:
+        preparer_installation(dossier)
+        environnement = dict(
+            os.environ,
+            GROQ_API_KEY="charge",
+            GROQ_API_URL=f"{groq.url}/openai/v1/chat/completions",
+            NOMINATIM_URL=nominatim.url,
+            ROME2RIO_URL=f"{rome2rio.url}/rome2rio_recherche.html",
+            ROME2RIO_API_URL=f"{rome2rio.url}/rome2rio_search.json",
+            ROME2RIO_API_KEY="charge",
+            TRANSPORT_PROVIDERS="selenium" if args.navigateur else "rome2rio_api",
+            TOURGUIDE_ASYNC_MODE=args.mode_async,
+            CHARGE_PORT=str(port),
+        )
+        chemin_journal = os.path.join(dossier, "app.log")
+        with open(chemin_journal, "w") as journal:
+            processus = subprocess.Popen([sys.executable, "-c", LANCEUR], cwd=dossier, env=environnement,
+                                         stdout=journal, stderr=subprocess.STDOUT)
+        try:
+            if not attendre_demarrage(url, processus):
+                with open(chemin_journal, "r") as journal:
+                    print(journal.read()[-3000:])
+                print("L'application n'a pas démarré")
+                sys.exit(1)
+
+            surveillance = SurveillanceProcessus(processus.pid)
+            surveillance.demarrer()
+            repos = surveillance.relever()
+            threads_initiaux, rss_initial_ko = repos.get("Threads", 0), repos.get("VmRSS", 0)
+
+            stats = Statistiques()
+            debut = time.monotonic()
+            fin = debut + args.duree
+            utilisateurs = []
+            for numero in range(args.utilisateurs):
+                thread = threading.Thread(target=utilisateur, args=(numero, url, stats, args, fin), daemon=True)
+                thread.start()
+                utilisateurs.append(thread)
+                if args.montee and args.utilisateurs > 1:
+                    time.sleep(args.montee / args.utilisateurs)
+            for thread in utilisateurs:
+                thread.join()
+            duree_totale = time.monotonic() - debut
+            surveillance.arreter()
+        finally:
+            processus.terminate()
+            try:
+                processus.wait(10)
+            except subprocess.TimeoutExpired:
+                processus.kill()
+            for serveur in (groq, nominatim, rome2rio):
+                serveur.arreter()
+
+    lignes = stats.rapport(duree_totale)
+    print(tabulate(
+        [[l["nom"], l["requetes"], f"{l['taux_erreur']:.1%}", l["secours"], f"{l['debit']:.2f}",
+          l["p50_ms"], l["p95_ms"], l["p99_ms"]] for l in lignes],
+        headers=["Route / événement", "Requêtes", "Erreurs", "Secours", "Débit (/s)", "p50 (ms)", "p95 (ms)", "p99 (ms)"],
+        tablefmt="github",
+    ))
+    print(f"\n{args.utilisateurs} utilisateurs pendant {duree_totale:.1f}s")
+    print(f"Threads de l'application: {threads_initiaux} au repos, {surveillance.threads_max} au maximum")
+    print(f"Mémoire résidente: {rss_initial_ko / 1024:.1f} Mio au repos, {surveillance.rss_max_ko / 1024:.1f} Mio au maximum")
+
+    if args.sortie:
+        with open(args.sortie, "w", encoding="utf-8") as f:
+            json.dump({
+                "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "parametres": vars(args),
+                "duree_s": round(duree_totale, 2),
+                "threads_repos": threads_initiaux,
+                "threads_max": surveillance.threads_max,
+                "rss_repos_mio": round(rss_initial_ko / 1024, 1),
+                "rss_max_mio": round(surveillance.rss_max_ko / 1024, 1),
+                "resultats": lignes,
+            }, f, ensure_ascii=False, indent=2)
+        print(f"Rapport enregistré dans {args.sortie}")
+
+
+if __name__ == "__main__":
+    main()
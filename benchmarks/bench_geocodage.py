@@ -0,0 +1,124 @@
+"""
+Compare le géocodeur local (extrait OSM/GeoNames) à Nominatim : taux de réussite, accord
+entre les deux et temps de réponse, sur les adresses de fichiers de sites touristiques.
+
+Les fichiers de sites sont ceux sauvegardés par l'application (<ville>_sites_touristiques.json) ;
+la ville est déduite du nom du fichier. Nominatim est interrogé à une requête par seconde.
+
+Usage:
+    python benchmarks/bench_geocodage.py FR.txt paris_sites_touristiques.json lyon_sites_touristiques.json
+    python benchmarks/bench_geocodage.py extrait.csv *_sites_touristiques.json --sans-nominatim
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+from geopy.geocoders import Nominatim
+from tabulate import tabulate
+
+# Permet d'importer les modules du projet depuis le dossier parent
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from geocodeur_local import GeocodeurLocal
+from limiteur_debit import obtenir_limiteur
+from matrice_distances import matrice_haversine
+
+# Distance en dessous de laquelle les deux géocodeurs sont considérés d'accord
+SEUIL_ACCORD_KM = 0.5
+
+
+def lire_adresses(chemins):
+    """
+    Lit les adresses des fichiers de sites
+
+    Returns:
+        list: Tuples (adresse, ville)
+    """
+    adresses = []
+    for chemin in chemins:
+        ville = os.path.basename(chemin).replace("_sites_touristiques.json", "").replace("_", " ")
+        with open(chemin, "r", encoding="utf-8") as f:
+            for site in json.load(f):
+                if site.get("adresse"):
+                    adresses.append((site["adresse"], ville))
+    return adresses
+
+
+def geocoder_nominatim(adresses):
+    """
+    Géocode les adresses avec Nominatim, au débit autorisé
+
+    Returns:
+        tuple: (coordonnées ou None pour chaque adresse, durées en secondes)
+    """
+    geolocator = Nominatim(user_agent="planificateur_touristique")
+    limiteur = obtenir_limiteur("nominatim", debit=1.0)
+    resultats, durees = [], []
+    for adresse, ville in adresses:
+        limiteur.acquerir()
+        debut = time.perf_counter()
+        try:
+            lieu = geolocator.geocode(f"{adresse}, {ville}", timeout=10)
+        except Exception as e:
+            print(f"Erreur Nominatim pour {adresse}: {e}")
+            lieu = None
+        durees.append(time.perf_counter() - debut)
+        resultats.append((lieu.latitude, lieu.longitude) if lieu else None)
+    return resultats, durees
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("extrait", help="Extrait OSM (CSV) ou GeoNames (.txt)")
+    parser.add_argument("sites", nargs="+", help="Fichiers <ville>_sites_touristiques.json")
+    parser.add_argument("--seuil", type=float, default=0.75, help="Couverture minimale du géocodeur local")
+    parser.add_argument("--sans-nominatim", action="store_true", help="Ne mesure que le géocodeur local")
+    args = parser.parse_args()
+
+    debut = time.perf_counter()
+    geocodeur = GeocodeurLocal.depuis_fichier(args.extrait, seuil=args.seuil)
+    print(f"{len(geocodeur)} lieux indexés en {time.perf_counter() - debut:.1f}s")
+
+    adresses = lire_adresses(args.sites)
+    if not adresses:
+        print("Aucune adresse à géocoder")
+        sys.exit(1)
+
+    locaux, durees_locales = [], []
+    for adresse, ville in adresses:
+        debut = time.perf_counter()
+        locaux.append(geocodeur.geocoder(adresse, ville))
+        durees_locales.append(time.perf_counter() - debut)
+
+    lignes = [[
+        "Local", f"{sum(c is not None for c in locaux) / len(adresses):.1%}",
+        f"{statistics.median(durees_locales) * 1000:.3f}", f"{max(durees_locales) * 1000:.3f}",
+    ]]
+
+    if not args.sans_nominatim:
+        distants, durees_distantes = geocoder_nominatim(adresses)
+        lignes.append([
+            "Nominatim", f"{sum(c is not None for c in distants) / len(adresses):.1%}",
+            f"{statistics.median(durees_distantes) * 1000:.3f}", f"{max(durees_distantes) * 1000:.3f}",
+        ])
+
+        # Accord entre les deux géocodeurs, sur les adresses trouvées par les deux
+        communs = [(l, d) for l, d in zip(locaux, distants) if l and d]
+        if communs:
+            ecarts = np.array([matrice_haversine(np.array([l, d]))[0, 1] for l, d in communs])
+            print(f"Adresses trouvées par les deux: {len(communs)}, "
+                  f"d'accord à {SEUIL_ACCORD_KM} km près: {(ecarts <= SEUIL_ACCORD_KM).mean():.1%}, "
+                  f"écart médian: {np.median(ecarts):.3f} km")
+        secours = sum(1 for l, d in zip(locaux, distants) if l is None and d)
+        print(f"Adresses trouvées seulement par Nominatim (secours): {secours}")
+
+    print(tabulate(lignes, headers=["Géocodeur", "Taux de réussite", "Médiane (ms)", "Max (ms)"],
+                   tablefmt="github"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Compare les solveurs d'itinéraire (longueur du parcours et temps de calcul)
+sur des ensembles de sites synthétiques reproductibles.
+
+Usage:
+    python benchmarks/bench_solveurs.py --tailles 8 12 50 100 --repetitions 5
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+from tabulate import tabulate
+
+# Permet d'importer les modules du projet depuis le dossier parent
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from matrice_distances import calculer_matrice_distances
+from solveurs import SOLVEURS, TAILLE_MAX_HELD_KARP, longueur_parcours, resoudre
+
+
+def generer_coordonnees(n, graine):
+    """
+    Génère n coordonnées aléatoires dans un carré d'environ 10 km autour de Paris
+
+    Args:
+        n (int): Nombre de sites
+        graine (int): Graine du générateur aléatoire
+
+    Returns:
+        numpy.ndarray: Tableau (n, 2) de coordonnées (latitude, longitude)
+    """
+    generateur = np.random.default_rng(graine)
+    return np.column_stack([
+        48.80 + generateur.random(n) * 0.10,
+        2.28 + generateur.random(n) * 0.14,
+    ])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark des solveurs d'itinéraire")
+    parser.add_argument("--tailles", type=int, nargs="+", default=[5, 8, 12, 25, 50, 100, 200])
+    parser.add_argument("--repetitions", type=int, default=3)
+    parser.add_argument("--limite-temps", type=float, default=1.0)
+    parser.add_argument("--graine", type=int, default=42)
+    args = parser.parse_args()
+
+    lignes = []
+    for n in args.tailles:
+        for nom in SOLVEURS:
+            if nom == "held_karp" and n > TAILLE_MAX_HELD_KARP:
+                continue
+
+            longueurs, durees = [], []
+            for repetition in range(args.repetitions):
+                matrice = calculer_matrice_distances(generer_coordonnees(n, args.graine + repetition))
+                debut = time.perf_counter()
+                ordre = resoudre(matrice, 0, nom, args.limite_temps)
+                durees.append(time.perf_counter() - debut)
+                longueurs.append(longueur_parcours(ordre, matrice))
+
+            lignes.append([n, nom, f"{np.mean(longueurs):.3f}", f"{np.mean(durees) * 1000:.2f}"])
+
+    print(tabulate(lignes, headers=["Sites", "Solveur", "Longueur moyenne (km)", "Temps moyen (ms)"], tablefmt="grid"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,344 @@
+"""
+Suite de benchmarks des chemins critiques, avec des substituts déterministes des services
+externes (Groq, Nominatim, rome2rio) :
+
+- optimiser_itineraire : itinéraire complet, géocodage instantané ;
+- geocoder_par_lots : géocodeur factice avec une latence configurable ;
+- obtenir_sites_filtres : analyse d'une réponse Groq enregistrée ;
+- get_itineraries_for_pair : copie statique de la page de résultats servie en local
+  (nécessite Chrome ; ignoré s'il n'est pas disponible) ;
+- Rome2rioApiProvider : réponse enregistrée de l'API de rome2rio servie en local.
+
+Les ensembles de sites sont générés à partir d'une graine. Les résultats sont enregistrés
+en JSON pour comparer les exécutions entre elles.
+
+Usage:
+    python benchmarks/bench_suite.py --tailles 5 20 100 500 --repetitions 5
+    python benchmarks/bench_suite.py --comparer benchmarks/resultats/20260101-120000.json
+"""
+import argparse
+import contextlib
+import functools
+import http.server
+import importlib.util
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from tabulate import tabulate
+
+# Permet d'importer les modules du projet depuis le dossier parent
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RACINE)
+
+from bench_solveurs import generer_coordonnees
+from limiteur_debit import LimiteurDebit
+
+# Le module principal a un nom de fichier non importable directement
+_spec = importlib.util.spec_from_file_location("API_Tourist_Sites", os.path.join(RACINE, "API-Tourist-Sites.py"))
+_module = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(_module)
+RecuperateurSitesTouristiques = _module.RecuperateurSitesTouristiques
+OptimiseurItineraire = _module.OptimiseurItineraire
+
+DOSSIER_FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+DOSSIER_RESULTATS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "resultats")
+
+CATEGORIES = ["Musées thématiques", "Centres historiques", "Parcs, jardins et arboretums",
+              "Monuments et sites emblématiques"]
+VILLE = "Banc d'essai"
+
+
+def generer_sites(n, graine):
+    """
+    Génère un ensemble de sites reproductible et les coordonnées de leurs adresses
+
+    Returns:
+        tuple: (liste des sites, dict adresse -> (latitude, longitude))
+    """
+    coordonnees = generer_coordonnees(n, graine)
+    sites = []
+    for i in range(n):
+        sites.append({
+            "nom": f"Site {i}",
+            "description": f"Description du site {i}, avec des \"guillemets\" et des accents.",
+            "categorie": CATEGORIES[i % len(CATEGORIES)],
+            "adresse": f"{i} rue du Banc d'Essai",
+        })
+    return sites, {site["adresse"]: (float(lat), float(lon)) for site, (lat, lon) in zip(sites, coordonnees)}
+
+
+class _Lieu:
+    def __init__(self, latitude, longitude):
+        self.latitude = latitude
+        self.longitude = longitude
+        self.raw = {}
+
+
+class GeocodeurFactice:
+    """
+    Remplace Nominatim : répond à partir d'une table d'adresses après une latence fixe
+    """
+
+    def __init__(self, coordonnees, latence=0.0):
+        self.coordonnees = coordonnees
+        self.latence = latence
+
+    def geocode(self, requete, timeout=None):
+        if self.latence:
+            time.sleep(self.latence)
+        coordonnees = self.coordonnees.get(requete.rsplit(", ", 1)[0])
+        return _Lieu(*coordonnees) if coordonnees else None
+
+
+class _ReponseFactice:
+    def __init__(self, texte):
+        self.texte = texte
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return json.loads(self.texte)
+
+
+class ClientGroqFactice:
+    """
+    Remplace le client HTTP : renvoie une réponse Groq enregistrée contenant les sites
+    """
+
+    def __init__(self, sites):
+        contenu = "```json\n" + json.dumps(sites, ensure_ascii=False, indent=2) + "\n```"
+        self.texte = json.dumps({"choices": [{"message": {"role": "assistant", "content": contenu}}]})
+
+    def post(self, url, **kwargs):
+        return _ReponseFactice(self.texte)
+
+
+def creer_optimiseur(coordonnees, latence=0.0):
+    """
+    Crée un optimiseur sans cache persistant, relié au géocodeur factice et sans limite de débit
+    (le benchmark mesure le code, pas la politique d'usage de Nominatim)
+    """
+    optimiseur = OptimiseurItineraire(None, chemin_cache_geocodage=None)
+    optimiseur.geolocator = GeocodeurFactice(coordonnees, latence)
+    optimiseur.limiteur = LimiteurDebit(debit=1e9)
+    return optimiseur
+
+
+def chronometrer(fonction, repetitions, preparer=None):
+    """
+    Exécute fonction plusieurs fois et mesure chaque exécution
+
+    Args:
+        fonction (callable): Reçoit le résultat de preparer (non chronométré)
+        repetitions (int): Nombre d'exécutions
+        preparer (callable): Prépare les données d'une exécution
+
+    Returns:
+        dict: Durées médiane, minimale et maximale en millisecondes
+    """
+    durees = []
+    for _ in range(repetitions):
+        donnees = preparer() if preparer else None
+        # Les messages de l'application ne sont pas affichés pendant les mesures
+        with contextlib.redirect_stdout(io.StringIO()):
+            debut = time.perf_counter()
+            fonction(donnees)
+            durees.append(time.perf_counter() - debut)
+    return {
+        "mediane_ms": round(statistics.median(durees) * 1000, 3),
+        "min_ms": round(min(durees) * 1000, 3),
+        "max_ms": round(max(durees) * 1000, 3),
+    }
+
+
+def bench_optimiser_itineraire(sites, coordonnees, repetitions):
+    def preparer():
+        return creer_optimiseur(coordonnees), [dict(site) for site in sites]
+
+    return chronometrer(lambda d: d[0].optimiser_itineraire(d[1], VILLE, "Site 0"), repetitions, preparer)
+
+
+def bench_geocoder_par_lots(sites, coordonnees, repetitions, latence):
+    adresses = [site["adresse"] for site in sites]
+    return chronometrer(lambda optimiseur: optimiseur.geocoder_par_lots(adresses, VILLE), repetitions,
+                        lambda: creer_optimiseur(coordonnees, latence))
+
+
+def bench_obtenir_sites_filtres(sites, repetitions):
+    recuperateur = RecuperateurSitesTouristiques(cle_api="benchmark", client_http=ClientGroqFactice(sites))
+    recuperateur.limite_sites = len(sites)
+
+    def preparer():
+        recuperateur.cache.vider()
+
+    return chronometrer(lambda _: recuperateur.obtenir_sites_filtres(VILLE, [], [], len(sites)), repetitions, preparer)
+
+
+def servir_fixtures():
+    """
+    Sert le dossier des fixtures en local
+
+    Returns:
+        http.server.ThreadingHTTPServer: Le serveur, à arrêter avec shutdown()
+    """
+    gestionnaire = functools.partial(http.server.SimpleHTTPRequestHandler, directory=DOSSIER_FIXTURES)
+    gestionnaire.log_message = lambda *args: None
+    serveur = http.server.ThreadingHTTPServer(("127.0.0.1", 0), gestionnaire)
+    threading.Thread(target=serveur.serve_forever, daemon=True).start()
+    return serveur
+
+
+def bench_get_itineraries_for_pair(repetitions):
+    """
+    Recherche d'itinéraire sur la copie locale de rome2rio
+
+    Returns:
+        dict: Les durées, ou None si Chrome n'est pas disponible
+    """
+    import scraping
+
+    serveur = servir_fixtures()
+    url_originale = scraping.ROME2RIO_URL
+    scraping.ROME2RIO_URL = f"http://127.0.0.1:{serveur.server_port}/rome2rio_recherche.html"
+    pool = scraping.DriverPool(size=1)
+    try:
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                pool.prewarm()
+        except Exception as e:
+            print(f"get_itineraries_for_pair ignoré (Chrome indisponible): {e}")
+            return None
+        return chronometrer(
+            lambda _: scraping.get_itineraries_for_pair("Origine", "Destination", pool=pool), repetitions
+        )
+    finally:
+        pool.close()
+        scraping.ROME2RIO_URL = url_originale
+        serveur.shutdown()
+
+
+def bench_rome2rio_api(repetitions):
+    """
+    Recherche d'itinéraire par l'API de rome2rio, sur la réponse enregistrée
+
+    Raises:
+        AssertionError: Si les itinéraires extraits ne correspondent pas à la réponse enregistrée
+    """
+    from transport_providers import Rome2rioApiProvider
+
+    with open(os.path.join(DOSSIER_FIXTURES, "rome2rio_search.json"), "r", encoding="utf-8") as f:
+        nb_routes = len(json.load(f)["routes"])
+
+    serveur = servir_fixtures()
+    fournisseur = Rome2rioApiProvider(api_key="benchmark",
+                                      url=f"http://127.0.0.1:{serveur.server_port}/rome2rio_search.json")
+    try:
+        itineraires = fournisseur.get_itineraries("Musée du Louvre", "Tour Eiffel")
+        assert len(itineraires) == nb_routes, f"{len(itineraires)} itinéraires extraits sur {nb_routes}"
+        return chronometrer(lambda _: fournisseur.get_itineraries("Musée du Louvre", "Tour Eiffel"), repetitions)
+    finally:
+        fournisseur.close()
+        serveur.shutdown()
+
+
+def version_code():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=RACINE, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def comparer(resultats, chemin_reference):
+    """
+    Affiche l'évolution des médianes par rapport à une exécution enregistrée
+    """
+    with open(chemin_reference, "r", encoding="utf-8") as f:
+        reference = json.load(f)
+
+    lignes = []
+    for bench, mesures in resultats["resultats"].items():
+        for taille, mesure in mesures.items():
+            ancienne = reference["resultats"].get(bench, {}).get(taille)
+            if not ancienne:
+                continue
+            rapport = mesure["mediane_ms"] / ancienne["mediane_ms"] if ancienne["mediane_ms"] else float("nan")
+            lignes.append([bench, taille, ancienne["mediane_ms"], mesure["mediane_ms"], f"{rapport:.2f}x"])
+
+    print(f"\nComparaison avec {chemin_reference} (code {reference.get('code')})")
+    print(tabulate(lignes, headers=["Benchmark", "Taille", "Référence (ms)", "Actuel (ms)", "Rapport"],
+                   tablefmt="github"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tailles", type=int, nargs="+", default=[5, 20, 100, 500], help="Nombres de sites")
+    parser.add_argument("--repetitions", type=int, default=5, help="Exécutions par mesure")
+    parser.add_argument("--graine", type=int, default=42, help="Graine du générateur aléatoire")
+    parser.add_argument("--latence-geocodage", type=float, default=0.02,
+                        help="Latence du géocodeur factice, en secondes")
+    parser.add_argument("--sans-scraping", action="store_true", help="Ignore le benchmark du scraping")
+    parser.add_argument("--sortie", help="Fichier de résultats (par défaut benchmarks/resultats/<date>.json)")
+    parser.add_argument("--comparer", help="Résultats d'une exécution précédente à comparer")
+    args = parser.parse_args()
+
+    resultats = {
+        "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "code": version_code(),
+        "python": platform.python_version(),
+        "machine": platform.platform(),
+        "parametres": vars(args),
+        "resultats": {},
+    }
+    mesures = resultats["resultats"]
+
+    # Les fichiers écrits par l'application (sauvegarde des sites) restent dans un dossier temporaire
+    dossier_initial = os.getcwd()
+    with tempfile.TemporaryDirectory() as dossier_temporaire:
+        os.chdir(dossier_temporaire)
+        try:
+            for taille in args.tailles:
+                sites, coordonnees = generer_sites(taille, args.graine + taille)
+                cle = str(taille)
+                mesures.setdefault("optimiser_itineraire", {})[cle] = bench_optimiser_itineraire(
+                    sites, coordonnees, args.repetitions)
+                mesures.setdefault("geocoder_par_lots", {})[cle] = bench_geocoder_par_lots(
+                    sites, coordonnees, args.repetitions, args.latence_geocodage)
+                mesures.setdefault("obtenir_sites_filtres", {})[cle] = bench_obtenir_sites_filtres(
+                    sites, args.repetitions)
+                print(f"{taille} sites mesurés")
+
+            mesures["rome2rio_api"] = {"1": bench_rome2rio_api(args.repetitions)}
+            if not args.sans_scraping:
+                scraping = bench_get_itineraries_for_pair(args.repetitions)
+                if scraping:
+                    mesures["get_itineraries_for_pair"] = {"1": scraping}
+        finally:
+            os.chdir(dossier_initial)
+
+    lignes = [[bench, taille, m["mediane_ms"], m["min_ms"], m["max_ms"]]
+              for bench, par_taille in mesures.items() for taille, m in par_taille.items()]
+    print(tabulate(lignes, headers=["Benchmark", "Taille", "Médiane (ms)", "Min (ms)", "Max (ms)"],
+                   tablefmt="github"))
+
+    sortie = args.sortie or os.path.join(DOSSIER_RESULTATS, time.strftime("%Y%m%d-%H%M%S") + ".json")
+    os.makedirs(os.path.dirname(os.path.abspath(sortie)), exist_ok=True)
+    with open(sortie, "w", encoding="utf-8") as f:
+        json.dump(resultats, f, ensure_ascii=False, indent=2)
+    print(f"Résultats enregistrés dans {sortie}")
+
+    if args.comparer:
+        comparer(resultats, args.comparer)
+
+
+if __name__ == "__main__":
+    main()
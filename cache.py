@@ -0,0 +1,467 @@
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+# Un balayage des entrées expirées est fait toutes les N écritures dans un segment
+INTERVALLE_BALAYAGE = 64
+
+
+def estimer_taille(objet):
+    """
+    Estime la taille mémoire d'un objet et de son contenu (listes, tuples, dictionnaires, chaînes)
+
+    Args:
+        objet: L'objet à mesurer
+
+    Returns:
+        int: Taille approximative en octets
+    """
+    taille = sys.getsizeof(objet)
+    if isinstance(objet, dict):
+        taille += sum(estimer_taille(cle) + estimer_taille(valeur) for cle, valeur in objet.items())
+    elif isinstance(objet, (list, tuple, set, frozenset)):
+        taille += sum(estimer_taille(element) for element in objet)
+    return taille
+
+
+class _Segment:
+    """
+    Portion du cache protégée par son propre verrou
+    """
+
+    def __init__(self):
+        self.verrou = threading.Lock()
+        self.entrees = OrderedDict()
+        self.octets = 0
+        self.ecritures = 0
+
+
+class CacheLRU:
+    """
+    Cache mémoire borné (en entrées et/ou en octets) avec éviction LRU et durée de vie par entrée.
+
+    Les clés sont réparties sur plusieurs segments indépendants pour limiter la contention
+    entre threads ; les limites sont appliquées segment par segment. Un backend partagé
+    (voir BackendCache) peut servir de second niveau commun à plusieurs processus.
+    """
+
+    def __init__(self, max_entrees=1000, max_octets=None, duree_vie=None, nb_segments=8,
+                 backend=None, espace=None):
+        """
+        Initialise le cache
+
+        Args:
+            max_entrees (int): Nombre maximal d'entrées (None pour ne pas limiter)
+            max_octets (int): Taille mémoire maximale estimée (None pour ne pas limiter)
+            duree_vie (float): Durée de vie par défaut d'une entrée en secondes (None pour illimitée)
+            nb_segments (int): Nombre de segments verrouillés indépendamment
+            backend (BackendCache): Stockage partagé de second niveau (None pour un cache local)
+            espace (str): Préfixe des clés dans le backend, pour y séparer plusieurs caches
+        """
+        self.max_entrees = max_entrees
+        self.max_octets = max_octets
+        self.duree_vie = duree_vie
+        self.backend = backend
+        self.espace = espace
+        self._segments = [_Segment() for _ in range(nb_segments)]
+        self._max_entrees_segment = None if max_entrees is None else max(1, -(-max_entrees // nb_segments))
+        self._max_octets_segment = None if max_octets is None else max(1, max_octets // nb_segments)
+
+        self._verrou_stats = threading.Lock()
+        self.succes = 0
+        self.succes_backend = 0
+        self.echecs = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def _segment(self, cle):
+        return self._segments[hash(cle) % len(self._segments)]
+
+    def _cle_backend(self, cle):
+        return f"{self.espace}:{cle}" if self.espace else str(cle)
+
+    def _compter(self, succes=0, succes_backend=0, echecs=0, evictions=0, expirations=0):
+        with self._verrou_stats:
+            self.succes += succes
+            self.succes_backend += succes_backend
+            self.echecs += echecs
+            self.evictions += evictions
+            self.expirations += expirations
+
+    def _retirer(self, segment, cle):
+        _, _, taille = segment.entrees.pop(cle)
+        segment.octets -= taille
+
+    def lire(self, cle, defaut=None):
+        """
+        Lit la valeur associée à une clé
+
+        Args:
+            cle: La clé recherchée
+            defaut: Valeur retournée si la clé est absente ou expirée
+
+        Returns:
+            La valeur en cache ou defaut
+        """
+        segment = self._segment(cle)
+        with segment.verrou:
+            entree = segment.entrees.get(cle)
+            if entree is None:
+                resultat, succes, expiree = defaut, False, False
+            elif entree[1] is not None and entree[1] <= time.monotonic():
+                self._retirer(segment, cle)
+                resultat, succes, expiree = defaut, False, True
+            else:
+                segment.entrees.move_to_end(cle)
+                resultat, succes, expiree = entree[0], True, False
+
+        if not succes and self.backend is not None:
+            entree = self.backend.lire(self._cle_backend(cle))
+            if entree is not None:
+                valeur, expiration = entree
+                # Gardée localement pour le reste de sa durée de vie, sans la prolonger
+                duree_vie = self.duree_vie
+                if expiration is not None:
+                    restant = expiration - time.time()
+                    duree_vie = restant if duree_vie is None else min(duree_vie, restant)
+                self._ecrire_local(cle, valeur, duree_vie)
+                self._compter(succes_backend=1, expirations=int(expiree))
+                return valeur
+
+        self._compter(succes=int(succes), echecs=int(not succes), expirations=int(expiree))
+        return resultat
+
+    def ecrire(self, cle, valeur, duree_vie=None, local=False):
+        """
+        Enregistre une valeur, en évinçant les entrées les moins récemment utilisées si nécessaire
+
+        Args:
+            cle: La clé
+            valeur: La valeur à conserver
+            duree_vie (float): Durée de vie de l'entrée en secondes (par défaut celle du cache)
+            local (bool): Conserve la valeur dans ce processus seulement, sans l'écrire dans le backend
+        """
+        duree_vie = self.duree_vie if duree_vie is None else duree_vie
+        self._ecrire_local(cle, valeur, duree_vie)
+        if self.backend is not None and not local:
+            self.backend.ecrire(self._cle_backend(cle), valeur, duree_vie)
+
+    def _ecrire_local(self, cle, valeur, duree_vie):
+        expiration = None if duree_vie is None else time.monotonic() + duree_vie
+        taille = estimer_taille(valeur) if self._max_octets_segment is not None else 0
+
+        segment = self._segment(cle)
+        evictions = expirations = 0
+        with segment.verrou:
+            if cle in segment.entrees:
+                self._retirer(segment, cle)
+            segment.entrees[cle] = (valeur, expiration, taille)
+            segment.octets += taille
+
+            segment.ecritures += 1
+            if segment.ecritures % INTERVALLE_BALAYAGE == 0:
+                expirations = self._balayer(segment)
+
+            while len(segment.entrees) > 1 and (
+                (self._max_entrees_segment is not None and len(segment.entrees) > self._max_entrees_segment)
+                or (self._max_octets_segment is not None and segment.octets > self._max_octets_segment)
+            ):
+                self._retirer(segment, next(iter(segment.entrees)))
+                evictions += 1
+
+        if evictions or expirations:
+            self._compter(evictions=evictions, expirations=expirations)
+
+    def _balayer(self, segment):
+        maintenant = time.monotonic()
+        expirees = [cle for cle, (_, expiration, _) in segment.entrees.items()
+                    if expiration is not None and expiration <= maintenant]
+        for cle in expirees:
+            self._retirer(segment, cle)
+        return len(expirees)
+
+    def supprimer(self, cle):
+        """
+        Supprime une clé du cache si elle est présente
+
+        Args:
+            cle: La clé à supprimer
+        """
+        segment = self._segment(cle)
+        with segment.verrou:
+            if cle in segment.entrees:
+                self._retirer(segment, cle)
+        if self.backend is not None:
+            self.backend.supprimer(self._cle_backend(cle))
+
+    def vider(self):
+        """
+        Supprime toutes les entrées du cache local (le backend partagé n'est pas modifié)
+        """
+        for segment in self._segments:
+            with segment.verrou:
+                segment.entrees.clear()
+                segment.octets = 0
+
+    def __len__(self):
+        return sum(len(segment.entrees) for segment in self._segments)
+
+    def statistiques(self):
+        """
+        Retourne les statistiques d'utilisation du cache
+
+        Returns:
+            dict: Succès (locaux et via le backend), échecs, évictions, expirations, taux de succès,
+            nombre d'entrées et octets estimés
+        """
+        with self._verrou_stats:
+            succes, succes_backend, echecs = self.succes, self.succes_backend, self.echecs
+            evictions, expirations = self.evictions, self.expirations
+        total = succes + succes_backend + echecs
+        return {
+            "succes": succes,
+            "succes_backend": succes_backend,
+            "echecs": echecs,
+            "evictions": evictions,
+            "expirations": expirations,
+            "taux_succes": (succes + succes_backend) / total if total else 0.0,
+            "entrees": len(self),
+            "octets": sum(segment.octets for segment in self._segments),
+        }
+
+
+class BackendCache:
+    """
+    Interface d'un stockage de cache partagé entre processus (second niveau derrière CacheLRU).
+
+    Les valeurs doivent être sérialisables en JSON.
+    """
+
+    def lire(self, cle):
+        """
+        Lit la valeur associée à une clé
+
+        Args:
+            cle (str): La clé
+
+        Returns:
+            tuple: (valeur, expiration) où expiration est l'instant d'expiration (time.time(), None si
+            illimitée), ou None si la clé est absente ou expirée
+        """
+        raise NotImplementedError
+
+    def ecrire(self, cle, valeur, duree_vie=None):
+        """
+        Enregistre une valeur
+
+        Args:
+            cle (str): La clé
+            valeur: La valeur (sérialisable en JSON)
+            duree_vie (float): Durée de vie en secondes (par défaut celle du backend)
+        """
+        raise NotImplementedError
+
+    def supprimer(self, cle):
+        """
+        Supprime une clé
+
+        Args:
+            cle (str): La clé
+        """
+        raise NotImplementedError
+
+
+class BackendMemoire(BackendCache):
+    """
+    Backend en mémoire, limité au processus courant (utile comme doublure dans les tests)
+    """
+
+    def __init__(self, duree_vie=None):
+        self.duree_vie = duree_vie
+        self._verrou = threading.Lock()
+        self._entrees = {}
+
+    def lire(self, cle):
+        with self._verrou:
+            entree = self._entrees.get(cle)
+            if entree is None:
+                return None
+            valeur, expiration = entree
+            if expiration is not None and expiration <= time.time():
+                del self._entrees[cle]
+                return None
+            return json.loads(valeur), expiration
+
+    def ecrire(self, cle, valeur, duree_vie=None):
+        duree_vie = self.duree_vie if duree_vie is None else duree_vie
+        expiration = None if duree_vie is None else time.time() + duree_vie
+        with self._verrou:
+            self._entrees[cle] = (json.dumps(valeur, ensure_ascii=False), expiration)
+
+    def supprimer(self, cle):
+        with self._verrou:
+            self._entrees.pop(cle, None)
+
+
+class BackendSQLite(BackendCache):
+    """
+    Backend stocké dans un fichier SQLite en mode WAL, partagé entre threads et processus.
+
+    La base est ouverte à la première utilisation et chaque thread dispose de sa propre connexion.
+    Les entrées expirées et les moins récemment utilisées au-delà de max_entrees sont évincées
+    périodiquement.
+    """
+
+    def __init__(self, chemin="tourguide_cache.sqlite3", table="cache", duree_vie=None, max_entrees=100000):
+        """
+        Initialise le backend sans ouvrir la base de données
+
+        Args:
+            chemin (str): Chemin du fichier SQLite
+            table (str): Nom de la table utilisée
+            duree_vie (float): Durée de validité par défaut d'une entrée en secondes (None pour illimitée)
+            max_entrees (int): Nombre maximal d'entrées conservées avant éviction
+        """
+        self.chemin = chemin
+        self.table = table
+        self.duree_vie = duree_vie
+        self.max_entrees = max_entrees
+        self.intervalle_eviction = max(1, max_entrees // 100)
+        self._local = threading.local()
+        self._verrou_init = threading.Lock()
+        self._initialise = False
+        self._ecritures = 0
+
+    def _connexion(self):
+        """
+        Retourne la connexion SQLite du thread courant, en la créant au besoin
+
+        Returns:
+            sqlite3.Connection: La connexion du thread courant
+        """
+        connexion = getattr(self._local, "connexion", None)
+        if connexion is not None:
+            return connexion
+
+        dossier = os.path.dirname(os.path.abspath(self.chemin))
+        os.makedirs(dossier, exist_ok=True)
+
+        connexion = sqlite3.connect(self.chemin, timeout=5, isolation_level=None)
+        connexion.execute("PRAGMA busy_timeout=5000")
+        connexion.execute("PRAGMA synchronous=NORMAL")
+
+        with self._verrou_init:
+            if not self._initialise:
+                connexion.execute("PRAGMA journal_mode=WAL")
+                connexion.execute(
+                    f"""
+                    CREATE TABLE IF NOT EXISTS {self.table} (
+                        cle TEXT PRIMARY KEY,
+                        valeur TEXT NOT NULL,
+                        expiration REAL,
+                        dernier_acces REAL NOT NULL
+                    )
+                    """
+                )
+                connexion.execute(
+                    f"CREATE INDEX IF NOT EXISTS idx_{self.table}_acces ON {self.table} (dernier_acces)"
+                )
+                self._initialise = True
+
+        self._local.connexion = connexion
+        return connexion
+
+    def lire(self, cle):
+        try:
+            connexion = self._connexion()
+            ligne = connexion.execute(
+                f"SELECT valeur, expiration FROM {self.table} WHERE cle = ?", (cle,)
+            ).fetchone()
+            if not ligne:
+                return None
+
+            maintenant = time.time()
+            if ligne[1] is not None and ligne[1] < maintenant:
+                connexion.execute(f"DELETE FROM {self.table} WHERE cle = ?", (cle,))
+                return None
+
+            connexion.execute(
+                f"UPDATE {self.table} SET dernier_acces = ? WHERE cle = ?", (maintenant, cle)
+            )
+            return json.loads(ligne[0]), ligne[1]
+        except (sqlite3.Error, ValueError) as e:
+            print(f"Erreur lors de la lecture du cache partagé: {e}")
+            return None
+
+    def ecrire(self, cle, valeur, duree_vie=None):
+        duree_vie = self.duree_vie if duree_vie is None else duree_vie
+        maintenant = time.time()
+        expiration = None if duree_vie is None else maintenant + duree_vie
+        try:
+            connexion = self._connexion()
+            connexion.execute(
+                f"INSERT OR REPLACE INTO {self.table} (cle, valeur, expiration, dernier_acces) VALUES (?, ?, ?, ?)",
+                (cle, json.dumps(valeur, ensure_ascii=False), expiration, maintenant)
+            )
+
+            self._ecritures += 1
+            if self._ecritures % self.intervalle_eviction == 0:
+                self.evincer()
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            print(f"Erreur lors de l'écriture dans le cache partagé: {e}")
+
+    def supprimer(self, cle):
+        try:
+            self._connexion().execute(f"DELETE FROM {self.table} WHERE cle = ?", (cle,))
+        except sqlite3.Error as e:
+            print(f"Erreur lors de la suppression dans le cache partagé: {e}")
+
+    def evincer(self):
+        """
+        Supprime les entrées expirées puis les moins récemment utilisées au-delà de max_entrees
+        """
+        try:
+            connexion = self._connexion()
+            connexion.execute(f"DELETE FROM {self.table} WHERE expiration < ?", (time.time(),))
+            nombre = connexion.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+            excedent = nombre - self.max_entrees
+            if excedent > 0:
+                connexion.execute(
+                    f"DELETE FROM {self.table} WHERE cle IN "
+                    f"(SELECT cle FROM {self.table} ORDER BY dernier_acces ASC LIMIT ?)",
+                    (excedent,)
+                )
+        except sqlite3.Error as e:
+            print(f"Erreur lors de l'éviction du cache partagé: {e}")
+
+    def fermer(self):
+        """
+        Ferme la connexion du thread courant
+        """
+        connexion = getattr(self._local, "connexion", None)
+        if connexion is not None:
+            connexion.close()
+            self._local.connexion = None
+
+
+def creer_backend(url):
+    """
+    Crée un backend de cache à partir d'une URL de configuration
+
+    Args:
+        url (str): "sqlite:///chemin/fichier.sqlite3", "memoire://" ou None
+
+    Returns:
+        BackendCache: Le backend, ou None si aucune URL n'est fournie
+    """
+    if not url:
+        return None
+    if url.startswith("sqlite:///"):
+        return BackendSQLite(url[len("sqlite:///"):])
+    if url.startswith("memoire://"):
+        return BackendMemoire()
+    raise ValueError(f"Backend de cache inconnu: {url}")
@@ -0,0 +1,69 @@
+import unicodedata
+
+try:
+    from modules.cache import BackendSQLite
+except ImportError:
+    from cache import BackendSQLite
+
+
+class CacheGeocodage(BackendSQLite):
+    """
+    Cache persistant des coordonnées géographiques, stocké dans une base SQLite en mode WAL.
+
+    La base est ouverte à la première utilisation et chaque thread dispose de sa propre
+    connexion, ce qui permet de partager le même fichier entre plusieurs threads et processus.
+    """
+
+    def __init__(self, chemin="cache_geocodage.sqlite3", duree_vie=30 * 24 * 3600, max_entrees=50000):
+        """
+        Initialise le cache sans ouvrir la base de données
+
+        Args:
+            chemin (str): Chemin du fichier SQLite
+            duree_vie (int): Durée de validité d'une entrée en secondes
+            max_entrees (int): Nombre maximal d'entrées conservées avant éviction
+        """
+        super().__init__(chemin, table="geocodage", duree_vie=duree_vie, max_entrees=max_entrees)
+
+    @staticmethod
+    def normaliser_cle(adresse, ville):
+        """
+        Construit la clé normalisée "adresse, ville"
+
+        Args:
+            adresse (str): L'adresse du lieu
+            ville (str): La ville où se trouve le lieu
+
+        Returns:
+            str: La clé normalisée (minuscules, espaces réduits, forme Unicode NFC)
+        """
+        cle = f"{(adresse or '').strip()}, {(ville or '').strip()}"
+        cle = unicodedata.normalize("NFC", cle).lower()
+        return " ".join(cle.split())
+
+    def lire(self, cle):
+        """
+        Lit les coordonnées associées à une clé
+
+        Args:
+            cle (str): La clé normalisée
+
+        Returns:
+            tuple: (coordonnées (latitude, longitude), instant d'expiration) ou None si absentes ou expirées
+        """
+        entree = super().lire(cle)
+        if not entree or not entree[0]:
+            return None
+        return tuple(entree[0]), entree[1]
+
+    def ecrire(self, cle, coordonnees, duree_vie=None):
+        """
+        Enregistre les coordonnées associées à une clé
+
+        Args:
+            cle (str): La clé normalisée
+            coordonnees (tuple): Les coordonnées (latitude, longitude)
+            duree_vie (float): Durée de validité en secondes (par défaut celle du cache)
+        """
+        if coordonnees:
+            super().ecrire(cle, list(coordonnees), duree_vie)
@@ -0,0 +1,226 @@
+import asyncio
+import random
+import time
+from email.utils import parsedate_to_datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Codes HTTP pour lesquels une nouvelle tentative a des chances d'aboutir
+CODES_REESSAI = (429, 500, 502, 503, 504)
+
+# Méthodes qu'on peut renvoyer sans risque même si le serveur a déjà traité la première requête
+METHODES_IDEMPOTENTES = frozenset(("GET", "HEAD", "OPTIONS", "PUT", "DELETE"))
+
+
+class ClientHTTP:
+    """
+    Client HTTP partagé : pool de connexions persistantes (keep-alive) et nouvelles tentatives
+    avec attente exponentielle aléatoire, en respectant l'en-tête Retry-After.
+    """
+
+    def __init__(self, taille_pool=10, tentatives_max=4, delai_base=0.5, delai_max=20.0,
+                 codes_reessai=CODES_REESSAI, duree_max=30.0):
+        """
+        Initialise le client et son pool de connexions
+
+        Args:
+            taille_pool (int): Nombre de connexions conservées par hôte
+            tentatives_max (int): Nombre total de tentatives par requête
+            delai_base (float): Délai de base de l'attente exponentielle, en secondes
+            delai_max (float): Délai maximal entre deux tentatives, en secondes
+            codes_reessai (tuple): Codes HTTP déclenchant une nouvelle tentative
+            duree_max (float): Durée maximale d'une requête, toutes tentatives comprises, en secondes
+                (None pour ne pas la limiter)
+        """
+        if tentatives_max < 1:
+            raise ValueError("tentatives_max doit valoir au moins 1")
+        self.tentatives_max = tentatives_max
+        self.duree_max = duree_max
+        self.delai_base = delai_base
+        self.delai_max = delai_max
+        self.codes_reessai = set(codes_reessai)
+
+        self.session = requests.Session()
+        adaptateur = HTTPAdapter(pool_connections=taille_pool, pool_maxsize=taille_pool, max_retries=0)
+        self.session.mount("https://", adaptateur)
+        self.session.mount("http://", adaptateur)
+
+    def calculer_delai(self, tentative, reponse=None):
+        """
+        Calcule l'attente avant la tentative suivante
+
+        Args:
+            tentative (int): Numéro de la tentative qui vient d'échouer (à partir de 0)
+            reponse (requests.Response): La réponse reçue, le cas échéant
+
+        Returns:
+            float: Délai en secondes
+        """
+        retry_after = reponse.headers.get("Retry-After") if reponse is not None else None
+        if retry_after:
+            try:
+                return min(self.delai_max, max(0.0, float(retry_after)))
+            except ValueError:
+                try:
+                    date = parsedate_to_datetime(retry_after)
+                    return min(self.delai_max, max(0.0, date.timestamp() - time.time()))
+                except (TypeError, ValueError):
+                    pass
+
+        # Attente exponentielle avec gigue complète
+        return random.uniform(0, min(self.delai_max, self.delai_base * (2 ** tentative)))
+
+    def _doit_reessayer(self, tentative, reponse=None):
+        if tentative >= self.tentatives_max - 1:
+            return False
+        return reponse is None or reponse.status_code in self.codes_reessai
+
+    def _echeance(self, duree_max):
+        duree_max = self.duree_max if duree_max is None else duree_max
+        return time.monotonic() + duree_max if duree_max is not None else None
+
+    def _borner_timeout(self, kwargs, timeout, echeance):
+        # Le timeout de chaque tentative est réduit au temps qui reste avant l'échéance
+        if echeance is not None and isinstance(timeout, (int, float)):
+            kwargs["timeout"] = max(0.1, min(timeout, echeance - time.monotonic()))
+
+    def _delai_si_possible(self, delai, echeance):
+        # Renonce à la tentative suivante si l'attente dépasse l'échéance globale
+        if echeance is not None and time.monotonic() + delai >= echeance:
+            return None
+        return delai
+
+    def _delai_apres_erreur(self, erreur, methode, tentative, echeance):
+        """
+        Retourne l'attente avant de retenter après une erreur réseau, ou None pour la propager
+        """
+        if isinstance(erreur, requests.exceptions.ReadTimeout) and methode.upper() not in METHODES_IDEMPOTENTES:
+            return None
+        if not self._doit_reessayer(tentative):
+            return None
+        return self._delai_si_possible(self.calculer_delai(tentative), echeance)
+
+    def _delai_apres_reponse(self, reponse, tentative, echeance):
+        """
+        Retourne l'attente avant de retenter après une réponse, ou None pour la retourner telle quelle
+        """
+        if not self._doit_reessayer(tentative, reponse):
+            return None
+        return self._delai_si_possible(self.calculer_delai(tentative, reponse), echeance)
+
+    def requete(self, methode, url, duree_max=None, **kwargs):
+        """
+        Envoie une requête, avec de nouvelles tentatives sur les erreurs réseau et les codes 429/5xx
+
+        Un délai de lecture dépassé n'est retenté que pour les méthodes idempotentes : une requête POST
+        a pu être traitée (et facturée) par le serveur. Les tentatives s'arrêtent à l'échéance globale,
+        et le timeout de chaque tentative est réduit au temps qui reste.
+
+        Args:
+            methode (str): La méthode HTTP
+            url (str): L'URL
+            duree_max (float): Durée maximale toutes tentatives comprises (par défaut celle du client)
+            **kwargs: Arguments transmis à requests (headers, json, timeout...)
+
+        Returns:
+            requests.Response: La dernière réponse reçue
+        """
+        echeance = self._echeance(duree_max)
+        timeout = kwargs.get("timeout")
+
+        for tentative in range(self.tentatives_max):
+            self._borner_timeout(kwargs, timeout, echeance)
+            try:
+                reponse = self.session.request(methode, url, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as erreur:
+                delai = self._delai_apres_erreur(erreur, methode, tentative, echeance)
+                if delai is None:
+                    raise
+                time.sleep(delai)
+                continue
+
+            delai = self._delai_apres_reponse(reponse, tentative, echeance)
+            if delai is None:
+                return reponse
+            time.sleep(delai)
+            reponse.close()
+
+    def get(self, url, **kwargs):
+        """
+        Envoie une requête GET (voir requete)
+        """
+        return self.requete("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        """
+        Envoie une requête POST (voir requete)
+        """
+        return self.requete("POST", url, **kwargs)
+
+    def fermer(self):
+        """
+        Ferme les connexions du pool
+        """
+        self.session.close()
+
+
+class ClientHTTPAsync:
+    """
+    Variante asyncio du client HTTP : les requêtes s'exécutent dans un thread du pool par défaut
+    de la boucle et les attentes entre tentatives ne bloquent pas la boucle d'événements.
+    Le pool de connexions et la politique de nouvelles tentatives sont ceux du client synchrone fourni.
+    """
+
+    def __init__(self, client=None):
+        """
+        Initialise le client asynchrone
+
+        Args:
+            client (ClientHTTP): Client synchrone dont le pool et la configuration sont partagés
+        """
+        self.client = client or ClientHTTP()
+
+    async def requete(self, methode, url, duree_max=None, **kwargs):
+        """
+        Envoie une requête sans bloquer la boucle d'événements (voir ClientHTTP.requete)
+
+        Returns:
+            requests.Response: La dernière réponse reçue
+        """
+        boucle = asyncio.get_running_loop()
+        client = self.client
+        echeance = client._echeance(duree_max)
+        timeout = kwargs.get("timeout")
+
+        def envoyer():
+            return client.session.request(methode, url, **kwargs)
+
+        for tentative in range(client.tentatives_max):
+            client._borner_timeout(kwargs, timeout, echeance)
+            try:
+                reponse = await boucle.run_in_executor(None, envoyer)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as erreur:
+                delai = client._delai_apres_erreur(erreur, methode, tentative, echeance)
+                if delai is None:
+                    raise
+                await asyncio.sleep(delai)
+                continue
+
+            delai = client._delai_apres_reponse(reponse, tentative, echeance)
+            if delai is None:
+                return reponse
+            await asyncio.sleep(delai)
+            reponse.close()
+
+    async def get(self, url, **kwargs):
+        """
+        Envoie une requête GET sans bloquer la boucle d'événements
+        """
+        return await self.requete("GET", url, **kwargs)
+
+    async def post(self, url, **kwargs):
+        """
+        Envoie une requête POST sans bloquer la boucle d'événements
+        """
+        return await self.requete("POST", url, **kwargs)
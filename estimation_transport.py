@@ -0,0 +1,202 @@
+import copy
+import json
+
+import numpy as np
+
+try:
+    from modules.artefact_villes import normaliser_ville
+    from modules.matrice_distances import distances_consecutives, distances_paires
+except ImportError:
+    from artefact_villes import normaliser_ville
+    from matrice_distances import distances_consecutives, distances_paires
+
+# Paramètres d'un mode de transport :
+# - nom : libellé affiché
+# - vitesse_kmh : vitesse moyenne porte à porte hors attente
+# - detour : rapport entre la distance parcourue et la distance à vol d'oiseau
+# - attente_min : minutes ajoutées au trajet (attente, accès à la station, prise du véhicule)
+# - prise_en_charge, prix_km, prix_min, prix_minimum : tarif en euros
+# - distance_min_km, distance_max_km : distances à vol d'oiseau pour lesquelles le mode est proposé
+PROFIL_DEFAUT = {
+    "marche": {
+        "nom": "Marche à pied", "vitesse_kmh": 4.8, "detour": 1.3, "attente_min": 0,
+        "prise_en_charge": 0, "prix_km": 0, "prix_min": 0, "prix_minimum": 0,
+        "distance_min_km": 0, "distance_max_km": 6,
+    },
+    "velo": {
+        "nom": "Vélo en libre-service", "vitesse_kmh": 14, "detour": 1.25, "attente_min": 3,
+        "prise_en_charge": 1, "prix_km": 0, "prix_min": 0.05, "prix_minimum": 0,
+        "distance_min_km": 0.5, "distance_max_km": 15,
+    },
+    "transport_public": {
+        "nom": "Transports en commun", "vitesse_kmh": 18, "detour": 1.4, "attente_min": 8,
+        "prise_en_charge": 2, "prix_km": 0, "prix_min": 0, "prix_minimum": 0,
+        "distance_min_km": 0.8, "distance_max_km": float("inf"),
+    },
+    "taxi": {
+        "nom": "Taxi", "vitesse_kmh": 22, "detour": 1.35, "attente_min": 5,
+        "prise_en_charge": 4, "prix_km": 1.3, "prix_min": 0.5, "prix_minimum": 8,
+        "distance_min_km": 0.3, "distance_max_km": float("inf"),
+    },
+}
+
+PARAMETRES = ("vitesse_kmh", "detour", "attente_min", "prise_en_charge", "prix_km", "prix_min", "prix_minimum",
+              "distance_min_km", "distance_max_km")
+
+
+class EstimateurTransport:
+    """
+    Estime hors ligne la durée et le prix de chaque mode de transport entre les étapes d'un itinéraire,
+    à partir de leurs coordonnées.
+
+    Les vitesses et les tarifs viennent d'un profil par ville (PROFIL_DEFAUT complété par les valeurs
+    propres à la ville). Toutes les étapes sont estimées en une seule opération vectorisée : les paramètres
+    des modes, de forme (modes, 1), sont appliqués aux distances des étapes, de forme (1, étapes).
+    """
+
+    def __init__(self, profils=None):
+        """
+        Initialise l'estimateur
+
+        Args:
+            profils (dict): Paramètres propres à chaque ville, par exemple
+                {"Paris": {"transport_public": {"prise_en_charge": 2.15}, "velo": {"distance_max_km": 0}}}
+                ; la clé "*" s'applique à toutes les villes
+        """
+        profils = profils or {}
+        self.profil_general = self._fusionner(PROFIL_DEFAUT, profils.get("*", {}))
+        self.profils = {
+            normaliser_ville(ville): self._fusionner(self.profil_general, valeurs)
+            for ville, valeurs in profils.items() if ville != "*"
+        }
+        self._parametres = {}
+
+    @classmethod
+    def depuis_fichier(cls, chemin):
+        """
+        Charge les profils par ville depuis un fichier JSON
+
+        Args:
+            chemin (str): Chemin du fichier
+
+        Returns:
+            EstimateurTransport: L'estimateur
+        """
+        with open(chemin, "r", encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    @staticmethod
+    def _fusionner(base, valeurs):
+        profil = copy.deepcopy(base)
+        for mode, parametres in valeurs.items():
+            profil.setdefault(mode, {"nom": mode, **{nom: 0 for nom in PARAMETRES}})
+            profil[mode].update(parametres)
+        return profil
+
+    def profil(self, ville=None):
+        """
+        Retourne le profil de la ville, ou le profil général si la ville n'a pas de profil propre
+        """
+        return self.profils.get(normaliser_ville(ville), self.profil_general)
+
+    def _tableaux(self, ville):
+        cle = normaliser_ville(ville)
+        if cle not in self.profils:
+            cle = "*"
+        tableaux = self._parametres.get(cle)
+        if tableaux is None:
+            profil = self.profil(ville)
+            modes = list(profil)
+            tableaux = (modes, {
+                nom: np.array([float(profil[mode][nom]) for mode in modes], dtype=np.float64)[:, None]
+                for nom in PARAMETRES
+            })
+            self._parametres[cle] = tableaux
+        return tableaux
+
+    def estimer_distances(self, distances_km, ville=None):
+        """
+        Estime tous les modes pour toutes les étapes à partir des distances à vol d'oiseau
+
+        Args:
+            distances_km (array-like): Distances des étapes en kilomètres
+            ville (str): Ville dont le profil est utilisé
+
+        Returns:
+            tuple: (modes, minutes, prix, disponible) où minutes, prix et disponible sont des tableaux
+            de forme (modes, étapes)
+        """
+        modes, p = self._tableaux(ville)
+        distances = np.asarray(distances_km, dtype=np.float64).reshape(1, -1)
+
+        parcours = distances * p["detour"]
+        minutes = np.maximum(np.ceil(p["attente_min"] + parcours / p["vitesse_kmh"] * 60), 1)
+        prix = p["prise_en_charge"] + p["prix_km"] * parcours + p["prix_min"] * minutes
+        prix = np.round(np.maximum(prix, p["prix_minimum"]), 2)
+        disponible = (distances >= p["distance_min_km"]) & (distances <= p["distance_max_km"])
+        return modes, minutes, prix, disponible
+
+    def _options(self, modes, profil, minutes, prix, disponible, distances, etape):
+        options = [
+            {
+                "mode": mode,
+                "moyen": profil[mode]["nom"],
+                "minutes": int(minutes[i, etape]),
+                "prix": float(prix[i, etape]),
+                "distance_km": round(float(distances[etape]), 2),
+            }
+            for i, mode in enumerate(modes) if disponible[i, etape]
+        ]
+        return sorted(options, key=lambda option: option["minutes"])
+
+    def _estimer(self, distances, ville):
+        modes, minutes, prix, disponible = self.estimer_distances(distances, ville)
+        profil = self.profil(ville)
+        return [self._options(modes, profil, minutes, prix, disponible, distances, etape)
+                for etape in range(len(distances))]
+
+    def estimer(self, coordonnees, ville=None):
+        """
+        Estime les options de transport entre chaque étape et la suivante
+
+        Args:
+            coordonnees (list): Coordonnées (latitude, longitude) des étapes, dans l'ordre du parcours
+            ville (str): Ville dont le profil est utilisé
+
+        Returns:
+            list: Pour chaque étape sauf la dernière, la liste des options disponibles, la plus rapide
+            en premier, sous forme de dict (mode, moyen, minutes, prix, distance_km)
+        """
+        if len(coordonnees) < 2:
+            return []
+        return self._estimer(distances_consecutives(coordonnees), ville)
+
+    def estimer_paires(self, departs, arrivees, ville=None):
+        """
+        Estime les options de transport de trajets indépendants, en une seule opération
+
+        Args:
+            departs (list): Coordonnées (latitude, longitude) des départs
+            arrivees (list): Coordonnées (latitude, longitude) des arrivées, dans le même ordre
+            ville (str): Ville dont le profil est utilisé
+
+        Returns:
+            list: Pour chaque trajet, la liste des options disponibles, la plus rapide en premier
+        """
+        if not len(departs):
+            return []
+        return self._estimer(distances_paires(departs, arrivees), ville)
+
+    def estimer_trajet(self, depart, arrivee, ville=None):
+        """
+        Estime les options de transport entre deux points
+
+        Args:
+            depart (tuple): Coordonnées (latitude, longitude) du départ
+            arrivee (tuple): Coordonnées (latitude, longitude) de l'arrivée
+            ville (str): Ville dont le profil est utilisé
+
+        Returns:
+            list: Les options disponibles, la plus rapide en premier
+        """
+        return self.estimer_paires([depart], [arrivee], ville)[0]
@@ -0,0 +1,305 @@
+import csv
+import math
+import re
+import unicodedata
+from collections import defaultdict
+
+import numpy as np
+
+try:
+    from modules.matrice_distances import RAYON_TERRE_KM
+except ImportError:
+    from matrice_distances import RAYON_TERRE_KM
+
+# Mots trop courants pour identifier un lieu : ignorés dans l'index et les requêtes
+MOTS_VIDES = frozenset({
+    "a", "au", "aux", "d", "de", "des", "du", "en", "et", "l", "la", "le", "les", "sur", "sous",
+    "the", "of", "and",
+})
+
+# Longueur minimale d'un mot pour la correspondance approchée (une faute de frappe)
+LONGUEUR_MIN_APPROCHEE = 4
+
+# Poids d'un mot trouvé par correspondance approchée, relativement à une correspondance exacte
+POIDS_APPROCHE = 0.8
+
+# Nombre de mots les plus rares de la requête utilisés pour sélectionner les candidats
+NB_MOTS_CANDIDATS = 3
+
+# Colonnes d'un fichier GeoNames (geonames.org/export/dump)
+COLONNES_GEONAMES = 19
+
+
+def normaliser(texte):
+    """
+    Découpe un texte en mots normalisés : minuscules, sans accents ni ponctuation, sans mots vides
+
+    Les nombres (numéros de rue, codes postaux) sont ignorés.
+
+    Args:
+        texte (str): Le texte à découper
+
+    Returns:
+        list: Les mots normalisés
+    """
+    decompose = unicodedata.normalize("NFKD", texte or "").lower()
+    sans_accents = "".join(c for c in decompose if not unicodedata.combining(c))
+    return [
+        mot for mot in re.split(r"[^0-9a-z]+", sans_accents)
+        if mot and mot not in MOTS_VIDES and not mot.isdigit()
+    ]
+
+
+def _suppressions(mot):
+    """
+    Variantes d'un mot privé d'une lettre (index de correspondance approchée à une erreur près)
+    """
+    return {mot[:i] + mot[i + 1:] for i in range(len(mot))}
+
+
+class GeocodeurLocal:
+    """
+    Géocodeur hors ligne fondé sur un extrait OSM ou GeoNames chargé en mémoire.
+
+    Les noms de rues et de lieux sont indexés mot par mot (index inversé). Une adresse est
+    résolue vers le lieu dont le nom est le mieux couvert par les mots de l'adresse, chaque mot
+    étant pondéré par sa rareté (IDF). Les fautes de frappe d'une lettre sont tolérées grâce à
+    un index des variantes par suppression.
+    """
+
+    def __init__(self, lieux, seuil=0.75, rayon_ville_km=30.0):
+        """
+        Construit l'index
+
+        Args:
+            lieux (iterable): Tuples (nom, latitude, longitude, ville) ; ville peut être vide
+            seuil (float): Couverture minimale du nom d'un lieu par l'adresse (entre 0 et 1)
+            rayon_ville_km (float): Distance maximale au centre de la ville pour les lieux sans ville
+        """
+        self.seuil = seuil
+        self.rayon_ville_km = rayon_ville_km
+
+        noms = []
+        coordonnees = []
+        villes = []
+        mots_lieux = []
+        index = defaultdict(list)
+        for nom, latitude, longitude, ville in lieux:
+            mots = tuple(dict.fromkeys(normaliser(nom)))
+            if not mots:
+                continue
+            identifiant = len(noms)
+            noms.append(nom)
+            coordonnees.append((float(latitude), float(longitude)))
+            villes.append(" ".join(normaliser(ville)))
+            mots_lieux.append(mots)
+            for mot in mots:
+                index[mot].append(identifiant)
+
+        self.noms = noms
+        self.coordonnees = np.array(coordonnees, dtype=float).reshape(-1, 2)
+        self.villes = villes
+        self._mots_lieux = mots_lieux
+        self._index = dict(index)
+
+        # Rareté des mots et poids total du nom de chaque lieu
+        total = max(1, len(noms))
+        self._idf = {mot: math.log(1 + total / len(lieux_mot)) for mot, lieux_mot in self._index.items()}
+        self._poids_lieux = [sum(self._idf[mot] for mot in mots) for mots in mots_lieux]
+
+        # Variantes par suppression d'une lettre -> mots du vocabulaire
+        suppressions = defaultdict(set)
+        for mot in self._index:
+            if len(mot) >= LONGUEUR_MIN_APPROCHEE:
+                for variante in _suppressions(mot):
+                    suppressions[variante].add(mot)
+        self._suppressions = dict(suppressions)
+
+        self._centres = {}
+
+    def __len__(self):
+        return len(self.noms)
+
+    @classmethod
+    def depuis_fichier(cls, chemin, **kwargs):
+        """
+        Charge un extrait depuis un fichier
+
+        Deux formats sont acceptés :
+        - un fichier GeoNames (.txt, tabulé, sans en-tête) ;
+        - un fichier CSV avec en-tête contenant au moins les colonnes nom/name, lat/latitude,
+          lon/longitude et éventuellement ville/city (export d'un extrait OSM par exemple).
+
+        Args:
+            chemin (str): Chemin du fichier
+            **kwargs: Paramètres transmis au constructeur
+
+        Returns:
+            GeocodeurLocal: Le géocodeur
+        """
+        with open(chemin, "r", encoding="utf-8", newline="") as f:
+            premiere_ligne = f.readline()
+            f.seek(0)
+            if premiere_ligne.count("\t") == COLONNES_GEONAMES - 1:
+                return cls(cls._lire_geonames(f), **kwargs)
+            return cls(cls._lire_csv(f), **kwargs)
+
+    @staticmethod
+    def _lire_geonames(fichier):
+        for ligne in fichier:
+            colonnes = ligne.rstrip("\n").split("\t")
+            if len(colonnes) < COLONNES_GEONAMES:
+                continue
+            latitude, longitude = colonnes[4], colonnes[5]
+            # Nom principal et noms alternatifs (traductions, graphies locales)
+            noms = {colonnes[1], colonnes[2]}
+            noms.update(nom for nom in colonnes[3].split(",") if nom)
+            for nom in noms:
+                yield nom, latitude, longitude, ""
+
+    @staticmethod
+    def _lire_csv(fichier):
+        lecteur = csv.DictReader(fichier)
+        colonnes = {nom.lower(): nom for nom in lecteur.fieldnames or []}
+
+        def colonne(*candidats):
+            for candidat in candidats:
+                if candidat in colonnes:
+                    return colonnes[candidat]
+            return None
+
+        nom, latitude = colonne("nom", "name"), colonne("latitude", "lat")
+        longitude, ville = colonne("longitude", "lon", "lng"), colonne("ville", "city", "addr:city")
+        if not (nom and latitude and longitude):
+            raise ValueError("Colonnes nom, latitude et longitude requises")
+
+        for ligne in lecteur:
+            try:
+                yield ligne[nom], float(ligne[latitude]), float(ligne[longitude]), ligne[ville] if ville else ""
+            except (TypeError, ValueError):
+                continue
+
+    def _mots_requete(self, texte):
+        """
+        Associe chaque mot de la requête à un mot du vocabulaire et à son poids
+
+        Returns:
+            dict: Mot du vocabulaire -> facteur de poids (1 si exact, POIDS_APPROCHE si approché)
+        """
+        mots = {}
+        for mot in normaliser(texte):
+            if mot in self._index:
+                mots[mot] = 1.0
+                continue
+            if len(mot) < LONGUEUR_MIN_APPROCHEE:
+                continue
+            # Suppression, insertion ou substitution d'une lettre
+            proches = set(self._suppressions.get(mot, ()))
+            for variante in _suppressions(mot):
+                if variante in self._index:
+                    proches.add(variante)
+                proches.update(self._suppressions.get(variante, ()))
+            for proche in proches:
+                mots.setdefault(proche, POIDS_APPROCHE)
+        return mots
+
+    def _centre_ville(self, ville):
+        """
+        Coordonnées de la ville elle-même, si l'extrait la contient
+        """
+        cle = " ".join(normaliser(ville))
+        if cle not in self._centres:
+            mots = tuple(normaliser(ville))
+            centre = None
+            if mots:
+                for identifiant in self._index.get(mots[0], ()):
+                    if self._mots_lieux[identifiant] == mots:
+                        centre = self.coordonnees[identifiant]
+                        break
+            self._centres[cle] = centre
+        return self._centres[cle]
+
+    def emprise_ville(self, ville):
+        """
+        Emprise approximative d'une ville : carré de côté 2 * rayon_ville_km autour de son centre
+
+        Returns:
+            tuple: (sud, nord, ouest, est) en degrés ou None si la ville est absente de l'extrait
+        """
+        centre = self._centre_ville(ville)
+        if centre is None:
+            return None
+        latitude, longitude = float(centre[0]), float(centre[1])
+        delta_lat = math.degrees(self.rayon_ville_km / RAYON_TERRE_KM)
+        delta_lon = delta_lat / max(math.cos(math.radians(latitude)), 1e-6)
+        return latitude - delta_lat, latitude + delta_lat, longitude - delta_lon, longitude + delta_lon
+
+    def _dans_la_ville(self, identifiant, ville_normalisee, centre):
+        ville_lieu = self.villes[identifiant]
+        if ville_lieu:
+            return not ville_normalisee or ville_lieu == ville_normalisee
+        if centre is None:
+            return True
+        lat1, lon1 = np.radians(centre)
+        lat2, lon2 = np.radians(self.coordonnees[identifiant])
+        a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+        return 2 * RAYON_TERRE_KM * math.asin(math.sqrt(a)) <= self.rayon_ville_km
+
+    def rechercher(self, adresse, ville=""):
+        """
+        Recherche le lieu correspondant le mieux à une adresse
+
+        Args:
+            adresse (str): L'adresse ou le nom du lieu
+            ville (str): La ville, pour écarter les homonymes
+
+        Returns:
+            tuple: (nom du lieu, latitude, longitude, score) ou None si aucun lieu n'atteint le seuil
+        """
+        mots = self._mots_requete(adresse)
+        # Les mots de la ville ne doivent pas suffire à identifier un lieu
+        mots_ville = set(normaliser(ville))
+        for mot in mots_ville:
+            mots.pop(mot, None)
+        if not mots:
+            return None
+
+        # Candidats : lieux contenant au moins un des mots les plus rares de la requête
+        rares = sorted(mots, key=lambda mot: self._idf[mot], reverse=True)[:NB_MOTS_CANDIDATS]
+        candidats = set()
+        for mot in rares:
+            candidats.update(self._index[mot])
+
+        ville_normalisee = " ".join(normaliser(ville))
+        centre = self._centre_ville(ville) if ville_normalisee else None
+
+        meilleur = None
+        for identifiant in candidats:
+            mots_lieu = self._mots_lieux[identifiant]
+            couvert = sum(self._idf[mot] * mots[mot] for mot in mots_lieu if mot in mots)
+            # Le nom de la ville dans celui du lieu ("Notre-Dame de Paris") n'est pas exigé
+            poids = self._poids_lieux[identifiant] - sum(self._idf[mot] for mot in mots_lieu if mot in mots_ville)
+            if poids <= 0:
+                continue
+            score = (couvert / poids, couvert)
+            if score[0] < self.seuil or (meilleur is not None and score <= meilleur[0]):
+                continue
+            if not self._dans_la_ville(identifiant, ville_normalisee, centre):
+                continue
+            meilleur = (score, identifiant)
+
+        if meilleur is None:
+            return None
+        (couverture, _), identifiant = meilleur
+        latitude, longitude = self.coordonnees[identifiant]
+        return self.noms[identifiant], float(latitude), float(longitude), couverture
+
+    def geocoder(self, adresse, ville=""):
+        """
+        Géocode une adresse
+
+        Returns:
+            tuple: Les coordonnées (latitude, longitude) ou None si l'adresse n'est pas trouvée
+        """
+        resultat = self.rechercher(adresse, ville)
+        return (resultat[1], resultat[2]) if resultat else None
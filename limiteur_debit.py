@@ -0,0 +1,142 @@
+import threading
+import time
+from collections import deque
+
+# Nombre d'attentes conservées pour le calcul des percentiles
+TAILLE_HISTORIQUE = 1000
+
+
+class LimiteurDebit:
+    """
+    Seau à jetons partagé entre threads, implémenté sous forme de GCRA : chaque appelant réserve
+    sous verrou le prochain créneau disponible puis attend hors verrou jusqu'à ce créneau.
+
+    Les appelants sont servis dans l'ordre de leurs réservations et le débit soutenu est
+    exactement celui configuré, quel que soit le nombre de threads.
+    """
+
+    def __init__(self, debit=1.0, capacite=1):
+        """
+        Initialise le limiteur
+
+        Args:
+            debit (float): Nombre d'appels autorisés par seconde (None pour ne pas limiter le débit)
+            capacite (int): Nombre d'appels pouvant partir en rafale après une période d'inactivité
+        """
+        self._prochain = 0.0
+        self._verrou = threading.Lock()
+        self.configurer(debit, capacite)
+
+        self._acquisitions = 0
+        self._refus = 0
+        self._en_attente = 0
+        self._attente_totale = 0.0
+        self._attente_max = 0.0
+        self._attentes = deque(maxlen=TAILLE_HISTORIQUE)
+
+    def configurer(self, debit=1.0, capacite=1):
+        """
+        Change le débit et la capacité du limiteur
+
+        Le nouveau débit s'applique dès l'appel : le prochain créneau est avancé s'il était
+        plus éloigné qu'un intervalle du nouveau débit.
+
+        Args:
+            debit (float): Nombre d'appels autorisés par seconde (None pour ne pas limiter le débit)
+            capacite (int): Nombre d'appels pouvant partir en rafale après une période d'inactivité
+        """
+        if (debit is not None and debit <= 0) or capacite < 1:
+            raise ValueError("Le débit doit être positif et la capacité au moins égale à 1")
+        with self._verrou:
+            self.debit = debit
+            self.capacite = capacite
+            # Sans limite, chaque créneau est immédiatement disponible : les statistiques restent tenues
+            self._intervalle = 1.0 / debit if debit is not None else 0.0
+            self._tolerance = (capacite - 1) * self._intervalle
+            self._prochain = min(self._prochain, time.monotonic() + self._intervalle)
+
+    def acquerir(self, attente_max=None):
+        """
+        Attend qu'un jeton soit disponible
+
+        Args:
+            attente_max (float): Attente maximale acceptée en secondes (None pour attendre indéfiniment)
+
+        Returns:
+            bool: True si le jeton a été obtenu, False si l'attente aurait dépassé attente_max
+        """
+        with self._verrou:
+            maintenant = time.monotonic()
+            prochain = max(self._prochain, maintenant)
+            debut = max(maintenant, prochain - self._tolerance)
+            attente = debut - maintenant
+            if attente_max is not None and attente > attente_max:
+                self._refus += 1
+                return False
+            self._prochain = prochain + self._intervalle
+
+            self._acquisitions += 1
+            self._attente_totale += attente
+            self._attente_max = max(self._attente_max, attente)
+            self._attentes.append(attente)
+            self._en_attente += 1
+
+        try:
+            if attente > 0:
+                time.sleep(attente)
+        finally:
+            with self._verrou:
+                self._en_attente -= 1
+        return True
+
+    def statistiques(self):
+        """
+        Retourne les statistiques d'attente (délai passé dans la file avant d'obtenir un jeton)
+
+        Returns:
+            dict: Nombre d'acquisitions et de refus, appelants en attente, attentes totale, moyenne,
+            maximale et percentiles (en secondes) sur les dernières acquisitions
+        """
+        with self._verrou:
+            attentes = sorted(self._attentes)
+            acquisitions = self._acquisitions
+            statistiques = {
+                "acquisitions": acquisitions,
+                "refus": self._refus,
+                "en_attente": self._en_attente,
+                "attente_totale": self._attente_totale,
+                "attente_moyenne": self._attente_totale / acquisitions if acquisitions else 0.0,
+                "attente_max": self._attente_max,
+            }
+
+        for nom, quantile in (("attente_p50", 0.50), ("attente_p95", 0.95), ("attente_p99", 0.99)):
+            statistiques[nom] = attentes[min(len(attentes) - 1, int(quantile * len(attentes)))] if attentes else 0.0
+        return statistiques
+
+
+_limiteurs = {}
+_verrou_limiteurs = threading.Lock()
+
+
+def obtenir_limiteur(nom, debit=1.0, capacite=1):
+    """
+    Retourne le limiteur partagé d'un service, créé au premier appel
+
+    Tous les appelants d'un même processus partagent ainsi le même seau ; un appel avec un autre
+    débit ou une autre capacité reconfigure le limiteur existant plutôt que d'en créer un second.
+
+    Args:
+        nom (str): Nom du service (par exemple "nominatim")
+        debit (float): Nombre d'appels autorisés par seconde (None pour ne pas limiter le débit)
+        capacite (int): Taille maximale d'une rafale
+
+    Returns:
+        LimiteurDebit: Le limiteur du service
+    """
+    with _verrou_limiteurs:
+        limiteur = _limiteurs.get(nom)
+        if limiteur is None:
+            limiteur = _limiteurs[nom] = LimiteurDebit(debit, capacite)
+        elif (limiteur.debit, limiteur.capacite) != (debit, capacite):
+            limiteur.configurer(debit, capacite)
+        return limiteur
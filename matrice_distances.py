@@ -0,0 +1,100 @@
+import numpy as np
+from geopy.distance import geodesic
+
+# Rayon moyen de la Terre (WGS-84) en kilomètres
+RAYON_TERRE_KM = 6371.0088
+
+
+def matrice_haversine(coordonnees):
+    """
+    Calcule en une seule opération vectorisée toutes les distances haversine entre des points
+
+    Args:
+        coordonnees (list): Liste de coordonnées (latitude, longitude) en degrés
+
+    Returns:
+        numpy.ndarray: Matrice symétrique (n, n) des distances en kilomètres
+    """
+    points = np.radians(np.asarray(coordonnees, dtype=np.float64).reshape(-1, 2))
+    latitudes = points[:, 0]
+    longitudes = points[:, 1]
+
+    delta_lat = latitudes[:, None] - latitudes[None, :]
+    delta_lon = longitudes[:, None] - longitudes[None, :]
+
+    a = (np.sin(delta_lat / 2) ** 2
+         + np.cos(latitudes)[:, None] * np.cos(latitudes)[None, :] * np.sin(delta_lon / 2) ** 2)
+    return 2 * RAYON_TERRE_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def distances_paires(departs, arrivees):
+    """
+    Calcule en une seule opération vectorisée les distances haversine entre chaque départ et son arrivée
+
+    Args:
+        departs (list): Liste de coordonnées (latitude, longitude) en degrés
+        arrivees (list): Liste de coordonnées (latitude, longitude) en degrés, de même longueur
+
+    Returns:
+        numpy.ndarray: Vecteur (n,) des distances en kilomètres
+    """
+    depart = np.radians(np.asarray(departs, dtype=np.float64).reshape(-1, 2))
+    arrivee = np.radians(np.asarray(arrivees, dtype=np.float64).reshape(-1, 2))
+
+    delta_lat = arrivee[:, 0] - depart[:, 0]
+    delta_lon = arrivee[:, 1] - depart[:, 1]
+
+    a = np.sin(delta_lat / 2) ** 2 + np.cos(depart[:, 0]) * np.cos(arrivee[:, 0]) * np.sin(delta_lon / 2) ** 2
+    return 2 * RAYON_TERRE_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def distances_consecutives(coordonnees):
+    """
+    Calcule les distances haversine entre points successifs
+
+    Args:
+        coordonnees (list): Liste de coordonnées (latitude, longitude) en degrés, dans l'ordre du parcours
+
+    Returns:
+        numpy.ndarray: Vecteur (n - 1,) des distances en kilomètres
+    """
+    points = np.asarray(coordonnees, dtype=np.float64).reshape(-1, 2)
+    return distances_paires(points[:-1], points[1:])
+
+
+def matrice_geodesique(coordonnees):
+    """
+    Calcule toutes les distances géodésiques exactes (ellipsoïde WGS-84) entre des points
+
+    Args:
+        coordonnees (list): Liste de coordonnées (latitude, longitude) en degrés
+
+    Returns:
+        numpy.ndarray: Matrice symétrique (n, n) des distances en kilomètres
+    """
+    n = len(coordonnees)
+    matrice = np.zeros((n, n), dtype=np.float64)
+    for i in range(n):
+        for j in range(i + 1, n):
+            distance = geodesic(coordonnees[i], coordonnees[j]).kilometers
+            matrice[i, j] = distance
+            matrice[j, i] = distance
+    return matrice
+
+
+def calculer_matrice_distances(coordonnees, exacte=False):
+    """
+    Calcule la matrice des distances entre des points
+
+    Args:
+        coordonnees (list): Liste de coordonnées (latitude, longitude) en degrés
+        exacte (bool): Utilise la distance géodésique exacte au lieu de l'approximation haversine
+
+    Returns:
+        numpy.ndarray: Matrice symétrique (n, n) des distances en kilomètres
+    """
+    if len(coordonnees) == 0:
+        return np.zeros((0, 0), dtype=np.float64)
+    if exacte:
+        return matrice_geodesique(coordonnees)
+    return matrice_haversine(coordonnees)
@@ -0,0 +1,349 @@
+import contextlib
+import contextvars
+import math
+import threading
+import time
+
+# Bornes des histogrammes de durée, en secondes
+SEUILS_DUREE = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0)
+
+# Étapes mesurées pendant la requête en cours (None hors d'une requête)
+_etapes_requete = contextvars.ContextVar("etapes_requete", default=None)
+
+
+def _formater_etiquettes(etiquettes):
+    if not etiquettes:
+        return ""
+    paires = []
+    for nom, valeur in etiquettes:
+        valeur = str(valeur).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        paires.append(f'{nom}="{valeur}"')
+    return "{" + ",".join(paires) + "}"
+
+
+def _formater_valeur(valeur):
+    if valeur == math.inf:
+        return "+Inf"
+    return repr(float(valeur)) if isinstance(valeur, float) else str(valeur)
+
+
+class Histogramme:
+    """
+    Histogramme cumulatif au sens de Prometheus, une série par combinaison d'étiquettes
+    """
+
+    def __init__(self, nom, description, etiquettes=(), seuils=SEUILS_DUREE):
+        """
+        Args:
+            nom (str): Nom de la métrique
+            description (str): Texte d'aide
+            etiquettes (tuple): Noms des étiquettes
+            seuils (tuple): Bornes supérieures des intervalles, croissantes
+        """
+        self.nom = nom
+        self.description = description
+        self.etiquettes = tuple(etiquettes)
+        self.seuils = tuple(seuils) + (math.inf,)
+        self._series = {}
+        self._verrou = threading.Lock()
+
+    def observer(self, valeur, **etiquettes):
+        """
+        Enregistre une observation
+
+        Args:
+            valeur (float): La valeur observée
+            **etiquettes: Valeur de chaque étiquette
+        """
+        cle = tuple(etiquettes.get(nom, "") for nom in self.etiquettes)
+        with self._verrou:
+            serie = self._series.get(cle)
+            if serie is None:
+                serie = self._series[cle] = [[0] * len(self.seuils), 0.0, 0]
+            for i, seuil in enumerate(self.seuils):
+                if valeur <= seuil:
+                    serie[0][i] += 1
+                    break
+            serie[1] += valeur
+            serie[2] += 1
+
+    def exposer(self):
+        """
+        Retourne les lignes de la métrique au format texte de Prometheus
+        """
+        lignes = [f"# HELP {self.nom} {self.description}", f"# TYPE {self.nom} histogram"]
+        with self._verrou:
+            series = sorted((cle, [list(serie[0]), serie[1], serie[2]]) for cle, serie in self._series.items())
+        for cle, (comptes, somme, total) in series:
+            etiquettes = list(zip(self.etiquettes, cle))
+            cumul = 0
+            for seuil, compte in zip(self.seuils, comptes):
+                cumul += compte
+                lignes.append(f"{self.nom}_bucket{_formater_etiquettes(etiquettes + [('le', _formater_valeur(seuil))])} {cumul}")
+            lignes.append(f"{self.nom}_sum{_formater_etiquettes(etiquettes)} {_formater_valeur(somme)}")
+            lignes.append(f"{self.nom}_count{_formater_etiquettes(etiquettes)} {total}")
+        return lignes
+
+
+class Registre:
+    """
+    Ensemble des métriques exposées par /metrics : histogrammes et collecteurs appelés
+    à chaque lecture (compteurs des caches, du limiteur de débit...)
+    """
+
+    def __init__(self):
+        self._histogrammes = {}
+        self._collecteurs = []
+        self._verrou = threading.Lock()
+
+    def histogramme(self, nom, description, etiquettes=(), seuils=SEUILS_DUREE):
+        """
+        Retourne l'histogramme portant ce nom, créé au premier appel
+        """
+        with self._verrou:
+            if nom not in self._histogrammes:
+                self._histogrammes[nom] = Histogramme(nom, description, etiquettes, seuils)
+            return self._histogrammes[nom]
+
+    def ajouter_collecteur(self, collecteur):
+        """
+        Ajoute une fonction appelée à chaque exposition
+
+        La fonction retourne une liste de tuples (nom, type, description, échantillons), où type
+        est "counter", "gauge" ou "summary" et échantillons une liste de (dict des étiquettes, valeur)
+        ; un échantillon peut porter en troisième élément un suffixe ajouté au nom ("_sum", "_count").
+        """
+        with self._verrou:
+            self._collecteurs.append(collecteur)
+
+    def exposer(self):
+        """
+        Retourne toutes les métriques au format texte de Prometheus
+
+        Returns:
+            str: Le contenu de la réponse /metrics
+        """
+        with self._verrou:
+            histogrammes = list(self._histogrammes.values())
+            collecteurs = list(self._collecteurs)
+
+        lignes = []
+        for histogramme in histogrammes:
+            lignes.extend(histogramme.exposer())
+
+        # Les échantillons d'une même métrique, fournis par plusieurs collecteurs, sont regroupés
+        metriques = {}
+        for collecteur in collecteurs:
+            try:
+                for nom, type_metrique, description, echantillons in collecteur():
+                    metriques.setdefault(nom, (type_metrique, description, []))[2].extend(echantillons)
+            except Exception as e:
+                print(f"Erreur lors de la collecte des métriques: {e}")
+
+        for nom, (type_metrique, description, echantillons) in metriques.items():
+            lignes.append(f"# HELP {nom} {description}")
+            lignes.append(f"# TYPE {nom} {type_metrique}")
+            for etiquettes, valeur, *suffixe in echantillons:
+                lignes.append(f"{nom}{''.join(suffixe)}{_formater_etiquettes(sorted(etiquettes.items()))} "
+                              f"{_formater_valeur(valeur)}")
+
+        return "\n".join(lignes) + "\n"
+
+
+REGISTRE = Registre()
+
+DUREE_ETAPES = REGISTRE.histogramme(
+    "tourguide_etape_duree_secondes", "Durée des étapes de traitement, en secondes", ("etape",)
+)
+
+
+class _Mesure(contextlib.ContextDecorator):
+    """
+    Mesure de la durée d'une étape (voir mesurer)
+    """
+
+    def __init__(self, etape):
+        self.etape = etape
+        self._debuts = threading.local()
+
+    def __enter__(self):
+        # Une pile par thread : le même décorateur peut être traversé par plusieurs threads
+        pile = getattr(self._debuts, "pile", None)
+        if pile is None:
+            pile = self._debuts.pile = []
+        pile.append(time.perf_counter())
+        return self
+
+    def __exit__(self, *exc):
+        duree = time.perf_counter() - self._debuts.pile.pop()
+        DUREE_ETAPES.observer(duree, etape=self.etape)
+        etapes = _etapes_requete.get()
+        if etapes is not None:
+            etapes.append((self.etape, duree))
+        return False
+
+
+def mesurer(etape):
+    """
+    Mesure la durée d'une étape, en gestionnaire de contexte ou en décorateur :
+
+        with mesurer("geocodage"):
+            ...
+
+        @mesurer("optimiser_itineraire")
+        def optimiser_itineraire(...):
+
+    La durée alimente l'histogramme des étapes et, pendant une requête, son journal de durées.
+
+    Args:
+        etape (str): Nom de l'étape
+    """
+    return _Mesure(etape)
+
+
+def debut_requete():
+    """
+    Commence à collecter les durées des étapes de la requête en cours
+
+    Returns:
+        contextvars.Token: Jeton à passer à fin_requete
+    """
+    return _etapes_requete.set([])
+
+
+def fin_requete(jeton):
+    """
+    Termine la collecte et retourne les durées des étapes de la requête
+
+    Args:
+        jeton (contextvars.Token): Le jeton renvoyé par debut_requete
+
+    Returns:
+        dict: Étape -> durée cumulée en millisecondes
+    """
+    etapes = _etapes_requete.get() or []
+    _etapes_requete.reset(jeton)
+    durees = {}
+    for etape, duree in etapes:
+        durees[etape] = durees.get(etape, 0.0) + duree * 1000
+    return {etape: round(duree, 1) for etape, duree in durees.items()}
+
+
+def _resume(etiquettes, statistiques, somme, nombre):
+    # Échantillons d'une métrique "summary" : percentiles de l'attente, somme et nombre d'observations
+    echantillons = [(dict(etiquettes, quantile=q), statistiques[f"attente_p{int(q * 100)}"])
+                    for q in (0.5, 0.95, 0.99)]
+    echantillons.append((etiquettes, somme, "_sum"))
+    echantillons.append((etiquettes, nombre, "_count"))
+    return echantillons
+
+
+def collecteur_cache(nom_cache, cache):
+    """
+    Crée un collecteur exposant les compteurs d'un CacheLRU
+
+    Args:
+        nom_cache (str): Valeur de l'étiquette "cache"
+        cache (CacheLRU): Le cache
+
+    Returns:
+        callable: Le collecteur à passer à Registre.ajouter_collecteur
+    """
+    def collecter():
+        statistiques = cache.statistiques()
+        etiquettes = {"cache": nom_cache}
+        return [
+            ("tourguide_cache_succes_total", "counter", "Lectures trouvées dans le cache",
+             [(etiquettes, statistiques["succes"])]),
+            ("tourguide_cache_echecs_total", "counter", "Lectures absentes du cache",
+             [(etiquettes, statistiques["echecs"])]),
+            ("tourguide_cache_taux_succes", "gauge", "Proportion des lectures trouvées dans le cache",
+             [(etiquettes, statistiques["taux_succes"])]),
+            ("tourguide_cache_entrees", "gauge", "Nombre d'entrées en mémoire",
+             [(etiquettes, statistiques["entrees"])]),
+        ]
+    return collecter
+
+
+def collecteur_singleflight(nom_groupe, groupe):
+    """
+    Crée un collecteur exposant les compteurs de regroupement d'un SingleFlight
+
+    Args:
+        nom_groupe (str): Valeur de l'étiquette "groupe"
+        groupe (SingleFlight): Le regroupement d'appels
+
+    Returns:
+        callable: Le collecteur à passer à Registre.ajouter_collecteur
+    """
+    def collecter():
+        statistiques = groupe.statistiques()
+        etiquettes = {"groupe": nom_groupe}
+        return [
+            ("tourguide_singleflight_appels_total", "counter", "Appels reçus",
+             [(etiquettes, statistiques["appels"])]),
+            ("tourguide_singleflight_executions_total", "counter", "Appels réellement exécutés",
+             [(etiquettes, statistiques["executions"])]),
+            ("tourguide_singleflight_doublons_evites_total", "counter", "Appels servis par un appel déjà en cours",
+             [(etiquettes, statistiques["doublons_evites"])]),
+            ("tourguide_singleflight_en_cours", "gauge", "Appels en cours d'exécution",
+             [(etiquettes, statistiques["en_cours"])]),
+        ]
+    return collecter
+
+
+def collecteur_limiteur(nom_limiteur, limiteur):
+    """
+    Crée un collecteur exposant les attentes d'un LimiteurDebit
+
+    Args:
+        nom_limiteur (str): Valeur de l'étiquette "limiteur"
+        limiteur (LimiteurDebit): Le limiteur
+
+    Returns:
+        callable: Le collecteur à passer à Registre.ajouter_collecteur
+    """
+    def collecter():
+        statistiques = limiteur.statistiques()
+        etiquettes = {"limiteur": nom_limiteur}
+        return [
+            ("tourguide_limiteur_acquisitions_total", "counter", "Jetons obtenus",
+             [(etiquettes, statistiques["acquisitions"])]),
+            ("tourguide_limiteur_en_attente", "gauge", "Appelants en attente d'un jeton",
+             [(etiquettes, statistiques["en_attente"])]),
+            ("tourguide_limiteur_attente_secondes", "summary", "Attente avant l'obtention d'un jeton",
+             _resume(etiquettes, statistiques, statistiques["attente_totale"], statistiques["acquisitions"])),
+        ]
+    return collecter
+
+
+def collecteur_ordonnanceur(nom_file, ordonnanceur):
+    """
+    Crée un collecteur exposant la profondeur et les délais d'attente d'un OrdonnanceurTaches
+
+    Args:
+        nom_file (str): Valeur de l'étiquette "file"
+        ordonnanceur (OrdonnanceurTaches): L'ordonnanceur
+
+    Returns:
+        callable: Le collecteur à passer à Registre.ajouter_collecteur
+    """
+    def collecter():
+        statistiques = ordonnanceur.statistiques()
+        etiquettes = {"file": nom_file}
+        return [
+            ("tourguide_file_taches_en_attente", "gauge", "Tâches en attente d'un worker",
+             [(etiquettes, statistiques["en_file"])]),
+            ("tourguide_file_taches_en_cours", "gauge", "Tâches en cours d'exécution",
+             [(etiquettes, statistiques["en_cours"])]),
+            ("tourguide_file_capacite", "gauge", "Nombre maximal de tâches en attente",
+             [(etiquettes, statistiques["capacite"])]),
+            ("tourguide_file_demandes_total", "counter", "Demandes reçues, par issue",
+             [(dict(etiquettes, issue=issue), statistiques[issue])
+              for issue in ("soumises", "regroupees", "rejetees", "expirees")]),
+            ("tourguide_file_taches_total", "counter", "Tâches sorties de la file, par issue",
+             [(dict(etiquettes, issue=issue), statistiques[issue]) for issue in ("abandonnees", "terminees", "echecs")]),
+            ("tourguide_file_attente_secondes", "summary", "Attente en file avant exécution",
+             _resume(etiquettes, statistiques, statistiques["attente_totale"], statistiques["demarrees"])),
+        ]
+    return collecter
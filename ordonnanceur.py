@@ -0,0 +1,275 @@
+import concurrent.futures
+import functools
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+
+# Nombre d'attentes conservées pour le calcul des percentiles
+TAILLE_HISTORIQUE = 1000
+
+
+class FilePleine(Exception):
+    """
+    La file de l'ordonnanceur a atteint sa taille maximale : la tâche n'est pas acceptée
+    """
+
+
+class EcheanceDepassee(TimeoutError):
+    """
+    La tâche n'a pas abouti avant l'échéance fixée par le demandeur
+    """
+
+
+class _Travail:
+    """
+    Tâche en file ou en cours, partagée par toutes les demandes portant sur la même clé
+    """
+
+    def __init__(self, cle, fonction, args, kwargs, priorite):
+        self.cle = cle
+        self.fonction = fonction
+        self.args = args
+        self.kwargs = kwargs
+        self.priorite = priorite
+        self.demandes = []
+        self.soumis_a = time.monotonic()
+        self.demarre = False
+        self.abandonne = False
+
+
+class OrdonnanceurTaches:
+    """
+    Exécute des tâches bloquantes (scraping) sur un nombre fixe de workers, à partir d'une file
+    bornée et ordonnée par priorité (la plus petite valeur passe en premier, puis l'ordre d'arrivée).
+
+    Chaque demande reçoit son propre Future :
+    - les demandes portant sur la même clé partagent une seule exécution ;
+    - une demande dont l'échéance est dépassée reçoit EcheanceDepassee, la tâche continuant
+      éventuellement pour les autres demandeurs ;
+    - une demande peut être annulée (Future.cancel) ; une tâche encore en file dont plus personne
+      n'attend le résultat est abandonnée sans être exécutée.
+
+    Quand la file est pleine, soumettre lève FilePleine aussitôt plutôt que de faire attendre.
+    """
+
+    def __init__(self, nb_workers, taille_max=100, nom="taches"):
+        """
+        Initialise l'ordonnanceur et démarre ses workers
+
+        Args:
+            nb_workers (int): Nombre de tâches exécutées simultanément
+            taille_max (int): Nombre maximal de tâches en attente
+            nom (str): Préfixe du nom des threads
+        """
+        if nb_workers < 1 or taille_max < 1:
+            raise ValueError("Il faut au moins un worker et une place dans la file")
+        self.nb_workers = nb_workers
+        self.taille_max = taille_max
+
+        self._verrou = threading.Lock()
+        self._travail_disponible = threading.Condition(self._verrou)
+        self._echeance_ajoutee = threading.Condition(self._verrou)
+        self._file = []
+        self._echeances = []
+        self._sequence = itertools.count()
+        self._par_cle = {}
+        self._arret = False
+
+        self._en_file = 0
+        self._en_cours = 0
+        self._soumises = 0
+        self._regroupees = 0
+        self._rejetees = 0
+        self._expirees = 0
+        self._abandonnees = 0
+        self._terminees = 0
+        self._echecs = 0
+        self._demarrees = 0
+        self._attente_totale = 0.0
+        self._attentes = deque(maxlen=TAILLE_HISTORIQUE)
+
+        self._threads = [
+            threading.Thread(target=self._executer, name=f"{nom}-{i}", daemon=True) for i in range(nb_workers)
+        ]
+        self._threads.append(threading.Thread(target=self._surveiller_echeances, name=f"{nom}-echeances", daemon=True))
+        for thread in self._threads:
+            thread.start()
+
+    def soumettre(self, fonction, *args, cle=None, priorite=0, delai=None, **kwargs):
+        """
+        Place fonction(*args, **kwargs) dans la file
+
+        Args:
+            fonction (callable): La fonction à exécuter
+            *args: Arguments positionnels de la fonction
+            cle (str): Identifie les demandes équivalentes, exécutées une seule fois (None : jamais regroupée)
+            priorite (int): Rang de la tâche, les plus petites valeurs passent en premier
+            delai (float): Temps maximal en secondes avant que la demande ne reçoive EcheanceDepassee
+            **kwargs: Arguments nommés de la fonction
+
+        Returns:
+            concurrent.futures.Future: Le résultat de la demande
+
+        Raises:
+            FilePleine: Si la file a atteint sa taille maximale
+        """
+        demande = concurrent.futures.Future()
+        with self._verrou:
+            if self._arret:
+                raise RuntimeError("L'ordonnanceur est arrêté")
+
+            travail = self._par_cle.get(cle) if cle is not None else None
+            if travail is not None and not travail.abandonne:
+                self._regroupees += 1
+                # Une demande plus urgente fait remonter la tâche dans la file
+                if not travail.demarre and priorite < travail.priorite:
+                    travail.priorite = priorite
+                    heapq.heappush(self._file, (priorite, next(self._sequence), travail))
+                    self._travail_disponible.notify()
+            else:
+                if self._en_file >= self.taille_max:
+                    self._rejetees += 1
+                    raise FilePleine(f"{self._en_file} tâches déjà en attente")
+                travail = _Travail(cle, fonction, args, kwargs, priorite)
+                if cle is not None:
+                    self._par_cle[cle] = travail
+                heapq.heappush(self._file, (priorite, next(self._sequence), travail))
+                self._en_file += 1
+                self._travail_disponible.notify()
+
+            self._soumises += 1
+            travail.demandes.append(demande)
+            if delai is not None:
+                heapq.heappush(self._echeances, (time.monotonic() + delai, next(self._sequence), demande))
+                self._echeance_ajoutee.notify()
+
+        demande.add_done_callback(functools.partial(self._demande_terminee, travail))
+        return demande
+
+    def _demande_terminee(self, travail, demande):
+        # Une tâche encore en file dont toutes les demandes sont closes n'a plus à être exécutée
+        with self._verrou:
+            if travail.demarre or travail.abandonne or not all(d.done() for d in travail.demandes):
+                return
+            travail.abandonne = True
+            self._en_file -= 1
+            self._abandonnees += 1
+            if self._par_cle.get(travail.cle) is travail:
+                del self._par_cle[travail.cle]
+
+    def _prochain_travail(self):
+        """
+        Attend et retire de la file la tâche la plus prioritaire (None à l'arrêt)
+        """
+        with self._verrou:
+            while True:
+                while self._file:
+                    priorite, _, travail = heapq.heappop(self._file)
+                    # Entrées périmées : tâche abandonnée, déjà prise ou remontée dans la file
+                    if travail.abandonne or travail.demarre or priorite != travail.priorite:
+                        continue
+                    travail.demarre = True
+                    self._en_file -= 1
+                    self._en_cours += 1
+                    attente = time.monotonic() - travail.soumis_a
+                    self._demarrees += 1
+                    self._attente_totale += attente
+                    self._attentes.append(attente)
+                    return travail
+                if self._arret:
+                    return None
+                self._travail_disponible.wait()
+
+    def _executer(self):
+        while True:
+            travail = self._prochain_travail()
+            if travail is None:
+                return
+
+            try:
+                resultat, exception = travail.fonction(*travail.args, **travail.kwargs), None
+            except Exception as e:
+                resultat, exception = None, e
+
+            with self._verrou:
+                self._en_cours -= 1
+                self._terminees += 1
+                if exception is not None:
+                    self._echecs += 1
+                if self._par_cle.get(travail.cle) is travail:
+                    del self._par_cle[travail.cle]
+                demandes = list(travail.demandes)
+
+            # Hors verrou : les callbacks des Futures s'exécutent immédiatement
+            for demande in demandes:
+                try:
+                    if exception is not None:
+                        demande.set_exception(exception)
+                    else:
+                        demande.set_result(resultat)
+                except concurrent.futures.InvalidStateError:
+                    # Demande annulée ou échue entre-temps
+                    pass
+
+    def _surveiller_echeances(self):
+        while True:
+            with self._verrou:
+                while not self._arret and (not self._echeances or self._echeances[0][0] > time.monotonic()):
+                    attente = self._echeances[0][0] - time.monotonic() if self._echeances else None
+                    self._echeance_ajoutee.wait(attente)
+                if self._arret:
+                    return
+                maintenant = time.monotonic()
+                echues = []
+                while self._echeances and self._echeances[0][0] <= maintenant:
+                    echues.append(heapq.heappop(self._echeances)[2])
+
+            for demande in echues:
+                try:
+                    demande.set_exception(EcheanceDepassee("Échéance dépassée"))
+                except concurrent.futures.InvalidStateError:
+                    continue
+                with self._verrou:
+                    self._expirees += 1
+
+    def arreter(self):
+        """
+        Arrête les workers une fois la file vidée
+        """
+        with self._verrou:
+            self._arret = True
+            self._travail_disponible.notify_all()
+            self._echeance_ajoutee.notify_all()
+
+    def statistiques(self):
+        """
+        Retourne l'état de la file et les délais d'attente avant exécution
+
+        Returns:
+            dict: Tâches en file et en cours, compteurs des demandes (soumises, regroupées, rejetées,
+            expirées), des tâches (abandonnées, démarrées, terminées, en échec), attente totale en file
+            et percentiles de l'attente (en secondes) sur les dernières tâches démarrées
+        """
+        with self._verrou:
+            attentes = sorted(self._attentes)
+            statistiques = {
+                "en_file": self._en_file,
+                "en_cours": self._en_cours,
+                "capacite": self.taille_max,
+                "workers": self.nb_workers,
+                "soumises": self._soumises,
+                "regroupees": self._regroupees,
+                "rejetees": self._rejetees,
+                "expirees": self._expirees,
+                "abandonnees": self._abandonnees,
+                "terminees": self._terminees,
+                "echecs": self._echecs,
+                "demarrees": self._demarrees,
+                "attente_totale": self._attente_totale,
+            }
+
+        for nom, quantile in (("attente_p50", 0.50), ("attente_p95", 0.95), ("attente_p99", 0.99)):
+            statistiques[nom] = attentes[min(len(attentes) - 1, int(quantile * len(attentes)))] if attentes else 0.0
+        return statistiques
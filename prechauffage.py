@@ -0,0 +1,150 @@
+"""
+Préchauffe les villes les plus demandées : catalogue des sites, coordonnées et matrice des
+distances de chaque ville sont calculés hors ligne et écrits dans un artefact unique, versionné,
+que l'application projette en mémoire au démarrage.
+
+Usage:
+    python prechauffage.py villes.txt --sortie villes_prechauffees.tgv --workers 4
+
+Le fichier des villes contient une ville par ligne (les lignes vides et celles commençant par #
+sont ignorées).
+"""
+import argparse
+import concurrent.futures
+import importlib.util
+import os
+import sys
+import time
+
+import numpy as np
+from tabulate import tabulate
+
+try:
+    from modules.API_Tourist_Sites import RecuperateurSitesTouristiques, OptimiseurItineraire
+    from modules.artefact_villes import ecrire_artefact, ouvrir_artefact
+except ImportError:
+    from artefact_villes import ecrire_artefact, ouvrir_artefact
+
+    # Le module principal a un nom de fichier non importable directement
+    _spec = importlib.util.spec_from_file_location(
+        "API_Tourist_Sites", os.path.join(os.path.dirname(os.path.abspath(__file__)), "API-Tourist-Sites.py")
+    )
+    _module = importlib.util.module_from_spec(_spec)
+    _spec.loader.exec_module(_module)
+    RecuperateurSitesTouristiques = _module.RecuperateurSitesTouristiques
+    OptimiseurItineraire = _module.OptimiseurItineraire
+
+
+def lire_villes(chemin):
+    """
+    Lit la liste des villes à préchauffer, sans doublons
+
+    Args:
+        chemin (str): Fichier texte, une ville par ligne
+
+    Returns:
+        list: Les noms des villes, dans l'ordre du fichier
+    """
+    villes = []
+    vues = set()
+    with open(chemin, "r", encoding="utf-8") as f:
+        for ligne in f:
+            ville = ligne.strip()
+            if not ville or ville.startswith("#") or ville.lower() in vues:
+                continue
+            vues.add(ville.lower())
+            villes.append(ville)
+    return villes
+
+
+def prechauffer_ville(recuperateur, optimiseur, ville):
+    """
+    Calcule le catalogue, les coordonnées et la matrice des distances d'une ville
+
+    Args:
+        recuperateur (RecuperateurSitesTouristiques): Récupérateur des sites
+        optimiseur (OptimiseurItineraire): Optimiseur utilisé pour le géocodage et les distances
+        ville (str): Le nom de la ville
+
+    Returns:
+        dict: "sites", "coordonnees" et "distances" des sites géocodés et le nombre de sites écartés
+        ("non_geocodes"), ou None si aucun site n'a été obtenu ou géocodé
+    """
+    sites = recuperateur.obtenir_catalogue(ville)
+    if not sites:
+        return None
+
+    resultats = optimiseur.geocoder_par_lots([site.get("adresse", "") for site in sites], ville)
+
+    # Seuls les sites géocodés entrent dans l'artefact : une ligne sans coordonnées ni distances
+    # serait retrouvée par son adresse et transmettrait des NaN au solveur
+    geocodes = [i for i, c in enumerate(resultats) if c]
+    if not geocodes:
+        return None
+    non_geocodes = len(sites) - len(geocodes)
+    sites = [sites[i] for i in geocodes]
+    coordonnees = np.array([resultats[i] for i in geocodes], dtype=float).reshape(len(geocodes), 2)
+    distances = optimiseur.calculer_matrice_distances(coordonnees)
+
+    return {"sites": sites, "coordonnees": coordonnees, "distances": distances, "non_geocodes": non_geocodes}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("villes", help="Fichier texte contenant une ville par ligne")
+    parser.add_argument("--sortie", default="villes_prechauffees.tgv", help="Chemin de l'artefact produit")
+    parser.add_argument("--workers", type=int, default=4, help="Nombre de villes traitées simultanément")
+    parser.add_argument("--completer", action="store_true",
+                        help="Conserve les villes de l'artefact existant et ne traite que les nouvelles")
+    args = parser.parse_args()
+
+    villes = lire_villes(args.villes)
+    donnees = {}
+
+    # Reprise d'un artefact existant : les villes déjà présentes ne sont pas recalculées
+    if args.completer:
+        existant = ouvrir_artefact(args.sortie)
+        if existant is not None:
+            for ville in existant.villes():
+                donnees[ville] = {
+                    "sites": existant.sites(ville),
+                    "coordonnees": np.array(existant.coordonnees(ville)),
+                    "distances": np.array(existant.matrice_distances(ville)),
+                }
+            villes = [ville for ville in villes if ville not in existant]
+
+    recuperateur = RecuperateurSitesTouristiques()
+    optimiseur = OptimiseurItineraire(recuperateur)
+
+    # Le débit vers Groq et Nominatim est limité par le nombre de workers et les limites
+    # déjà appliquées par le client HTTP et le géocodage
+    debut = time.perf_counter()
+    lignes = []
+    echecs = []
+    with concurrent.futures.ThreadPoolExecutor(max_workers=args.workers) as executor:
+        futures = {executor.submit(prechauffer_ville, recuperateur, optimiseur, ville): ville for ville in villes}
+        for future in concurrent.futures.as_completed(futures):
+            ville = futures[future]
+            try:
+                resultat = future.result()
+            except Exception as e:
+                print(f"Erreur lors du préchauffage de {ville}: {e}")
+                resultat = None
+            if resultat is None:
+                echecs.append(ville)
+                continue
+            donnees[ville] = resultat
+            lignes.append([ville, len(resultat["sites"]), resultat["non_geocodes"]])
+
+    ecrire_artefact(args.sortie, donnees)
+
+    print(tabulate(sorted(lignes), headers=["Ville", "Sites", "Non géocodés"], tablefmt="github"))
+    print(f"{len(lignes)} ville(s) préchauffée(s) en {time.perf_counter() - debut:.1f}s, "
+          f"{len(donnees)} dans {args.sortie} ({os.path.getsize(args.sortie) / 1024:.0f} Ko)")
+    if echecs:
+        print(f"Échecs: {', '.join(echecs)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -6,147 +6,424 @@ from selenium.webdriver.support import expected_conditions as EC
 from webdriver_manager.chrome import ChromeDriverManager
 from selenium.webdriver.common.keys import Keys
 from fake_useragent import UserAgent
+from contextlib import contextmanager
+import atexit
+import os
+import queue
+import sys
+import threading
 import time
-from selenium.webdriver.common.keys import Keys
 
+try:
+    from modules.metriques import mesurer
+except ImportError:
+    from metriques import mesurer
 
+# Under eventlet the browsers are driven from real OS threads (eventlet.tpool, see SeleniumProvider):
+# the pool's locks and queue must then be the original ones, not the green versions from monkey_patch
+_eventlet_patcher = sys.modules.get("eventlet.patcher")
+if _eventlet_patcher is not None and _eventlet_patcher.is_monkey_patched("thread"):
+    threading = _eventlet_patcher.original("threading")
+    queue = _eventlet_patcher.original("queue")
+
+
+ROME2RIO_URL = os.getenv("ROME2RIO_URL", "https://www.rome2rio.com/fr/")
+RESULT_SELECTOR = "div[data-testid^='trip-search-result-']"
+
+# Pool configuration (overridable through the environment)
+POOL_SIZE = int(os.getenv("SCRAPING_POOL_SIZE", "2"))
+POOL_MAX_USES = int(os.getenv("SCRAPING_POOL_MAX_USES", "25"))
+POOL_CHECKOUT_TIMEOUT = float(os.getenv("SCRAPING_POOL_CHECKOUT_TIMEOUT", "30"))
+
+_driver_path = None
+_driver_path_lock = threading.Lock()
 
-def get_itineraries_for_pair(origin, destination):
-    print(f"Scraping {origin} → {destination}...")
 
+class PoolTimeoutError(TimeoutError):
+    """Raised when no browser becomes available before the checkout timeout."""
+
+
+def get_driver_path():
+    # ChromeDriverManager().install() hits the network: resolve it once per process
+    global _driver_path
+    with _driver_path_lock:
+        if _driver_path is None:
+            _driver_path = ChromeDriverManager().install()
+        return _driver_path
+
+
+def create_driver():
     ua = UserAgent()
     options = webdriver.ChromeOptions()
     options.add_argument("--headless")
     options.add_argument("--lang=fr")
     options.add_argument(f"user-agent={ua.random}")
-    driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
+    return webdriver.Chrome(service=Service(get_driver_path()), options=options)
+
 
+def dismiss_cookies(driver):
+    # Gérer les cookies
     try:
-        # Aller sur la page
-        driver.get("https://www.rome2rio.com/fr/")
-        
-        # Gérer les cookies
+        WebDriverWait(driver, 1).until(
+            EC.element_to_be_clickable((By.XPATH, "//p[contains(text(), 'Autoriser tout')]"))
+        ).click()
+    except:
         try:
             WebDriverWait(driver, 1).until(
-                EC.element_to_be_clickable((By.XPATH, "//p[contains(text(), 'Autoriser tout')]"))
+                EC.element_to_be_clickable((By.XPATH, "//p[contains(text(), 'Gérer vos préférences')]"))
+            ).click()
+            WebDriverWait(driver, 1).until(
+                EC.element_to_be_clickable((By.XPATH, "//p[contains(text(), 'Confirmer les choix')]"))
             ).click()
         except:
-            try:
-                WebDriverWait(driver, 1).until(
-                    EC.element_to_be_clickable((By.XPATH, "//p[contains(text(), 'Gérer vos préférences')]"))
-                ).click()
-                WebDriverWait(driver, 1).until(
-                    EC.element_to_be_clickable((By.XPATH, "//p[contains(text(), 'Confirmer les choix')]"))
-                ).click()
-            except:
-                pass
+            pass
+
+
+class PooledDriver:
+    """A browser owned by a DriverPool, with its usage count."""
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.uses = 0
+        self.cookies_dismissed = False
+
+
+class DriverPool:
+    """
+    Bounded pool of warm headless Chrome drivers.
 
-        # Champ origine
+    At most `size` browsers exist at any time. Drivers are health-checked on
+    checkout, recycled after `max_uses` searches, and replaced when a search
+    crashes them. Callers wait up to `checkout_timeout` seconds for a driver.
+    """
+
+    def __init__(self, size=POOL_SIZE, max_uses=POOL_MAX_USES, checkout_timeout=POOL_CHECKOUT_TIMEOUT,
+                 driver_factory=create_driver):
+        self.size = size
+        self.max_uses = max_uses
+        self.checkout_timeout = checkout_timeout
+        self.driver_factory = driver_factory
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._closed = False
+
+    def prewarm(self, count=None):
+        # Launch browsers ahead of time so the first searches do not pay for startup
+        count = self.size if count is None else min(count, self.size)
+        entries = []
         try:
-            origin_input = WebDriverWait(driver, 10).until(
-                EC.presence_of_element_located((By.ID, "place-autocomplete-origin"))
-            )
-            origin_input.clear()
-            time.sleep(1)
-            origin_input.send_keys(origin)
-            time.sleep(1)  # let suggestions load
-            origin_input.send_keys(Keys.ARROW_DOWN)
-            origin_input.send_keys(Keys.ENTER)
-            time.sleep(1)
-            print("Origine renseignée.")
+            for _ in range(count):
+                entries.append(self.acquire(timeout=0))
+        except PoolTimeoutError:
+            pass
+        finally:
+            for entry in entries:
+                self.release(entry)
 
+    def _new_entry(self):
+        entry = PooledDriver(self.driver_factory())
+        try:
+            entry.driver.get(ROME2RIO_URL)
+            dismiss_cookies(entry.driver)
+            entry.cookies_dismissed = True
         except Exception as e:
-            print("Erreur sur le champ origine :", e)
-            driver.save_screenshot("origin_input_error.png")
-            return [f"Erreur de saisie de l'origine : {origin}"]
+            print("Erreur lors du préchargement du navigateur :", e)
+        return entry
 
-        # Champ destination
+    def _is_healthy(self, entry):
         try:
-            destination_input = WebDriverWait(driver, 10).until(
-                EC.presence_of_element_located((By.ID, "place-autocomplete-destination"))
-            )
-            destination_input.clear()
-            time.sleep(1)
-            destination_input.send_keys(destination)
-            time.sleep(1)
-            destination_input.send_keys(Keys.ARROW_DOWN)
-            destination_input.send_keys(Keys.ENTER)
-            time.sleep(1)
-            print("Destination sélectionnée via autocomplete.")
+            entry.driver.execute_script("return 1")
+            return True
+        except Exception:
+            return False
 
-        except Exception as e:
-            print("Erreur sur le champ destination :", e)
-            driver.save_screenshot("destination_input_error.png")
-            return [f"Erreur de saisie de la destination : {destination}"]
+    def _discard(self, entry):
+        try:
+            entry.driver.quit()
+        except Exception:
+            pass
 
-        checkbox = WebDriverWait(driver, 10).until(
-            EC.presence_of_element_located((By.ID, "s0-1-0-0-17-10-0-5-7-search-partners"))
-        )
+    def acquire(self, timeout=None):
+        if self._closed:
+            raise RuntimeError("DriverPool is closed")
 
-        # Scroll into view and ensure it's interactable
-        driver.execute_script("arguments[0].scrollIntoView(true);", checkbox)
-        time.sleep(0.3)
+        timeout = self.checkout_timeout if timeout is None else timeout
+        acquired = self._slots.acquire(timeout=timeout) if timeout > 0 else self._slots.acquire(blocking=False)
+        if not acquired:
+            raise PoolTimeoutError(f"No browser available after {timeout}s")
 
-        if checkbox.is_selected():
+        try:
+            # Reuse a warm driver if one passes the health check
+            while True:
+                try:
+                    entry = self._idle.get_nowait()
+                except queue.Empty:
+                    return self._new_entry()
+                if self._is_healthy(entry):
+                    return entry
+                self._discard(entry)
+        except Exception:
+            self._slots.release()
+            raise
+
+    def release(self, entry, broken=False):
+        try:
+            entry.uses += 1
+            if broken or self._closed or entry.uses >= self.max_uses:
+                self._discard(entry)
+            else:
+                self._idle.put(entry)
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def driver(self, timeout=None):
+        entry = self.acquire(timeout)
+        broken = False
+        try:
+            yield entry
+        except Exception:
+            broken = not self._is_healthy(entry)
+            raise
+        finally:
+            self.release(entry, broken=broken)
+
+    def close(self):
+        self._closed = True
+        while True:
             try:
-                checkbox.click()
-            except:
-                # If intercepted, force click using JS
-                driver.execute_script("arguments[0].click();", checkbox)
-
-        # --- Click search button ---
-        search_button = WebDriverWait(driver, 15).until(
-            EC.element_to_be_clickable(
-                (By.CSS_SELECTOR, "a.flex.h-11.items-center.justify-center.rounded-lg.bg-rome2rio-pink"))
+                self._discard(self._idle.get_nowait())
+            except queue.Empty:
+                break
+
+
+_default_pool = None
+_default_pool_lock = threading.Lock()
+
+
+def get_default_pool():
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is None:
+            _default_pool = DriverPool()
+            atexit.register(_default_pool.close)
+        return _default_pool
+
+
+def submit_search(entry, origin, destination):
+    # Fill in the rome2rio form and launch the search; returns an error list on failure
+    driver = entry.driver
+
+    # Aller sur la page
+    driver.get(ROME2RIO_URL)
+    if not entry.cookies_dismissed:
+        dismiss_cookies(driver)
+        entry.cookies_dismissed = True
+
+    # Champ origine
+    try:
+        origin_input = WebDriverWait(driver, 10).until(
+            EC.presence_of_element_located((By.ID, "place-autocomplete-origin"))
+        )
+        origin_input.clear()
+        time.sleep(1)
+        origin_input.send_keys(origin)
+        time.sleep(1)  # let suggestions load
+        origin_input.send_keys(Keys.ARROW_DOWN)
+        origin_input.send_keys(Keys.ENTER)
+        time.sleep(1)
+        print("Origine renseignée.")
+
+    except Exception as e:
+        print("Erreur sur le champ origine :", e)
+        driver.save_screenshot("origin_input_error.png")
+        return [f"Erreur de saisie de l'origine : {origin}"]
+
+    # Champ destination
+    try:
+        destination_input = WebDriverWait(driver, 10).until(
+            EC.presence_of_element_located((By.ID, "place-autocomplete-destination"))
         )
-        search_button.click()
+        destination_input.clear()
+        time.sleep(1)
+        destination_input.send_keys(destination)
+        time.sleep(1)
+        destination_input.send_keys(Keys.ARROW_DOWN)
+        destination_input.send_keys(Keys.ENTER)
+        time.sleep(1)
+        print("Destination sélectionnée via autocomplete.")
 
-        # ⏳ Attente des résultats
+    except Exception as e:
+        print("Erreur sur le champ destination :", e)
+        driver.save_screenshot("destination_input_error.png")
+        return [f"Erreur de saisie de la destination : {destination}"]
+
+    checkbox = WebDriverWait(driver, 10).until(
+        EC.presence_of_element_located((By.ID, "s0-1-0-0-17-10-0-5-7-search-partners"))
+    )
+
+    # Scroll into view and ensure it's interactable
+    driver.execute_script("arguments[0].scrollIntoView(true);", checkbox)
+    time.sleep(0.3)
+
+    if checkbox.is_selected():
         try:
-            WebDriverWait(driver, 10).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, "div[data-testid^='trip-search-result-']"))
-            )
-        except Exception as e:
-            driver.save_screenshot("error_screenshot.png")
-            print(f"Erreur de chargement des résultats: {e}")
-            return [f"Échec du chargement pour {origin} → {destination}"]
+            checkbox.click()
+        except:
+            # If intercepted, force click using JS
+            driver.execute_script("arguments[0].click();", checkbox)
 
-        # ⬇️ Charger plus de résultats si possible
+    # --- Click search button ---
+    search_button = WebDriverWait(driver, 15).until(
+        EC.element_to_be_clickable(
+            (By.CSS_SELECTOR, "a.flex.h-11.items-center.justify-center.rounded-lg.bg-rome2rio-pink"))
+    )
+    search_button.click()
+    return None
+
+
+def extract_itineraries(driver, origin, destination):
+    # ⬇️ Charger plus de résultats si possible
+    try:
+        load_more_button = WebDriverWait(driver, 2).until(
+            EC.element_to_be_clickable((By.CSS_SELECTOR, "button[data-testid='show-more-0']"))
+        )
+        load_more_button.click()
+    except:
+        pass
+
+    # 📋 Extraction des itinéraires
+    itinerary_details = []
+    itinerary_items = driver.find_elements(By.CSS_SELECTOR, RESULT_SELECTOR)
+
+    for item in itinerary_items:
         try:
-            load_more_button = WebDriverWait(driver, 2).until(
-                EC.element_to_be_clickable((By.CSS_SELECTOR, "button[data-testid='show-more-0']"))
-            )
-            load_more_button.click()
+            vehicle = item.find_element(By.XPATH, ".//h1[contains(@class, 'sc')]").text
+            distance = item.find_element(By.CSS_SELECTOR, "time").text
+            price = item.find_element(By.XPATH, ".//span[contains(text(), '€')]").text
+
+            itinerary_details.append({
+                'vehicle': vehicle,
+                'distance': distance,
+                'price': price,
+                'adresse_origine': origin,
+                'adresse_destination': destination
+            })
         except:
-            pass
+            continue
+
+    itineraries = []
+    for i in itinerary_details:
+        itineraries.append(
+            f"Adresse: {i['adresse_origine']} → {i['adresse_destination']} | Moyen: {i['vehicle']} | Temps: {i['distance']} | Prix: {i['price']}"
+        )
 
-        # 📋 Extraction des itinéraires
-        itinerary_details = []
-        itinerary_items = driver.find_elements(By.CSS_SELECTOR, "div[data-testid^='trip-search-result-']")
+    return itineraries
 
-        for item in itinerary_items:
+
+def search_itineraries(entry, origin, destination):
+    error = submit_search(entry, origin, destination)
+    if error:
+        return error
+
+    # ⏳ Attente des résultats
+    driver = entry.driver
+    try:
+        WebDriverWait(driver, 10).until(
+            EC.presence_of_element_located((By.CSS_SELECTOR, RESULT_SELECTOR))
+        )
+    except Exception as e:
+        driver.save_screenshot("error_screenshot.png")
+        print(f"Erreur de chargement des résultats: {e}")
+        return [f"Échec du chargement pour {origin} → {destination}"]
+
+    return extract_itineraries(driver, origin, destination)
+
+
+@mesurer("get_itineraries_for_pair")
+def get_itineraries_for_pair(origin, destination, pool=None):
+    print(f"Scraping {origin} → {destination}...")
+
+    # Borrow a warm browser instead of launching a new one for every leg
+    pool = pool or get_default_pool()
+    with pool.driver() as entry:
+        return search_itineraries(entry, origin, destination)
+
+
+def get_itineraries_for_route(points, pool=None, max_tabs=4, timeout=20):
+    """
+    Resolve every leg of a route in a single browser session.
+
+    Searches are launched in up to `max_tabs` tabs of one pooled browser, so
+    rome2rio computes several legs at the same time. Results are yielded as
+    `(leg_index, itineraries)` tuples as soon as each leg finishes, which is
+    not necessarily in route order.
+    """
+    yield from get_itineraries_for_legs(list(zip(points, points[1:])), pool=pool, max_tabs=max_tabs, timeout=timeout)
+
+
+def get_itineraries_for_legs(pairs, pool=None, max_tabs=4, timeout=20):
+    """
+    Resolve independent `(origin, destination)` pairs in a single browser session,
+    yielding `(pair_index, itineraries)` as each one finishes (see get_itineraries_for_route).
+    """
+    legs = [(i, origin, destination) for i, (origin, destination) in enumerate(pairs)]
+    if not legs:
+        return
+
+    print(f"Scraping route with {len(legs)} legs...")
+    pool = pool or get_default_pool()
+    with pool.driver() as entry:
+        driver = entry.driver
+        main_handle = driver.current_window_handle
+        pending = {}
+
+        try:
+            while legs or pending:
+                # Open a tab and launch a search for each waiting leg
+                while legs and len(pending) < max_tabs:
+                    index, origin, destination = legs.pop(0)
+                    driver.switch_to.new_window('tab')
+                    handle = driver.current_window_handle
+                    try:
+                        error = submit_search(entry, origin, destination)
+                    except Exception as e:
+                        print(f"Erreur lors de la recherche {origin} → {destination} :", e)
+                        error = [f"Échec du chargement pour {origin} → {destination}"]
+                    if error:
+                        driver.close()
+                        driver.switch_to.window(main_handle)
+                        yield index, error
+                        continue
+                    pending[handle] = (index, origin, destination, time.monotonic() + timeout)
+
+                # Collect the tabs whose results have loaded (or timed out)
+                for handle, (index, origin, destination, deadline) in list(pending.items()):
+                    driver.switch_to.window(handle)
+                    if driver.find_elements(By.CSS_SELECTOR, RESULT_SELECTOR):
+                        itineraries = extract_itineraries(driver, origin, destination)
+                    elif time.monotonic() > deadline:
+                        print(f"Erreur de chargement des résultats: délai dépassé pour {origin} → {destination}")
+                        itineraries = [f"Échec du chargement pour {origin} → {destination}"]
+                    else:
+                        continue
+
+                    driver.close()
+                    del pending[handle]
+                    driver.switch_to.window(main_handle)
+                    yield index, itineraries
+
+                if pending:
+                    time.sleep(0.2)
+        finally:
+            # Close the tabs left open if the caller stopped early
+            for handle in pending:
+                try:
+                    driver.switch_to.window(handle)
+                    driver.close()
+                except Exception:
+                    pass
             try:
-                vehicle = item.find_element(By.XPATH, ".//h1[contains(@class, 'sc')]").text
-                distance = item.find_element(By.CSS_SELECTOR, "time").text
-                price = item.find_element(By.XPATH, ".//span[contains(text(), '€')]").text
-
-                itinerary_details.append({
-                    'vehicle': vehicle,
-                    'distance': distance,
-                    'price': price,
-                    'adresse_origine': origin,
-                    'adresse_destination': destination
-                })
-            except:
-                continue
-
-        itineraries = []
-        for i in itinerary_details:
-            itineraries.append(
-                f"Adresse: {i['adresse_origine']} → {i['adresse_destination']} | Moyen: {i['vehicle']} | Temps: {i['distance']} | Prix: {i['price']}"
-            )
-
-        return itineraries
-
-    finally:
-        driver.quit()
+                driver.switch_to.window(main_handle)
+            except Exception:
+                pass
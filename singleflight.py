@@ -0,0 +1,82 @@
+import threading
+
+
+class _AppelEnCours:
+    """
+    Appel en cours d'exécution pour une clé, partagé par tous les demandeurs
+    """
+
+    def __init__(self):
+        self.evenement = threading.Event()
+        self.resultat = None
+        self.exception = None
+
+
+class SingleFlight:
+    """
+    Regroupe les appels concurrents portant sur la même clé : un seul appel est exécuté
+    et tous les demandeurs reçoivent son résultat (ou son exception).
+    """
+
+    def __init__(self):
+        self._verrou = threading.Lock()
+        self._en_cours = {}
+        self.appels = 0
+        self.executions = 0
+        self.doublons_evites = 0
+
+    def executer(self, cle, fonction, *args, **kwargs):
+        """
+        Exécute fonction(*args, **kwargs), sauf si un appel pour la même clé est déjà en cours
+
+        Args:
+            cle (str): La clé identifiant la requête
+            fonction (callable): La fonction à exécuter
+            *args: Arguments positionnels de la fonction
+            **kwargs: Arguments nommés de la fonction
+
+        Returns:
+            Le résultat de l'appel partagé
+        """
+        with self._verrou:
+            self.appels += 1
+            appel = self._en_cours.get(cle)
+            meneur = appel is None
+            if meneur:
+                appel = _AppelEnCours()
+                self._en_cours[cle] = appel
+                self.executions += 1
+            else:
+                self.doublons_evites += 1
+
+        if not meneur:
+            appel.evenement.wait()
+            if appel.exception is not None:
+                raise appel.exception
+            return appel.resultat
+
+        try:
+            appel.resultat = fonction(*args, **kwargs)
+            return appel.resultat
+        except BaseException as e:
+            appel.exception = e
+            raise
+        finally:
+            with self._verrou:
+                del self._en_cours[cle]
+            appel.evenement.set()
+
+    def statistiques(self):
+        """
+        Retourne les compteurs du regroupement d'appels
+
+        Returns:
+            dict: Nombre d'appels, d'exécutions réelles, de doublons évités et d'appels en cours
+        """
+        with self._verrou:
+            return {
+                "appels": self.appels,
+                "executions": self.executions,
+                "doublons_evites": self.doublons_evites,
+                "en_cours": len(self._en_cours),
+            }
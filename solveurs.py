@@ -0,0 +1,281 @@
+import time
+
+import numpy as np
+
+# Au-delà de cette taille, Held-Karp (O(n² 2ⁿ)) devient trop coûteux
+TAILLE_MAX_HELD_KARP = 12
+
+
+def longueur_parcours(ordre, matrice):
+    """
+    Calcule la longueur d'un parcours ouvert (sans retour au point de départ)
+
+    Args:
+        ordre (list): Indices des sites dans l'ordre de visite
+        matrice (numpy.ndarray): Matrice des distances
+
+    Returns:
+        float: Longueur totale en kilomètres
+    """
+    if len(ordre) < 2:
+        return 0.0
+    indices = np.asarray(ordre)
+    return float(matrice[indices[:-1], indices[1:]].sum())
+
+
+def tour_glouton(matrice, depart=0):
+    """
+    Construit un parcours en allant toujours vers le site non visité le plus proche
+
+    Args:
+        matrice (numpy.ndarray): Matrice des distances
+        depart (int): Indice du site de départ
+
+    Returns:
+        list: Indices des sites dans l'ordre de visite
+    """
+    n = len(matrice)
+    ordre = [depart]
+    visites = np.zeros(n, dtype=bool)
+    visites[depart] = True
+
+    while len(ordre) < n:
+        distances = np.where(visites, np.inf, matrice[ordre[-1]])
+        suivant = int(np.argmin(distances))
+        ordre.append(suivant)
+        visites[suivant] = True
+
+    return ordre
+
+
+def tour_held_karp(matrice, depart=0):
+    """
+    Calcule le parcours ouvert optimal partant de depart par programmation dynamique (Held-Karp)
+
+    Args:
+        matrice (numpy.ndarray): Matrice des distances
+        depart (int): Indice du site de départ
+
+    Returns:
+        list: Indices des sites dans l'ordre de visite
+    """
+    n = len(matrice)
+    if n <= 2:
+        return [depart] + [i for i in range(n) if i != depart]
+
+    # Les sites autres que le départ sont renumérotés de 0 à m-1
+    autres = [i for i in range(n) if i != depart]
+    m = len(autres)
+    sous_matrice = matrice[np.ix_(autres, autres)]
+    depuis_depart = matrice[depart, autres]
+
+    # couts[masque, j]: meilleur chemin partant du départ, visitant masque et finissant en j
+    couts = np.full((1 << m, m), np.inf)
+    precedents = np.full((1 << m, m), -1, dtype=np.int64)
+    for j in range(m):
+        couts[1 << j, j] = depuis_depart[j]
+
+    for masque in range(1, 1 << m):
+        if masque & (masque - 1) == 0:
+            continue
+        for j in range(m):
+            bit = 1 << j
+            if not masque & bit:
+                continue
+            candidats = couts[masque ^ bit] + sous_matrice[:, j]
+            k = int(np.argmin(candidats))
+            couts[masque, j] = candidats[k]
+            precedents[masque, j] = k
+
+    # Reconstruction du chemin à partir de la meilleure extrémité
+    masque = (1 << m) - 1
+    j = int(np.argmin(couts[masque]))
+    chemin = []
+    while j != -1:
+        chemin.append(j)
+        k = int(precedents[masque, j])
+        masque ^= 1 << j
+        j = k
+
+    return [depart] + [autres[j] for j in reversed(chemin)]
+
+
+def ameliorer_2opt(ordre, matrice, limite_temps=1.0):
+    """
+    Améliore un parcours ouvert par inversions de segments (2-opt), le premier site restant fixe
+
+    Args:
+        ordre (list): Indices des sites dans l'ordre de visite
+        matrice (numpy.ndarray): Matrice des distances
+        limite_temps (float): Temps de calcul maximal en secondes
+
+    Returns:
+        list: Le parcours amélioré
+    """
+    ordre = list(ordre)
+    n = len(ordre)
+    if n < 3:
+        return ordre
+
+    fin = time.perf_counter() + limite_temps
+    ameliore = True
+    while ameliore and time.perf_counter() < fin:
+        ameliore = False
+        for i in range(1, n - 1):
+            tableau = np.asarray(ordre)
+            a, b = tableau[i - 1], tableau[i]
+
+            # Inversion de ordre[i:j+1] pour tous les j > i en une opération vectorisée
+            c = tableau[i + 1:]
+            d = np.append(tableau[i + 2:], -1)
+            gain = matrice[a, b] - matrice[a, c]
+            interieur = d >= 0
+            gain[interieur] += matrice[c[interieur], d[interieur]] - matrice[b, d[interieur]]
+
+            meilleur = int(np.argmax(gain))
+            if gain[meilleur] > 1e-9:
+                j = i + 1 + meilleur
+                ordre[i:j + 1] = reversed(ordre[i:j + 1])
+                ameliore = True
+            if time.perf_counter() >= fin:
+                break
+
+    return ordre
+
+
+def ameliorer_or_opt(ordre, matrice, limite_temps=1.0, longueur_max_segment=3):
+    """
+    Améliore un parcours ouvert en déplaçant des segments de 1 à 3 sites (Or-opt), le premier site restant fixe
+
+    Args:
+        ordre (list): Indices des sites dans l'ordre de visite
+        matrice (numpy.ndarray): Matrice des distances
+        limite_temps (float): Temps de calcul maximal en secondes
+        longueur_max_segment (int): Longueur maximale des segments déplacés
+
+    Returns:
+        list: Le parcours amélioré
+    """
+    ordre = list(ordre)
+    n = len(ordre)
+    if n < 3:
+        return ordre
+
+    fin = time.perf_counter() + limite_temps
+    ameliore = True
+    while ameliore and time.perf_counter() < fin:
+        ameliore = False
+        for taille in range(1, min(longueur_max_segment, n - 1) + 1):
+            for i in range(1, n - taille + 1):
+                precedent, premier, dernier = ordre[i - 1], ordre[i], ordre[i + taille - 1]
+                suivant = ordre[i + taille] if i + taille < n else None
+
+                # Gain obtenu en retirant le segment ordre[i:i+taille]
+                retrait = matrice[precedent, premier]
+                if suivant is not None:
+                    retrait += matrice[dernier, suivant] - matrice[precedent, suivant]
+
+                # Coût d'insertion après chaque site restant, dans les deux sens
+                reste = ordre[:i] + ordre[i + taille:]
+                avant = np.asarray(reste)
+                apres = np.append(avant[1:], -1)
+                interieur = apres >= 0
+
+                meilleur = None
+                for debut, extremite in ((premier, dernier), (dernier, premier)):
+                    ajout = matrice[avant, debut].copy()
+                    ajout[interieur] += matrice[extremite, apres[interieur]] - matrice[avant[interieur], apres[interieur]]
+                    if debut == premier:
+                        ajout[i - 1] = np.inf
+                    position = int(np.argmin(ajout))
+                    if ajout[position] - retrait < -1e-9 and (meilleur is None or ajout[position] < meilleur[0]):
+                        meilleur = (ajout[position], position, debut == premier)
+
+                if meilleur:
+                    _, position, meme_sens = meilleur
+                    segment = ordre[i:i + taille]
+                    if not meme_sens:
+                        segment.reverse()
+                    ordre = reste[:position + 1] + segment + reste[position + 1:]
+                    ameliore = True
+
+                if time.perf_counter() >= fin:
+                    return ordre
+
+    return ordre
+
+
+def tour_recherche_locale(matrice, depart=0, limite_temps=1.0):
+    """
+    Construit un parcours glouton puis l'améliore par 2-opt et Or-opt dans le temps imparti
+
+    Args:
+        matrice (numpy.ndarray): Matrice des distances
+        depart (int): Indice du site de départ
+        limite_temps (float): Temps de calcul maximal en secondes
+
+    Returns:
+        list: Indices des sites dans l'ordre de visite
+    """
+    fin = time.perf_counter() + limite_temps
+    ordre = tour_glouton(matrice, depart)
+    longueur = longueur_parcours(ordre, matrice)
+
+    # Alterne les deux voisinages tant qu'ils améliorent le parcours
+    while time.perf_counter() < fin:
+        ordre = ameliorer_2opt(ordre, matrice, fin - time.perf_counter())
+        ordre = ameliorer_or_opt(ordre, matrice, max(0.0, fin - time.perf_counter()))
+        nouvelle_longueur = longueur_parcours(ordre, matrice)
+        if nouvelle_longueur >= longueur - 1e-9:
+            break
+        longueur = nouvelle_longueur
+
+    return ordre
+
+
+def tour_auto(matrice, depart=0, limite_temps=1.0):
+    """
+    Choisit Held-Karp pour les petits parcours et la recherche locale au-delà
+
+    Args:
+        matrice (numpy.ndarray): Matrice des distances
+        depart (int): Indice du site de départ
+        limite_temps (float): Temps de calcul maximal en secondes (recherche locale)
+
+    Returns:
+        list: Indices des sites dans l'ordre de visite
+    """
+    if len(matrice) <= TAILLE_MAX_HELD_KARP:
+        return tour_held_karp(matrice, depart)
+    return tour_recherche_locale(matrice, depart, limite_temps)
+
+
+# Solveurs disponibles, sélectionnables par leur nom
+SOLVEURS = {
+    "glouton": lambda matrice, depart, limite_temps: tour_glouton(matrice, depart),
+    "held_karp": lambda matrice, depart, limite_temps: tour_held_karp(matrice, depart),
+    "recherche_locale": tour_recherche_locale,
+    "auto": tour_auto,
+}
+
+
+def resoudre(matrice, depart=0, solveur="auto", limite_temps=1.0):
+    """
+    Calcule l'ordre de visite des sites avec le solveur demandé
+
+    Args:
+        matrice (numpy.ndarray): Matrice des distances
+        depart (int): Indice du site de départ (toujours visité en premier)
+        solveur (str): Nom du solveur (voir SOLVEURS)
+        limite_temps (float): Temps de calcul maximal en secondes
+
+    Returns:
+        list: Indices des sites dans l'ordre de visite
+    """
+    if len(matrice) == 0:
+        return []
+    if solveur not in SOLVEURS:
+        raise ValueError(f"Solveur inconnu: {solveur}. Solveurs disponibles: {', '.join(SOLVEURS)}")
+    if solveur == "held_karp" and len(matrice) > TAILLE_MAX_HELD_KARP:
+        raise ValueError(f"Held-Karp est limité à {TAILLE_MAX_HELD_KARP} sites")
+    return SOLVEURS[solveur](matrice, depart, limite_temps)
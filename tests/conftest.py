@@ -0,0 +1,40 @@
+import importlib.util
+import os
+import sys
+
+import pytest
+
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RACINE)
+
+
+@pytest.fixture(scope="session")
+def api_sites():
+    """
+    Le module principal, dont le nom de fichier n'est pas importable directement
+    """
+    spec = importlib.util.spec_from_file_location("API_Tourist_Sites", os.path.join(RACINE, "API-Tourist-Sites.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture(scope="session")
+def application(tmp_path_factory):
+    """
+    Le module app, importé depuis une arborescence d'installation (modules/, templates/, static/)
+    construite comme pour les tests de charge, dans un dossier de travail temporaire
+    """
+    sys.path.insert(0, os.path.join(RACINE, "benchmarks"))
+    from bench_charge import preparer_installation
+
+    dossier = str(tmp_path_factory.mktemp("installation") / "tourguide")
+    preparer_installation(dossier)
+    repertoire = os.getcwd()
+    os.chdir(dossier)
+    sys.path.insert(0, dossier)
+    try:
+        import app
+        yield app
+    finally:
+        os.chdir(repertoire)
@@ -0,0 +1,72 @@
+import json
+
+import pytest
+
+from analyse_json import AnalyseurTableauJSON, extraire_sites, valider_site
+
+SITES = [
+    {"nom": "Louvre", "adresse": "Rue de Rivoli", "description": "Musée [1793]", "categorie": "Musée"},
+    {"nom": "Tour \"Eiffel\"", "adresse": "Champ de Mars, 5 Av. Anatole France", "categorie": "Monument"},
+    {"nom": "Sainte-Chapelle", "adresse": "10 Bd du Palais", "tags": ["gothique", {"siecle": 13}]},
+]
+
+
+def test_reponse_complete_en_prose():
+    contenu = ("Voici les sites demandés [liste non exhaustive] :\n```json\n"
+               + json.dumps(SITES, ensure_ascii=False, indent=2) + "\n```\nBonne visite !")
+
+    sites, complet = extraire_sites(contenu)
+
+    assert complet
+    assert [site["nom"] for site in sites] == ["Louvre", 'Tour "Eiffel"', "Sainte-Chapelle"]
+    assert sites[1]["description"] == ""
+    assert sites[2]["categorie"] == "Autre"
+    assert sites[2]["tags"] == ["gothique", {"siecle": 13}]
+
+
+def test_reponse_tronquee():
+    texte = json.dumps(SITES, ensure_ascii=False)
+    # Coupée au milieu du troisième objet, comme quand la limite de jetons est atteinte
+    contenu = texte[:texte.index("Sainte-Chapelle") + 5]
+
+    sites, complet = extraire_sites(contenu)
+
+    assert not complet
+    assert [site["nom"] for site in sites] == ["Louvre", 'Tour "Eiffel"']
+
+
+def test_limite():
+    sites, complet = extraire_sites(json.dumps(SITES), limite=2)
+
+    assert complet
+    assert len(sites) == 2
+
+
+def test_objets_invalides_ignores():
+    contenu = '[{"nom": "Sans adresse"}, {"nom": "  ", "adresse": "x"}, {"nom": " Panthéon ", "adresse": "Place"}]'
+
+    sites, complet = extraire_sites(contenu)
+
+    assert complet
+    assert sites == [{"nom": "Panthéon", "adresse": "Place", "description": "", "categorie": "Autre"}]
+
+
+@pytest.mark.parametrize("contenu", ["", None, "Désolé, je ne connais pas cette ville.", "[]", "[1, 2, 3]"])
+def test_aucun_site(contenu):
+    assert extraire_sites(contenu) == ([], False)
+
+
+@pytest.mark.parametrize("taille", [1, 3, 17])
+def test_analyse_par_fragments(taille):
+    texte = "Réponse : " + json.dumps(SITES, ensure_ascii=False) + " fin"
+    analyseur = AnalyseurTableauJSON()
+    objets = []
+    for debut in range(0, len(texte), taille):
+        objets.extend(analyseur.alimenter(texte[debut:debut + taille]))
+
+    assert objets == SITES
+    assert analyseur.termine
+
+
+def test_valider_site_refuse_non_dict():
+    assert valider_site(["Louvre", "Rue de Rivoli"]) is None
@@ -0,0 +1,167 @@
+import threading
+import time
+
+import pytest
+
+
+class ProviderBouchon:
+    """
+    Fournisseur de transport factice : compte les recherches par trajet et peut les faire attendre
+    """
+
+    name = "bouchon"
+
+    def __init__(self, duree=0.0, vides=()):
+        self.duree = duree
+        self.vides = set(vides)
+        self.appels = {}
+        self.liberer = threading.Event()
+        self.liberer.set()
+        self.verrou = threading.Lock()
+
+    def get_itineraries(self, origin, destination):
+        with self.verrou:
+            self.appels[(origin, destination)] = self.appels.get((origin, destination), 0) + 1
+        self.liberer.wait(5)
+        time.sleep(self.duree)
+        if origin in self.vides:
+            return []
+        return [{"name": f"Bus {origin}-{destination}", "minutes": 12, "price": 2.0, "price_max": None,
+                 "currency": "EUR", "estimated": False}]
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def provider(application, monkeypatch):
+    provider = ProviderBouchon()
+    monkeypatch.setattr(application, "transport_provider", provider)
+    application.transport_cache.vider()
+    yield provider
+    provider.liberer.set()
+
+
+def client(application):
+    return application.socketio.test_client(application.app)
+
+
+def evenements(clients, nom, nombre, delai=5):
+    """
+    Attend nombre événements nom pour chaque client et les retourne, client par client
+    """
+    recus = [[] for _ in clients]
+    limite = time.monotonic() + delai
+    while time.monotonic() < limite and any(len(r) < nombre for r in recus):
+        for c, r in zip(clients, recus):
+            r.extend(message["args"][0] for message in c.get_received() if message["name"] == nom)
+        time.sleep(0.01)
+    return recus
+
+
+def legs(*trajets):
+    return [{"origin": o, "destination": d, "step_id": i + 1,
+             "origin_coordinates": [48.86, 2.33], "destination_coordinates": [48.85, 2.35]}
+            for i, (o, d) in enumerate(trajets)]
+
+
+def test_batch_regroupe_les_trajets_entre_sessions(application, provider):
+    provider.liberer.clear()
+    trajets = [("A", "B"), ("B", "C"), ("C", "D")]
+    premier, second = client(application), client(application)
+
+    premier.emit("request_transport_batch", {"legs": legs(*trajets), "city": "Paris"})
+    second.emit("request_transport_batch", {"legs": legs(*trajets), "city": "Paris"})
+    provider.liberer.set()
+    recus = evenements([premier, second], "transport_leg_result", 3)
+
+    for resultats in recus:
+        assert sorted(r["step_id"] for r in resultats) == [1, 2, 3]
+        assert not any(r.get("fallback") for r in resultats)
+    # Chaque trajet n'a été recherché qu'une fois pour les deux sessions
+    assert provider.appels == {trajet: 1 for trajet in trajets}
+
+    # Les trajets sont désormais en cache : réponse immédiate dans transport_batch_result
+    troisieme = client(application)
+    troisieme.emit("request_transport_batch", {"legs": legs(*trajets), "city": "Paris"})
+    [reponse] = evenements([troisieme], "transport_batch_result", 1)[0]
+    assert reponse["pending"] == []
+    assert [r["options"][0]["name"] for r in reponse["results"]] == ["Bus A-B", "Bus B-C", "Bus C-D"]
+    assert provider.appels == {trajet: 1 for trajet in trajets}
+
+
+def test_batch_echeance_proportionnelle_au_nombre_de_trajets(application, provider, monkeypatch):
+    # Chaque recherche dure plus que la moitié de l'échéance : sans échelonnement, les trajets
+    # servis après la première vague de workers recevraient les estimations
+    provider.duree = 0.15
+    monkeypatch.setattr(application, "TRANSPORT_TIMEOUT", 0.25)
+    trajets = [(f"O{i}", f"D{i}") for i in range(3 * application.TRANSPORT_WORKERS)]
+    c = client(application)
+
+    c.emit("request_transport_batch", {"legs": legs(*trajets)})
+    [resultats] = evenements([c], "transport_leg_result", len(trajets))
+
+    assert len(resultats) == len(trajets)
+    assert not any(r.get("fallback") for r in resultats)
+
+
+CHAMPS_OPTION = {"name", "minutes", "price", "price_max", "currency", "estimated"}
+
+
+def test_options_structurees(application, provider):
+    provider.vides = {"Vide"}
+    c = client(application)
+
+    c.emit("request_transport_batch", {"legs": legs(("Louvre", "Orsay"), ("Vide", "Orsay")), "city": "Paris"})
+    resultats = {r["step_id"]: r for r in evenements([c], "transport_leg_result", 2)[0]}
+
+    trouve, estime = resultats[1], resultats[2]
+    assert trouve["options"] == [{"name": "Bus Louvre-Orsay", "minutes": 12, "price": 2.0, "price_max": None,
+                                  "currency": "EUR", "estimated": False}]
+    assert not trouve.get("fallback")
+    # Trajet sans option : estimations calculées d'après les coordonnées, au même format
+    assert estime["fallback"]
+    assert estime["options"]
+    for option in estime["options"]:
+        assert set(option) == CHAMPS_OPTION
+        assert option["estimated"]
+        assert isinstance(option["minutes"], int) and isinstance(option["price"], float)
+
+
+def test_repli_apres_echeance(application, provider, monkeypatch):
+    provider.duree = 0.5
+    monkeypatch.setattr(application, "TRANSPORT_TIMEOUT", 0.1)
+    c = client(application)
+
+    c.emit("request_transport_batch", {"legs": legs(("Lent", "Orsay")), "city": "Paris"})
+    [[resultat]] = evenements([c], "transport_leg_result", 1)
+    assert resultat["fallback"] and resultat["step_id"] == 1
+    assert all(option["estimated"] for option in resultat["options"])
+
+    # Ancien événement : mêmes estimations, sous forme de lignes "Adresse: … | Moyen: …"
+    c.emit("request_transport", {"origin": "Lent", "destination": "Musée", "step_id": 4})
+    [[resultat]] = evenements([c], "transport_result", 1)
+    assert resultat["fallback"] and resultat["step_id"] == 4
+    assert [ligne.split(" | ")[1] for ligne in resultat["options"]] == ["Moyen: Marche à pied", "Moyen: Taxi"]
+
+
+def test_resultats_envoyes_au_seul_demandeur(application, provider, monkeypatch):
+    def sites_factices(ville, categories_souhaitees, categories_exclues, nombre_sites=10):
+        yield from ({"nom": f"{ville} {i}"} for i in range(nombre_sites))
+
+    monkeypatch.setattr(application.recup, "obtenir_sites_flux", sites_factices)
+    demandeur, autre = client(application), client(application)
+
+    demandeur.emit("request_transport_batch", {"legs": legs(("Opéra", "Bastille"))})
+    demandeur.emit("request_transport", {"origin": "Bastille", "destination": "Nation", "step_id": 2})
+    demandeur.emit("request_sites", {"ville": "Lyon", "nombre_sites": 2})
+
+    attendus = {"transport_leg_result": 1, "transport_result": 1, "site_result": 2, "sites_done": 1}
+    recus = []
+    limite = time.monotonic() + 5
+    while time.monotonic() < limite and any(recus.count(nom) < n for nom, n in attendus.items()):
+        recus += [message["name"] for message in demandeur.get_received()]
+        time.sleep(0.01)
+    assert {nom: recus.count(nom) for nom in attendus} == attendus
+
+    assert autre.get_received() == []
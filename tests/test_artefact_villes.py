@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+
+from artefact_villes import ecrire_artefact, ouvrir_artefact
+import prechauffage
+
+VILLE = "Lyon"
+SITES = [
+    {"nom": "Fourvière", "adresse": "8 Place de Fourvière"},
+    {"nom": "Bellecour", "adresse": "Place Bellecour"},
+    {"nom": "Part-Dieu", "adresse": "17 Rue du Docteur Bouchut"},
+]
+COORDONNEES = [(45.7623, 4.8225), (45.7578, 4.8320), (45.7606, 4.8593)]
+
+
+@pytest.fixture
+def artefact_incomplet(tmp_path):
+    """
+    Artefact d'une ancienne version, où le troisième site n'a ni coordonnées ni distances
+    """
+    coordonnees = np.array(COORDONNEES[:2] + [(np.nan, np.nan)])
+    distances = np.full((3, 3), np.nan)
+    distances[:2, :2] = [[0.0, 0.9], [0.9, 0.0]]
+    chemin = str(tmp_path / "villes.tgv")
+    ecrire_artefact(chemin, {VILLE: {"sites": SITES, "coordonnees": coordonnees, "distances": distances}})
+    artefact = ouvrir_artefact(chemin)
+    yield artefact
+    artefact.fermer()
+
+
+def optimiseur(api_sites, artefact, coordonnees):
+    opt = api_sites.OptimiseurItineraire(None, chemin_cache_geocodage=None, artefact=artefact)
+    opt.geocoder_par_lots = lambda adresses, ville: [coordonnees[a] for a in adresses]
+    return opt
+
+
+def test_itineraire_sans_nan_si_artefact_incomplet(api_sites, artefact_incomplet):
+    # Le site absent de l'artefact est géocodé à l'exécution : la matrice doit être recalculée
+    adresses = {site["adresse"]: c for site, c in zip(SITES, COORDONNEES)}
+    opt = optimiseur(api_sites, artefact_incomplet, adresses)
+
+    itineraire = opt.optimiser_itineraire([dict(site) for site in SITES], VILLE, "Fourvière")
+
+    assert [site["nom"] for site in itineraire][0] == "Fourvière"
+    assert sorted(site["nom"] for site in itineraire) == sorted(site["nom"] for site in SITES)
+    distances = [site["distance_suivant"] for site in itineraire]
+    assert np.isfinite(distances).all()
+    assert sum(distances) > 0
+
+
+def test_matrice_artefact_utilisee_si_complete(api_sites, artefact_incomplet):
+    opt = optimiseur(api_sites, artefact_incomplet, {})
+    sites = [dict(site) for site in SITES[:2]]
+
+    np.testing.assert_allclose(opt._matrice_artefact(sites, VILLE), [[0.0, 0.9], [0.9, 0.0]], rtol=1e-6)
+    assert opt._matrice_artefact([dict(site) for site in SITES], VILLE) is None
+
+
+def test_prechauffage_ecarte_les_sites_non_geocodes(api_sites):
+    class Recuperateur:
+        def obtenir_catalogue(self, ville):
+            return [dict(site) for site in SITES]
+
+    adresses = {SITES[0]["adresse"]: COORDONNEES[0], SITES[1]["adresse"]: None, SITES[2]["adresse"]: COORDONNEES[2]}
+    opt = optimiseur(api_sites, None, adresses)
+
+    resultat = prechauffage.prechauffer_ville(Recuperateur(), opt, VILLE)
+
+    assert [site["nom"] for site in resultat["sites"]] == ["Fourvière", "Part-Dieu"]
+    assert resultat["non_geocodes"] == 1
+    assert np.isfinite(resultat["coordonnees"]).all()
+    assert np.isfinite(resultat["distances"]).all()
+    assert resultat["distances"].shape == (2, 2)
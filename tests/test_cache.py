@@ -0,0 +1,84 @@
+import time
+
+import pytest
+
+from cache import BackendMemoire, BackendSQLite, CacheLRU
+
+
+def test_eviction_lru():
+    cache = CacheLRU(max_entrees=2, nb_segments=1)
+    cache.ecrire("a", 1)
+    cache.ecrire("b", 2)
+    # La lecture rend "a" plus récente que "b", qui est évincée à la place
+    assert cache.lire("a") == 1
+    cache.ecrire("c", 3)
+
+    assert cache.lire("b") is None
+    assert cache.lire("a") == 1
+    assert cache.lire("c") == 3
+    assert cache.statistiques()["evictions"] == 1
+
+
+def test_eviction_par_taille():
+    cache = CacheLRU(max_entrees=None, max_octets=2000, nb_segments=1)
+    for i in range(10):
+        cache.ecrire(i, "x" * 500)
+
+    assert len(cache) < 10
+    assert cache.statistiques()["octets"] <= 2000
+    assert cache.lire(9) == "x" * 500
+
+
+def test_duree_vie():
+    cache = CacheLRU(duree_vie=0.05)
+    cache.ecrire("courte", 1)
+    cache.ecrire("longue", 2, duree_vie=60)
+    time.sleep(0.1)
+
+    assert cache.lire("courte", defaut="absente") == "absente"
+    assert cache.lire("longue") == 2
+    assert cache.statistiques()["expirations"] == 1
+
+
+def test_ecriture_locale_hors_backend():
+    backend = BackendMemoire()
+    cache = CacheLRU(backend=backend, espace="geo")
+    cache.ecrire("approchee", [1.0, 2.0], local=True)
+    cache.ecrire("exacte", [3.0, 4.0])
+
+    assert backend.lire("geo:approchee") is None
+    assert backend.lire("geo:exacte")[0] == [3.0, 4.0]
+
+
+@pytest.fixture(params=["memoire", "sqlite"])
+def backend(request, tmp_path):
+    if request.param == "memoire":
+        yield BackendMemoire()
+    else:
+        backend = BackendSQLite(str(tmp_path / "cache.sqlite3"))
+        yield backend
+        backend.fermer()
+
+
+def test_backend_partage(backend):
+    premier = CacheLRU(backend=backend, espace="sites")
+    second = CacheLRU(backend=backend, espace="sites")
+    premier.ecrire("paris", ["Louvre"])
+
+    assert second.lire("paris") == ["Louvre"]
+    statistiques = second.statistiques()
+    assert statistiques["succes_backend"] == 1
+    assert statistiques["entrees"] == 1
+
+
+def test_backend_duree_vie_restante(backend):
+    # Une entrée lue dans le backend expire en même temps que l'original, sans repartir de zéro
+    premier = CacheLRU(duree_vie=60, backend=backend)
+    second = CacheLRU(duree_vie=60, backend=backend)
+    premier.ecrire("cle", "valeur", duree_vie=0.3)
+    time.sleep(0.15)
+    assert second.lire("cle") == "valeur"
+    time.sleep(0.25)
+
+    assert second.lire("cle") is None
+    assert premier.lire("cle") is None
@@ -0,0 +1,192 @@
+import asyncio
+import http.server
+import socket
+import threading
+import time
+
+import pytest
+import requests
+
+from client_http import ClientHTTP, ClientHTTPAsync
+
+
+class ServeurBouchon(http.server.ThreadingHTTPServer):
+    """
+    Serveur local qui rejoue une suite de réponses (code, en-têtes, attente avant de répondre)
+    et note le port client de chaque requête reçue
+    """
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), GestionnaireBouchon)
+        self.reponses = []
+        self.requetes = []
+        self.verrou = threading.Lock()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/"
+
+    def prochaine_reponse(self, methode, port):
+        with self.verrou:
+            self.requetes.append((methode, port))
+            return self.reponses.pop(0) if len(self.reponses) > 1 else self.reponses[0]
+
+
+class GestionnaireBouchon(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def repondre(self):
+        longueur = int(self.headers.get("Content-Length") or 0)
+        if longueur:
+            self.rfile.read(longueur)
+        code, en_tetes, attente = self.server.prochaine_reponse(self.command, self.client_address[1])
+        if attente:
+            time.sleep(attente)
+        corps = b'{"ok": true}'
+        self.send_response(code)
+        for nom, valeur in en_tetes.items():
+            self.send_header(nom, valeur)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(corps)))
+        self.end_headers()
+        self.wfile.write(corps)
+
+    do_GET = do_POST = repondre
+
+
+@pytest.fixture
+def serveur():
+    serveur = ServeurBouchon()
+    thread = threading.Thread(target=serveur.serve_forever, daemon=True)
+    thread.start()
+    yield serveur
+    serveur.shutdown()
+    serveur.server_close()
+
+
+def test_retry_after_respecte(serveur):
+    serveur.reponses = [(503, {"Retry-After": "0.3"}, 0), (429, {"Retry-After": "0"}, 0), (200, {}, 0)]
+    client = ClientHTTP(delai_base=5)
+
+    debut = time.monotonic()
+    reponse = client.get(serveur.url, timeout=5)
+
+    assert reponse.status_code == 200
+    assert len(serveur.requetes) == 3
+    # Retry-After prime sur l'attente exponentielle (delai_base de 5 s)
+    assert 0.3 <= time.monotonic() - debut < 2
+
+
+def test_derniere_reponse_apres_toutes_les_tentatives(serveur):
+    serveur.reponses = [(503, {}, 0)]
+    client = ClientHTTP(tentatives_max=3, delai_base=0.01)
+
+    assert client.get(serveur.url, timeout=5).status_code == 503
+    assert len(serveur.requetes) == 3
+
+
+def test_attente_exponentielle_avec_gigue():
+    client = ClientHTTP(delai_base=0.5, delai_max=3.0)
+
+    for tentative, plafond in ((0, 0.5), (1, 1.0), (2, 2.0), (5, 3.0)):
+        delais = {client.calculer_delai(tentative) for _ in range(50)}
+        assert all(0 <= delai <= plafond for delai in delais)
+        assert len(delais) > 1
+
+
+def test_erreur_de_connexion_retentee():
+    # Port local sans serveur : la connexion est refusée à chaque tentative
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    client = ClientHTTP(tentatives_max=3, delai_base=0.01)
+    essais = []
+    requete = client.session.request
+    client.session.request = lambda *args, **kwargs: essais.append(1) or requete(*args, **kwargs)
+
+    with pytest.raises(requests.exceptions.ConnectionError):
+        client.get(f"http://127.0.0.1:{port}/", timeout=1)
+    assert len(essais) == 3
+
+
+def test_echeance_globale(serveur):
+    serveur.reponses = [(503, {"Retry-After": "1"}, 0)]
+    client = ClientHTTP(tentatives_max=10, delai_max=1.0, duree_max=0.5)
+
+    debut = time.monotonic()
+    reponse = client.get(serveur.url, timeout=5)
+
+    # L'attente demandée dépasse l'échéance : la réponse 503 est retournée sans nouvelle tentative
+    assert reponse.status_code == 503
+    assert len(serveur.requetes) == 1
+    assert time.monotonic() - debut < 0.5
+
+
+def test_timeout_de_lecture_non_retente_en_post(serveur):
+    serveur.reponses = [(200, {}, 0.5)]
+    client = ClientHTTP(tentatives_max=3, delai_base=0.01)
+
+    with pytest.raises(requests.exceptions.ReadTimeout):
+        client.post(serveur.url, json={"q": 1}, timeout=0.2)
+    assert [methode for methode, _ in serveur.requetes] == ["POST"]
+
+    with pytest.raises(requests.exceptions.ReadTimeout):
+        client.get(serveur.url, timeout=0.2)
+    assert [methode for methode, _ in serveur.requetes].count("GET") == 3
+
+
+def test_connexion_reutilisee(serveur):
+    serveur.reponses = [(503, {"Retry-After": "0"}, 0), (200, {}, 0)]
+    client = ClientHTTP()
+
+    for _ in range(4):
+        assert client.get(serveur.url, timeout=5).status_code == 200
+
+    # Toutes les requêtes, nouvelles tentatives comprises, passent par la même connexion keep-alive
+    assert len(serveur.requetes) == 5
+    assert len({port for _, port in serveur.requetes}) == 1
+
+
+def test_tentatives_max_invalide():
+    with pytest.raises(ValueError):
+        ClientHTTP(tentatives_max=0)
+
+
+def test_client_asynchrone(serveur):
+    serveur.reponses = [(429, {"Retry-After": "0.2"}, 0), (200, {}, 0)]
+    client = ClientHTTPAsync(ClientHTTP())
+
+    async def envoyer():
+        tic = []
+
+        async def horloge():
+            # La boucle reste disponible pendant la requête et l'attente entre les tentatives
+            while True:
+                tic.append(1)
+                await asyncio.sleep(0.02)
+
+        tache = asyncio.create_task(horloge())
+        reponse = await client.post(serveur.url, json={"q": 1}, timeout=5)
+        tache.cancel()
+        return reponse, len(tic)
+
+    reponse, tics = asyncio.run(envoyer())
+
+    assert reponse.status_code == 200
+    assert len(serveur.requetes) == 2
+    assert tics >= 5
+
+
+def test_client_asynchrone_echeance(serveur):
+    serveur.reponses = [(503, {"Retry-After": "1"}, 0)]
+    client = ClientHTTPAsync(ClientHTTP(tentatives_max=5, duree_max=0.3))
+
+    reponse = asyncio.run(client.get(serveur.url, timeout=5))
+
+    assert reponse.status_code == 503
+    assert len(serveur.requetes) == 1
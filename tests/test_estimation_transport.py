@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+from estimation_transport import PROFIL_DEFAUT, EstimateurTransport
+
+ETAPES = [(48.8606, 2.3376), (48.8584, 2.2945), (48.8530, 2.3499), (48.8867, 2.3431)]
+
+
+def test_formes_estimer_distances():
+    estimateur = EstimateurTransport()
+
+    modes, minutes, prix, disponible = estimateur.estimer_distances([0.2, 1.5, 4.0, 30.0])
+
+    assert modes == list(PROFIL_DEFAUT)
+    assert minutes.shape == prix.shape == disponible.shape == (len(modes), 4)
+    assert disponible.dtype == bool
+    assert (minutes >= 1).all()
+
+
+def test_estimer_une_liste_par_etape():
+    estimateur = EstimateurTransport()
+
+    options = estimateur.estimer(ETAPES)
+
+    assert len(options) == len(ETAPES) - 1
+    for etape in options:
+        assert etape
+        assert [option["minutes"] for option in etape] == sorted(option["minutes"] for option in etape)
+        assert set(etape[0]) == {"mode", "moyen", "minutes", "prix", "distance_km"}
+        assert isinstance(etape[0]["minutes"], int) and isinstance(etape[0]["prix"], float)
+
+
+@pytest.mark.parametrize("coordonnees", [[], [ETAPES[0]]])
+def test_estimer_sans_trajet(coordonnees):
+    assert EstimateurTransport().estimer(coordonnees) == []
+
+
+def test_estimer_paires_coherent_avec_estimer():
+    estimateur = EstimateurTransport()
+
+    paires = estimateur.estimer_paires(ETAPES[:-1], ETAPES[1:])
+
+    assert paires == estimateur.estimer(ETAPES)
+    assert estimateur.estimer_trajet(ETAPES[0], ETAPES[1]) == paires[0]
+    assert estimateur.estimer_paires([], []) == []
+
+
+def test_disponibilite_selon_distance():
+    modes, _, _, disponible = EstimateurTransport().estimer_distances([0.1, 10.0])
+    marche = modes.index("marche")
+
+    assert disponible[marche].tolist() == [True, False]
+
+
+def test_profil_par_ville():
+    estimateur = EstimateurTransport({
+        "*": {"taxi": {"prix_minimum": 10}},
+        "Paris": {"velo": {"distance_max_km": 0}, "trottinette": {"nom": "Trottinette", "vitesse_kmh": 15,
+                                                                  "distance_max_km": 5}},
+    })
+
+    paris = {option["mode"]: option for option in estimateur.estimer_trajet(ETAPES[0], ETAPES[1], "paris")}
+    lyon = {option["mode"]: option for option in estimateur.estimer_trajet(ETAPES[0], ETAPES[1], "Lyon")}
+
+    assert "velo" not in paris and "velo" in lyon
+    assert "trottinette" in paris and "trottinette" not in lyon
+    assert paris["taxi"]["prix"] >= 10 and lyon["taxi"]["prix"] >= 10
+    np.testing.assert_allclose(paris["marche"]["distance_km"], lyon["marche"]["distance_km"])
@@ -0,0 +1,105 @@
+import os
+
+import pytest
+
+from geocodeur_local import GeocodeurLocal
+
+GAZETTEER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "gazetteer_lyon.csv")
+
+FOURVIERE = (45.7623, 4.8225)
+BELLECOUR = (45.7578, 4.8320)
+
+
+@pytest.fixture(scope="module")
+def geocodeur():
+    return GeocodeurLocal.depuis_fichier(GAZETTEER)
+
+
+class GeolocaliseurBouchon:
+    """
+    Remplace Nominatim : enregistre les requêtes et renvoie une position fixe
+    """
+
+    class Lieu:
+        latitude, longitude, raw = 45.75, 4.85, {"boundingbox": ["45.70", "45.81", "4.77", "4.90"]}
+
+    def __init__(self):
+        self.requetes = []
+
+    def geocode(self, requete, timeout=None):
+        self.requetes.append(requete)
+        return self.Lieu()
+
+
+def optimiseur(api_sites, geocodeur, mode="auto"):
+    opt = api_sites.OptimiseurItineraire(None, temps_entre_geocodage=0, chemin_cache_geocodage=None,
+                                         geocodeur_local=geocodeur, mode_geocodage=mode)
+    opt.geolocator = GeolocaliseurBouchon()
+    return opt
+
+
+def test_correspondance_exacte(geocodeur):
+    nom, latitude, longitude, score = geocodeur.rechercher("Place Bellecour", "Lyon")
+    assert nom == "Place Bellecour"
+    assert (latitude, longitude) == BELLECOUR
+    assert score == pytest.approx(1.0)
+    # Numéro de rue, code postal et nom de la ville ne gênent pas la correspondance
+    assert geocodeur.geocoder("12 Place Bellecour, 69002 Lyon", "Lyon") == BELLECOUR
+
+
+@pytest.mark.parametrize("adresse", [
+    "BASILIQUE NOTRE DAME DE FOURVIERE",
+    "basilique notre-dame de fourvière",
+    "Basilique Notre Dame de Fourvire",
+])
+def test_correspondance_sans_accents_ni_casse(geocodeur, adresse):
+    assert geocodeur.geocoder(adresse, "Lyon") == FOURVIERE
+
+
+def test_adresse_inconnue(geocodeur):
+    assert geocodeur.geocoder("Parc de la Tête d'Or", "Lyon") is None
+    assert geocodeur.geocoder("Lyon", "Lyon") is None
+
+
+def test_homonymes_departages_par_ville(geocodeur):
+    assert geocodeur.geocoder("Hôtel de Ville", "Lyon") == (45.7675, 4.8360)
+    assert geocodeur.geocoder("Hôtel de Ville", "Paris") == (48.8566, 2.3522)
+
+
+def test_lieu_hors_de_la_ville(geocodeur):
+    # Lieu sans ville, à plus de rayon_ville_km du centre de Lyon : écarté
+    assert geocodeur.geocoder("Château de Versailles", "Lyon") is None
+    assert geocodeur.geocoder("Château de Versailles") == (48.8049, 2.1204)
+
+
+def test_emprise_ville(geocodeur):
+    sud, nord, ouest, est = geocodeur.emprise_ville("lyon")
+    assert sud < BELLECOUR[0] < nord and ouest < BELLECOUR[1] < est
+    assert nord - sud == pytest.approx(60 / 111.2, rel=0.01)
+    assert geocodeur.emprise_ville("Marseille") is None
+
+
+def test_repli_sur_nominatim(api_sites, geocodeur):
+    opt = optimiseur(api_sites, geocodeur)
+
+    assert opt.obtenir_coordonnees("Place Bellecour", "Lyon") == BELLECOUR
+    assert opt.geolocator.requetes == []
+
+    assert opt.obtenir_coordonnees("Parc de la Tête d'Or", "Lyon") == (45.75, 4.85)
+    assert opt.geolocator.requetes == ["Parc de la Tête d'Or, Lyon"]
+
+
+def test_mode_local_sans_nominatim(api_sites, geocodeur):
+    opt = optimiseur(api_sites, geocodeur, mode="local")
+
+    assert opt.obtenir_coordonnees("Parc de la Tête d'Or", "Lyon") is None
+    assert opt.obtenir_emprise_ville("Marseille") is None
+    assert opt.geolocator.requetes == []
+
+
+def test_emprise_locale_avant_nominatim(api_sites, geocodeur):
+    opt = optimiseur(api_sites, geocodeur)
+
+    assert opt.obtenir_emprise_ville("Lyon") == geocodeur.emprise_ville("Lyon")
+    assert opt.obtenir_emprise_ville("Marseille") == (45.70, 45.81, 4.77, 4.90)
+    assert opt.geolocator.requetes == ["Marseille"]
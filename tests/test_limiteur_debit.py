@@ -0,0 +1,58 @@
+import time
+
+import pytest
+
+from limiteur_debit import LimiteurDebit, obtenir_limiteur
+
+
+def test_debit_respecte():
+    limiteur = LimiteurDebit(debit=50.0)
+    debut = time.monotonic()
+    for _ in range(6):
+        limiteur.acquerir()
+    assert time.monotonic() - debut >= 5 / 50.0 * 0.9
+
+
+def test_attente_max_refusee():
+    limiteur = LimiteurDebit(debit=1.0)
+    assert limiteur.acquerir(attente_max=0)
+    assert not limiteur.acquerir(attente_max=0.1)
+    assert limiteur.statistiques()["refus"] == 1
+
+
+def test_sans_limite():
+    limiteur = LimiteurDebit(debit=None)
+    debut = time.monotonic()
+    for _ in range(1000):
+        assert limiteur.acquerir(attente_max=0)
+    assert time.monotonic() - debut < 0.5
+    assert limiteur.statistiques()["acquisitions"] == 1000
+
+
+def test_debit_invalide():
+    with pytest.raises(ValueError):
+        LimiteurDebit(debit=0)
+
+
+def test_intervalle_nul_sans_limite(api_sites):
+    # Le limiteur "nominatim" a déjà servi à 1 appel par seconde, comme après un autre optimiseur
+    assert obtenir_limiteur("nominatim", debit=1.0).acquerir(attente_max=0)
+
+    opt = api_sites.OptimiseurItineraire(None, temps_entre_geocodage=0, chemin_cache_geocodage=None)
+
+    assert opt.limiteur.debit is None
+    debut = time.monotonic()
+    for _ in range(5):
+        assert opt.limiteur.acquerir(attente_max=0)
+    assert time.monotonic() - debut < 0.5
+
+
+def test_registre_reconfigure_le_limiteur():
+    limiteur = obtenir_limiteur("test_registre", debit=1.0)
+    assert limiteur.acquerir(attente_max=0)
+    assert not limiteur.acquerir(attente_max=0.5)
+
+    # Même seau partagé, au nouveau débit : le créneau suivant est ramené à 1/20 s
+    assert obtenir_limiteur("test_registre", debit=20.0) is limiteur
+    assert limiteur.debit == 20.0
+    assert limiteur.acquerir(attente_max=0.1)
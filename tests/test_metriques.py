@@ -0,0 +1,17 @@
+from limiteur_debit import LimiteurDebit
+from metriques import Registre, collecteur_limiteur
+
+
+def test_attente_limiteur_exposee_en_summary():
+    registre = Registre()
+    limiteur = LimiteurDebit(debit=None)
+    for _ in range(3):
+        limiteur.acquerir()
+    registre.ajouter_collecteur(collecteur_limiteur("nominatim", limiteur))
+
+    lignes = [ligne for ligne in registre.exposer().splitlines() if "attente_secondes" in ligne]
+
+    assert "# TYPE tourguide_limiteur_attente_secondes summary" in lignes
+    assert 'tourguide_limiteur_attente_secondes{limiteur="nominatim",quantile="0.99"} 0.0' in lignes
+    assert 'tourguide_limiteur_attente_secondes_sum{limiteur="nominatim"} 0.0' in lignes
+    assert 'tourguide_limiteur_attente_secondes_count{limiteur="nominatim"} 3' in lignes
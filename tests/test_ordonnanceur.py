@@ -0,0 +1,107 @@
+import threading
+
+import pytest
+
+from ordonnanceur import EcheanceDepassee, FilePleine, OrdonnanceurTaches
+
+
+@pytest.fixture
+def ordonnanceur():
+    ordonnanceur = OrdonnanceurTaches(1, taille_max=3, nom="test")
+    yield ordonnanceur
+    ordonnanceur.arreter()
+
+
+@pytest.fixture
+def worker_occupe(ordonnanceur):
+    """
+    Occupe l'unique worker jusqu'à la fin du test, ou jusqu'à ce que l'événement retourné soit levé
+    """
+    demarre, liberer = threading.Event(), threading.Event()
+
+    def bloquer():
+        demarre.set()
+        liberer.wait(5)
+
+    ordonnanceur.soumettre(bloquer)
+    assert demarre.wait(5)
+    yield liberer
+    liberer.set()
+
+
+def test_priorite_puis_ordre_arrivee(ordonnanceur, worker_occupe):
+    ordre = []
+    futures = [ordonnanceur.soumettre(ordre.append, nom, priorite=priorite)
+               for nom, priorite in (("b", 1), ("c", 1), ("a", 0))]
+    worker_occupe.set()
+    for future in futures:
+        future.result(timeout=5)
+
+    assert ordre == ["a", "b", "c"]
+
+
+def test_echeance_depassee(ordonnanceur, worker_occupe):
+    future = ordonnanceur.soumettre(lambda: "trop tard", delai=0.05)
+
+    with pytest.raises(EcheanceDepassee):
+        future.result(timeout=5)
+    assert ordonnanceur.statistiques()["expirees"] == 1
+
+
+def test_cles_regroupees_executees_une_fois(ordonnanceur, worker_occupe):
+    appels = []
+
+    def calculer():
+        appels.append(1)
+        return 42
+
+    futures = [ordonnanceur.soumettre(calculer, cle="paris") for _ in range(3)]
+    assert ordonnanceur.statistiques()["en_file"] == 1
+    assert ordonnanceur.statistiques()["regroupees"] == 2
+    worker_occupe.set()
+
+    assert [future.result(timeout=5) for future in futures] == [42, 42, 42]
+    assert appels == [1]
+
+
+def test_annulation_en_file(ordonnanceur, worker_occupe):
+    appels = []
+    future = ordonnanceur.soumettre(appels.append, 1)
+
+    assert future.cancel()
+    statistiques = ordonnanceur.statistiques()
+    assert statistiques["abandonnees"] == 1
+    assert statistiques["en_file"] == 0
+    # La place libérée est de nouveau disponible
+    for i in range(3):
+        ordonnanceur.soumettre(appels.append, i)
+
+
+def test_annulation_partielle_garde_la_tache(ordonnanceur, worker_occupe):
+    premiere = ordonnanceur.soumettre(lambda: "ok", cle="lyon")
+    seconde = ordonnanceur.soumettre(lambda: "ok", cle="lyon")
+
+    assert premiere.cancel()
+    assert ordonnanceur.statistiques()["abandonnees"] == 0
+    assert not seconde.done()
+
+
+def test_file_pleine(ordonnanceur, worker_occupe):
+    ordonnanceur.soumettre(lambda: None, cle="paris")
+    ordonnanceur.soumettre(lambda: None)
+    ordonnanceur.soumettre(lambda: None)
+
+    with pytest.raises(FilePleine):
+        ordonnanceur.soumettre(lambda: None)
+    # Une clé déjà en file est regroupée même quand la file est pleine
+    ordonnanceur.soumettre(lambda: None, cle="paris")
+    assert ordonnanceur.statistiques()["rejetees"] == 1
+
+
+def test_exception_propagee(ordonnanceur):
+    def echouer():
+        raise RuntimeError("panne")
+
+    with pytest.raises(RuntimeError, match="panne"):
+        ordonnanceur.soumettre(echouer).result(timeout=5)
+    assert ordonnanceur.statistiques()["echecs"] == 1
@@ -0,0 +1,154 @@
+import pytest
+
+import scraping
+from scraping import DriverPool, PoolTimeoutError
+
+
+class NavigateurFactice:
+    """
+    Remplace Chrome : répond au contrôle de santé tant qu'il n'a pas planté
+    """
+
+    def __init__(self, numero):
+        self.numero = numero
+        self.plante = False
+        self.ferme = False
+        self.pages = []
+
+    def get(self, url):
+        self.pages.append(url)
+
+    def execute_script(self, script):
+        if self.plante or self.ferme:
+            raise RuntimeError("navigateur injoignable")
+        return 1
+
+    def quit(self):
+        self.ferme = True
+
+
+class Fabrique:
+    def __init__(self):
+        self.navigateurs = []
+
+    def __call__(self):
+        navigateur = NavigateurFactice(len(self.navigateurs))
+        self.navigateurs.append(navigateur)
+        return navigateur
+
+
+@pytest.fixture(autouse=True)
+def sans_cookies(monkeypatch):
+    monkeypatch.setattr(scraping, "dismiss_cookies", lambda driver: None)
+
+
+@pytest.fixture
+def fabrique():
+    return Fabrique()
+
+
+def test_navigateur_reutilise(fabrique):
+    pool = DriverPool(size=2, max_uses=10, checkout_timeout=1, driver_factory=fabrique)
+
+    entree = pool.acquire()
+    assert entree.driver.pages == [scraping.ROME2RIO_URL]
+    assert entree.cookies_dismissed
+    pool.release(entree)
+
+    with pool.driver() as seconde:
+        assert seconde is entree
+    assert len(fabrique.navigateurs) == 1
+    assert entree.uses == 2
+
+
+def test_navigateur_plante_remplace(fabrique):
+    pool = DriverPool(size=1, max_uses=10, checkout_timeout=1, driver_factory=fabrique)
+
+    # Plantage pendant une recherche : le navigateur est fermé au retour dans le pool
+    with pytest.raises(RuntimeError):
+        with pool.driver() as entree:
+            entree.driver.plante = True
+            raise RuntimeError("session perdue")
+    assert fabrique.navigateurs[0].ferme
+
+    # Plantage pendant l'inactivité : le contrôle de santé l'écarte à la sortie du pool
+    with pool.driver() as entree:
+        assert entree.driver is fabrique.navigateurs[1]
+    fabrique.navigateurs[1].plante = True
+    with pool.driver() as entree:
+        assert entree.driver is fabrique.navigateurs[2]
+    assert fabrique.navigateurs[1].ferme
+
+
+def test_erreur_sans_plantage_conserve_le_navigateur(fabrique):
+    pool = DriverPool(size=1, max_uses=10, checkout_timeout=1, driver_factory=fabrique)
+
+    with pytest.raises(ValueError):
+        with pool.driver():
+            raise ValueError("page inattendue")
+    with pool.driver() as entree:
+        assert entree.driver is fabrique.navigateurs[0]
+    assert not fabrique.navigateurs[0].ferme
+
+
+def test_recyclage_apres_max_uses(fabrique):
+    pool = DriverPool(size=1, max_uses=2, checkout_timeout=1, driver_factory=fabrique)
+
+    for _ in range(3):
+        with pool.driver():
+            pass
+
+    assert len(fabrique.navigateurs) == 2
+    assert fabrique.navigateurs[0].ferme and not fabrique.navigateurs[1].ferme
+
+
+def test_attente_bornee(fabrique):
+    pool = DriverPool(size=1, max_uses=10, checkout_timeout=0.05, driver_factory=fabrique)
+
+    entree = pool.acquire()
+    with pytest.raises(PoolTimeoutError):
+        pool.acquire()
+    with pytest.raises(PoolTimeoutError):
+        pool.acquire(timeout=0)
+    pool.release(entree)
+    assert pool.acquire(timeout=0) is entree
+
+
+def test_echec_de_lancement_libere_la_place():
+    def fabrique_en_panne():
+        raise OSError("chromedriver introuvable")
+
+    pool = DriverPool(size=1, max_uses=10, checkout_timeout=0.05, driver_factory=fabrique_en_panne)
+    for _ in range(2):
+        with pytest.raises(OSError):
+            pool.acquire()
+
+
+def test_prechauffage(fabrique):
+    pool = DriverPool(size=2, max_uses=10, checkout_timeout=1, driver_factory=fabrique)
+
+    pool.prewarm()
+    pool.prewarm()
+
+    assert len(fabrique.navigateurs) == 2
+    # Les deux places sont servies par les navigateurs préchauffés, sans en lancer d'autre
+    pilotes = {id(pool.acquire(timeout=0).driver) for _ in range(2)}
+    assert pilotes == {id(navigateur) for navigateur in fabrique.navigateurs}
+    assert len(fabrique.navigateurs) == 2
+
+
+def test_fermeture(fabrique):
+    pool = DriverPool(size=2, max_uses=10, checkout_timeout=1, driver_factory=fabrique)
+    en_cours = pool.acquire()
+    with pool.driver():
+        pass
+    inactif = fabrique.navigateurs[1]
+
+    pool.close()
+
+    assert inactif.ferme and not en_cours.driver.ferme
+    with pytest.raises(RuntimeError):
+        pool.acquire()
+    # Un navigateur rendu après la fermeture n'est pas remis dans le pool
+    pool.release(en_cours)
+    assert en_cours.driver.ferme
@@ -0,0 +1,76 @@
+import threading
+import time
+
+import pytest
+
+from singleflight import SingleFlight
+
+
+def lancer_concurrents(groupe, fonction, nombre, demarre):
+    """
+    Lance un meneur puis nombre - 1 appels concurrents sur la même clé, une fois le meneur démarré
+    """
+    resultats = [None] * nombre
+
+    def appeler(i):
+        try:
+            resultats[i] = ("ok", groupe.executer("cle", fonction))
+        except Exception as e:
+            resultats[i] = ("erreur", e)
+
+    threads = [threading.Thread(target=appeler, args=(i,)) for i in range(nombre)]
+    threads[0].start()
+    assert demarre.wait(5)
+    for thread in threads[1:]:
+        thread.start()
+    # Les suiveurs sont enregistrés avant que le meneur ne soit libéré
+    while groupe.statistiques()["appels"] < nombre:
+        time.sleep(0.001)
+    return threads, resultats
+
+
+def test_appels_regroupes():
+    groupe = SingleFlight()
+    demarre, liberer = threading.Event(), threading.Event()
+
+    def calculer():
+        demarre.set()
+        liberer.wait(5)
+        return 42
+
+    threads, resultats = lancer_concurrents(groupe, calculer, 5, demarre)
+    liberer.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert resultats == [("ok", 42)] * 5
+    assert groupe.statistiques() == {"appels": 5, "executions": 1, "doublons_evites": 4, "en_cours": 0}
+
+
+def test_exception_propagee_a_tous():
+    groupe = SingleFlight()
+    demarre, liberer = threading.Event(), threading.Event()
+    erreur = RuntimeError("groq indisponible")
+
+    def echouer():
+        demarre.set()
+        liberer.wait(5)
+        raise erreur
+
+    threads, resultats = lancer_concurrents(groupe, echouer, 3, demarre)
+    liberer.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert resultats == [("erreur", erreur)] * 3
+    assert groupe.statistiques()["en_cours"] == 0
+
+
+def test_nouvel_appel_apres_echec():
+    groupe = SingleFlight()
+
+    with pytest.raises(ValueError):
+        groupe.executer("cle", int, "pas un nombre")
+    # L'échec n'est pas mémorisé : l'appel suivant est exécuté à nouveau
+    assert groupe.executer("cle", int, "7") == 7
+    assert groupe.statistiques()["executions"] == 2
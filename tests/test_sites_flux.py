@@ -0,0 +1,101 @@
+import json
+import threading
+
+import pytest
+
+SITES = [
+    {"nom": f"Site {i}", "description": "Description", "categorie": categorie, "adresse": f"{i} rue de Lyon"}
+    for i, categorie in enumerate(["Musées des beaux-arts", "Parcs et jardins", "Musées des beaux-arts"])
+]
+
+
+class ReponseFlux:
+    """
+    Réponse "server-sent events" dont chaque site n'est envoyé qu'après le signal correspondant
+    """
+
+    def __init__(self, signaux):
+        self.signaux = signaux
+
+    def raise_for_status(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def iter_lines(self, decode_unicode=False):
+        contenu = json.dumps(SITES)
+        morceaux = [contenu[:1]] + [json.dumps(site) + ("," if i < len(SITES) - 1 else "")
+                                    for i, site in enumerate(SITES)] + ["]"]
+        for i, morceau in enumerate(morceaux):
+            if 0 < i <= len(SITES):
+                assert self.signaux[i - 1].wait(5)
+            yield "data: " + json.dumps({"choices": [{"delta": {"content": morceau}}]})
+        yield "data: [DONE]"
+
+
+class ClientBouchon:
+    def __init__(self):
+        self.appels = 0
+        self.signaux = [threading.Event() for _ in SITES]
+
+    def post(self, url, **kwargs):
+        self.appels += 1
+        return ReponseFlux(self.signaux)
+
+
+@pytest.fixture
+def recuperateur(api_sites, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return api_sites.RecuperateurSitesTouristiques(cle_api="test", client_http=ClientBouchon())
+
+
+def lire_en_fond(recuperateur, resultats, cle, *args):
+    def lire():
+        resultats[cle] = [site["nom"] for site in recuperateur.obtenir_sites_flux("Lyon", *args)]
+    fil = threading.Thread(target=lire)
+    fil.start()
+    return fil
+
+
+def test_demandes_simultanees_partagent_le_flux(recuperateur):
+    client = recuperateur.client_http
+    resultats = {}
+    meneur = lire_en_fond(recuperateur, resultats, "meneur", [], [])
+    client.signaux[0].set()
+
+    # Le second demandeur arrive pendant le flux : il reçoit aussi le site déjà généré
+    suiveur = lire_en_fond(recuperateur, resultats, "suiveur", ["musées"], [])
+    for signal in client.signaux[1:]:
+        signal.set()
+    meneur.join(5)
+    suiveur.join(5)
+
+    assert client.appels == 1
+    assert resultats["meneur"] == ["Site 0", "Site 1", "Site 2"]
+    assert resultats["suiveur"] == ["Site 0", "Site 2"]
+    assert recuperateur.requetes_en_vol.statistiques()["executions"] == 1
+
+
+def test_catalogue_non_flux_attend_le_flux_en_cours(recuperateur):
+    client = recuperateur.client_http
+    resultats = {}
+    meneur = lire_en_fond(recuperateur, resultats, "meneur", [], [], 1)
+    client.signaux[0].set()
+    meneur.join(5)
+
+    # Le demandeur en flux a abandonné après un site : le chargement continue et sert obtenir_catalogue
+    catalogue = {}
+    fil = threading.Thread(target=lambda: catalogue.update(sites=recuperateur.obtenir_catalogue("Lyon")))
+    fil.start()
+    for signal in client.signaux[1:]:
+        signal.set()
+    fil.join(5)
+
+    assert resultats["meneur"] == ["Site 0"]
+    assert [site["nom"] for site in catalogue["sites"]] == ["Site 0", "Site 1", "Site 2"]
+    assert client.appels == 1
+    assert recuperateur.cache.lire(recuperateur._cle_catalogue("Lyon")) is not None
@@ -0,0 +1,56 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from matrice_distances import matrice_haversine
+from solveurs import SOLVEURS, longueur_parcours, resoudre, tour_held_karp
+
+
+def matrice_aleatoire(n, graine):
+    generateur = np.random.default_rng(graine)
+    points = np.column_stack([48.85 + generateur.uniform(-0.05, 0.05, n), 2.35 + generateur.uniform(-0.08, 0.08, n)])
+    return matrice_haversine(points)
+
+
+def optimum_force_brute(matrice, depart):
+    autres = [i for i in range(len(matrice)) if i != depart]
+    return min(longueur_parcours([depart, *ordre], matrice) for ordre in itertools.permutations(autres))
+
+
+@pytest.mark.parametrize("n", [1, 2, 3, 5, 8])
+@pytest.mark.parametrize("graine", range(3))
+def test_held_karp_optimal(n, graine):
+    matrice = matrice_aleatoire(n, graine)
+    depart = graine % n
+
+    ordre = tour_held_karp(matrice, depart)
+
+    assert ordre[0] == depart
+    assert sorted(ordre) == list(range(n))
+    assert longueur_parcours(ordre, matrice) == pytest.approx(optimum_force_brute(matrice, depart))
+
+
+def test_held_karp_matrice_asymetrique():
+    generateur = np.random.default_rng(7)
+    matrice = generateur.uniform(1, 10, (7, 7))
+    np.fill_diagonal(matrice, 0)
+
+    ordre = tour_held_karp(matrice, 2)
+
+    assert longueur_parcours(ordre, matrice) == pytest.approx(optimum_force_brute(matrice, 2))
+
+
+@pytest.mark.parametrize("solveur", sorted(SOLVEURS))
+def test_solveurs_parcours_valide(solveur):
+    matrice = matrice_aleatoire(15 if solveur != "held_karp" else 9, 1)
+
+    ordre = resoudre(matrice, 4, solveur, limite_temps=0.2)
+
+    assert ordre[0] == 4
+    assert sorted(ordre) == list(range(len(matrice)))
+
+
+def test_held_karp_taille_limitee():
+    with pytest.raises(ValueError):
+        resoudre(matrice_aleatoire(13, 0), 0, "held_karp")
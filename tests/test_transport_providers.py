@@ -0,0 +1,157 @@
+import json
+import os
+import subprocess
+import sys
+import textwrap
+
+import pytest
+
+from transport_providers import (FallbackProvider, Rome2rioApiProvider, SeleniumProvider, TransportProvider,
+                                 make_option, parse_option_line)
+
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURE_ROME2RIO = os.path.join(RACINE, "benchmarks", "fixtures", "rome2rio_search.json")
+
+
+class ProviderBouchon(TransportProvider):
+    """
+    Fournisseur dont les réponses sont fixées par trajet : une liste d'options ou une exception
+    """
+
+    def __init__(self, nom, reponses):
+        self.name = nom
+        self.reponses = reponses
+        self.appels = []
+
+    def get_itineraries(self, origin, destination):
+        self.appels.append((origin, destination))
+        reponse = self.reponses.get((origin, destination), [])
+        if isinstance(reponse, Exception):
+            raise reponse
+        return reponse
+
+
+def test_rome2rio_fixture():
+    with open(FIXTURE_ROME2RIO, encoding="utf-8") as fichier:
+        charge = json.load(fichier)
+
+    options = Rome2rioApiProvider.parse_routes(charge, "Musée du Louvre", "Tour Eiffel")
+
+    # Du plus rapide au plus lent, fourchette de prix conservée pour le taxi
+    assert [(o["name"], o["minutes"]) for o in options] == [
+        ("Taxi", 12), ("Vélo", 16), ("Métro", 21), ("Bus", 29), ("À pied", 45)]
+    assert options[0] == make_option("Taxi", 12, 14, price_max=20)
+    assert options[2]["price"] == 2.15 and options[2]["price_max"] is None
+    assert options[-1]["price"] == 0.0
+
+
+def test_rome2rio_routes_incompletes_ignorees():
+    charge = {"routes": [{"name": "Ferry"}, {"totalDuration": 5}, {"name": "Tram", "totalDuration": 7}]}
+    assert [o["name"] for o in Rome2rioApiProvider.parse_routes(charge, "A", "B")] == ["Tram"]
+
+
+@pytest.mark.parametrize("ligne, attendu", [
+    ("Adresse: A → B | Moyen: Métro | Temps: 21 min | Prix: 2,15 €", make_option("Métro", 21, 2.15)),
+    ("Adresse: A → B | Moyen: Train | Temps: 1h 05min | Prix: 12 €", make_option("Train", 65, 12)),
+    ("Adresse: A → B | Moyen: Bus | Temps: 2 h | Prix: 4 €", make_option("Bus", 120, 4)),
+    ("Adresse: A → B | Moyen: Taxi | Temps: 12 min | Prix: 14–20 €", make_option("Taxi", 12, 14, price_max=20)),
+    ("Adresse: A → B | Moyen: À pied | Temps: 45 min | Prix: Inconnu", make_option("À pied", 45, 0)),
+])
+def test_ligne_option(ligne, attendu):
+    assert parse_option_line(ligne) == attendu
+
+
+def test_ligne_echec_ignoree():
+    ligne = "Échec du chargement pour A → B"
+    assert parse_option_line(ligne) is None
+    assert parse_option_line("Adresse: A → B | Moyen: Bus | Temps: ? | Prix: 2 €") is None
+    # Une réponse du scraper faite uniquement de messages d'erreur est un échec, pas une absence d'options
+    assert SeleniumProvider.parse_lines([ligne]) is None
+    assert SeleniumProvider.parse_lines([]) == []
+
+
+def test_repli_par_trajet():
+    bus = [make_option("Bus", 20, 2)]
+    taxi = [make_option("Taxi", 10, 15)]
+    premier = ProviderBouchon("premier", {("A", "B"): bus, ("B", "C"): RuntimeError("panne"), ("C", "D"): []})
+    second = ProviderBouchon("second", {("B", "C"): taxi, ("C", "D"): taxi})
+    fournisseur = FallbackProvider([premier, second])
+
+    resultats = dict(fournisseur.get_route_itineraries([("A", "B"), ("B", "C"), ("C", "D")]))
+
+    # Seuls les trajets en échec ou sans option passent au fournisseur suivant
+    assert resultats == {0: bus, 1: taxi, 2: taxi}
+    assert second.appels == [("B", "C"), ("C", "D")]
+    assert fournisseur.get_itineraries("B", "C") == taxi
+
+
+def test_repli_echec_et_absence_distingues():
+    premier = ProviderBouchon("premier", {("A", "B"): RuntimeError("panne"), ("B", "C"): RuntimeError("panne")})
+    second = ProviderBouchon("second", {("A", "B"): RuntimeError("panne")})
+    fournisseur = FallbackProvider([premier, second])
+
+    # None : aucun fournisseur n'a pu répondre ; [] : un fournisseur a répondu sans option
+    assert dict(fournisseur.get_route_itineraries([("A", "B"), ("B", "C")])) == {0: None, 1: []}
+    with pytest.raises(RuntimeError):
+        fournisseur.get_itineraries("A", "B")
+    assert fournisseur.get_itineraries("B", "C") == []
+
+
+def test_selenium_hors_boucle_eventlet():
+    pytest.importorskip("eventlet")
+    # monkey_patch modifie tout le processus : le scénario s'exécute dans un interpréteur séparé
+    script = textwrap.dedent("""
+        import eventlet
+        eventlet.monkey_patch()
+        import json, sys, time
+        sys.path.insert(0, sys.argv[1])
+        from eventlet import patcher, tpool
+        import scraping
+        from transport_providers import SeleniumProvider
+
+        def occuper(secondes):
+            # Attente active : bloquerait la boucle si elle s'exécutait dans le thread du hub
+            fin = time.perf_counter() + secondes
+            while time.perf_counter() < fin:
+                pass
+
+        def legs_factices(legs, pool=None):
+            for index, (origin, destination) in enumerate(legs):
+                occuper(0.2)
+                yield index, [f"Adresse: {origin} → {destination} | Moyen: Bus | Temps: 12 min | Prix: 2 €"]
+
+        def paire_factice(origin, destination, pool=None):
+            occuper(0.2)
+            return [f"Adresse: {origin} → {destination} | Moyen: Métro | Temps: 9 min | Prix: 1,90 €"]
+
+        scraping.get_itineraries_for_legs = legs_factices
+        scraping.get_itineraries_for_pair = paire_factice
+
+        tics = []
+        def horloge():
+            while True:
+                tics.append(time.monotonic())
+                eventlet.sleep(0.01)
+        eventlet.spawn(horloge)
+        eventlet.sleep(0)
+
+        provider = SeleniumProvider(offload=tpool.execute)
+        route = [(i, [o["name"] for o in options]) for i, options in provider.get_route_itineraries([("A", "B"), ("B", "C")])]
+        paire = [o["name"] for o in provider.get_itineraries("A", "B")]
+        ecarts = [b - a for a, b in zip(tics, tics[1:])]
+        print(json.dumps({
+            "route": route, "paire": paire, "ecart_max": max(ecarts, default=float("inf")), "tics": len(tics),
+            "verrous_natifs": scraping.threading.Lock is patcher.original("threading").Lock,
+        }))
+    """)
+    sortie = subprocess.run([sys.executable, "-c", script, RACINE], capture_output=True, text=True, timeout=60,
+                            cwd=RACINE)
+    assert sortie.returncode == 0, sortie.stderr
+    resultat = json.loads(sortie.stdout.strip().splitlines()[-1])
+
+    assert resultat["route"] == [[0, ["Bus"]], [1, ["Bus"]]]
+    assert resultat["paire"] == ["Métro"]
+    assert resultat["verrous_natifs"]
+    # Les 0,6 s de travail bloquant n'ont jamais arrêté la boucle plus de quelques dizaines de ms
+    assert resultat["ecart_max"] < 0.1
+    assert resultat["tics"] > 20
@@ -0,0 +1,319 @@
+import logging
+import os
+import re
+
+try:
+    from modules.client_http import ClientHTTP
+    from modules.metriques import mesurer
+except ImportError:
+    from client_http import ClientHTTP
+    from metriques import mesurer
+
+
+logger = logging.getLogger(__name__)
+
+ROME2RIO_API_URL = os.getenv("ROME2RIO_API_URL", "https://free.rome2rio.com/api/1.4/json/Search")
+DEFAULT_PROVIDERS = "rome2rio_api,selenium"
+
+
+class TransportProvider:
+    """
+    Source of transport options between two addresses.
+
+    get_itineraries returns the options as records built by make_option, or an empty list when
+    the provider has nothing for this leg. It raises on failure so that FallbackProvider can move
+    on to the next provider, and so that a failed lookup is never cached as "no options".
+
+    get_route_itineraries looks up several legs at once and yields (leg_index, options) as each
+    leg finishes, options being None for a leg whose lookup failed.
+    """
+
+    name = "base"
+
+    def get_itineraries(self, origin, destination):
+        raise NotImplementedError
+
+    def get_route_itineraries(self, legs):
+        for index, (origin, destination) in enumerate(legs):
+            try:
+                options = self.get_itineraries(origin, destination)
+            except Exception as e:
+                logger.warning(f"Provider {self.name} failed for {origin} → {destination}: {e}")
+                options = None
+            yield index, options
+
+    def close(self):
+        pass
+
+
+class TransportLookupError(Exception):
+    """
+    The provider could not look the leg up (as opposed to finding no options for it)
+    """
+
+
+def make_option(name, minutes, price, price_max=None, currency="EUR", estimated=False):
+    """
+    Transport option record: numeric duration in minutes and price, price_max set for a price range
+    """
+    return {
+        "name": name,
+        "minutes": int(round(minutes)),
+        "price": float(price),
+        "price_max": float(price_max) if price_max is not None and price_max != price else None,
+        "currency": currency,
+        "estimated": estimated,
+    }
+
+
+def format_duration(minutes):
+    minutes = int(round(minutes))
+    if minutes < 60:
+        return f"{minutes} min"
+    return f"{minutes // 60} h {minutes % 60:02d} min"
+
+
+def format_amount(amount):
+    return str(int(amount)) if float(amount).is_integer() else f"{amount:.2f}"
+
+
+def format_option(origin, destination, option):
+    """
+    Legacy "Adresse: … | Moyen: … | Temps: … | Prix: …" line for an option record
+    """
+    currency = "€" if option["currency"] == "EUR" else option["currency"]
+    price = format_amount(option["price"])
+    if option["price_max"] is not None:
+        price += f"–{format_amount(option['price_max'])}"
+    return (f"Adresse: {origin} → {destination} | Moyen: {option['name']} | "
+            f"Temps: {format_duration(option['minutes'])} | Prix: {price} {currency}")
+
+
+DURATION_PATTERN = re.compile(r"(?:(\d+)\s*h)?\s*(?:(\d+)\s*min)?", re.IGNORECASE)
+AMOUNT_PATTERN = re.compile(r"\d+(?:[.,]\d+)?")
+
+
+def parse_duration(text):
+    """
+    Minutes in a "1 h 05 min", "2h" or "45 min" duration, None when there is none
+    """
+    for match in DURATION_PATTERN.finditer(text or ""):
+        hours, minutes = match.groups()
+        if hours or minutes:
+            return int(hours or 0) * 60 + int(minutes or 0)
+    return None
+
+
+def parse_option_line(line):
+    """
+    Option record from an "Adresse: … | Moyen: … | Temps: … | Prix: …" line, None when the line
+    is not an option (e.g. a scraper error message)
+    """
+    fields = dict(part.split(":", 1) for part in line.split(" | ") if ":" in part)
+    fields = {key.strip(): value.strip() for key, value in fields.items()}
+    minutes = parse_duration(fields.get("Temps"))
+    if not fields.get("Moyen") or minutes is None:
+        return None
+    amounts = [float(amount.replace(",", ".")) for amount in AMOUNT_PATTERN.findall(fields.get("Prix", ""))]
+    return make_option(fields["Moyen"], minutes, amounts[0] if amounts else 0,
+                       price_max=amounts[1] if len(amounts) > 1 else None)
+
+
+class Rome2rioApiProvider(TransportProvider):
+    """
+    Options from the rome2rio Search API: one pooled HTTP request and a JSON payload,
+    instead of driving a browser through the website.
+    """
+
+    name = "rome2rio_api"
+
+    def __init__(self, api_key=None, url=None, client=None, currency="EUR", language="fr", timeout=5):
+        self.api_key = api_key or os.getenv("ROME2RIO_API_KEY")
+        if not self.api_key:
+            raise ValueError("ROME2RIO_API_KEY is required for the rome2rio API provider")
+        self.url = url or ROME2RIO_API_URL
+        # Few retries: a slow answer is worse than falling back to the next provider
+        self.client = client or ClientHTTP(tentatives_max=2, delai_max=1.0)
+        self.currency = currency
+        self.language = language
+        self.timeout = timeout
+
+    @mesurer("rome2rio_api")
+    def get_itineraries(self, origin, destination):
+        response = self.client.get(self.url, params={
+            "key": self.api_key,
+            "oName": origin,
+            "dName": destination,
+            "currencyCode": self.currency,
+            "languageCode": self.language,
+        }, timeout=self.timeout)
+        response.raise_for_status()
+        return self.parse_routes(response.json(), origin, destination)
+
+    @staticmethod
+    def parse_routes(payload, origin, destination):
+        """
+        Turn a Search API payload into option records, fastest route first
+        """
+        itineraries = []
+        routes = sorted(payload.get("routes", []), key=lambda route: route.get("totalDuration", float("inf")))
+        for route in routes:
+            if not route.get("name") or route.get("totalDuration") is None:
+                continue
+            prices = route.get("indicativePrices") or [{}]
+            price = prices[0]
+            low, high = price.get("priceLow"), price.get("priceHigh")
+            if low is None or high is None:
+                low = high = price.get("price", 0)
+            itineraries.append(make_option(route["name"], route["totalDuration"], low, price_max=high,
+                                           currency=price.get("currency", "EUR")))
+        return itineraries
+
+    def close(self):
+        self.client.fermer()
+
+
+class SeleniumProvider(TransportProvider):
+    """
+    The rome2rio website driven through the pool of headless browsers (see scraping.py),
+    whose result lines are parsed into option records.
+
+    `offload` runs each blocking browser call elsewhere, e.g. `eventlet.tpool.execute` to keep
+    Selenium on real OS threads under eventlet; by default calls run in the caller's thread.
+    """
+
+    name = "selenium"
+
+    def __init__(self, pool=None, offload=None):
+        self.pool = pool
+        self.offload = offload
+
+    def _run(self, function, *args, **kwargs):
+        if self.offload is None:
+            return function(*args, **kwargs)
+        return self.offload(function, *args, **kwargs)
+
+    def get_itineraries(self, origin, destination):
+        try:
+            from modules.scraping import get_itineraries_for_pair
+        except ImportError:
+            from scraping import get_itineraries_for_pair
+        options = self.parse_lines(self._run(get_itineraries_for_pair, origin, destination, pool=self.pool))
+        if options is None:
+            raise TransportLookupError(f"Scraping failed for {origin} → {destination}")
+        return options
+
+    def get_route_itineraries(self, legs):
+        # All the legs in one browser session, several rome2rio searches running in parallel tabs
+        try:
+            from modules.scraping import get_itineraries_for_legs
+        except ImportError:
+            from scraping import get_itineraries_for_legs
+        # Each step of the scraping generator is run through offload, so results still stream per leg
+        results = get_itineraries_for_legs(legs, pool=self.pool)
+        done = object()
+        try:
+            while True:
+                item = self._run(next, results, done)
+                if item is done:
+                    return
+                index, lines = item
+                yield index, self.parse_lines(lines)
+        finally:
+            # Closing the tabs and returning the browser are blocking calls too
+            self._run(results.close)
+
+    @staticmethod
+    def parse_lines(lines):
+        options = [option for option in map(parse_option_line, lines) if option is not None]
+        # The scraper reports its failures as text lines instead of raising
+        if lines and not options:
+            logger.warning(f"Scraper error: {lines[0]}")
+            return None
+        return options
+
+
+class FallbackProvider(TransportProvider):
+    """
+    Tries each provider in turn until one returns options.
+    """
+
+    name = "fallback"
+
+    def __init__(self, providers):
+        if not providers:
+            raise ValueError("At least one transport provider is required")
+        self.providers = list(providers)
+
+    def get_itineraries(self, origin, destination):
+        errors = []
+        for provider in self.providers:
+            try:
+                itineraries = provider.get_itineraries(origin, destination)
+            except Exception as e:
+                logger.warning(f"Provider {provider.name} failed for {origin} → {destination}: {e}")
+                errors.append(e)
+                continue
+            if itineraries:
+                return itineraries
+        # "No options" only when a provider actually answered, otherwise the lookup failed
+        if len(errors) == len(self.providers):
+            raise errors[-1]
+        return []
+
+    def get_route_itineraries(self, legs):
+        # Legs the first provider failed on or had nothing for go to the next one, all together
+        remaining = list(range(len(legs)))
+        answered = set()
+        for provider in self.providers:
+            unresolved = []
+            resolved = set()
+            try:
+                for position, options in provider.get_route_itineraries([legs[i] for i in remaining]):
+                    index = remaining[position]
+                    resolved.add(index)
+                    if options:
+                        yield index, options
+                        continue
+                    if options is not None:
+                        answered.add(index)
+                    unresolved.append(index)
+            except Exception as e:
+                logger.warning(f"Provider {provider.name} failed for a route of {len(remaining)} legs: {e}")
+            remaining = unresolved + [index for index in remaining if index not in resolved]
+            if not remaining:
+                return
+        for index in remaining:
+            yield index, [] if index in answered else None
+
+    def close(self):
+        for provider in self.providers:
+            provider.close()
+
+
+def create_provider(names=None, offload=None):
+    """
+    Build the provider chain from a comma-separated list of names
+    (TRANSPORT_PROVIDERS, default "rome2rio_api,selenium").
+
+    The rome2rio API provider is left out when no ROME2RIO_API_KEY is configured.
+    `offload` is handed to the browser scraper (see SeleniumProvider).
+    """
+    names = names or os.getenv("TRANSPORT_PROVIDERS", DEFAULT_PROVIDERS)
+    providers = []
+    for name in (name.strip() for name in names.split(",")):
+        if name == Rome2rioApiProvider.name:
+            if os.getenv("ROME2RIO_API_KEY"):
+                providers.append(Rome2rioApiProvider())
+            else:
+                logger.warning("ROME2RIO_API_KEY is not set: rome2rio API provider disabled")
+        elif name == SeleniumProvider.name:
+            providers.append(SeleniumProvider(offload=offload))
+        elif name:
+            raise ValueError(f"Unknown transport provider: {name}")
+
+    if not providers:
+        raise ValueError(f"No usable transport provider in {names!r}")
+    if len(providers) == 1:
+        return providers[0]
+    return FallbackProvider(providers)